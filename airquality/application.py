@@ -20,8 +20,13 @@ from airquality.usecase.purpleair import Purpleair
 from airquality.usecase.atmotube import Atmotube
 from airquality.usecase.purp_update import PurpUpdate
 from airquality.usecase.openweathermap import Openweathermap
+from airquality.extra.url import configure_http_session, close_http_session, http_connection_stats, \
+    configure_http_cache, configure_http_resilience
+from airquality.extra.jsoncodec import configure_json_decoder
+from airquality.extra.timest import configure_timezone_cache, timezone_cache_stats, warm_up_timezone_finder
 from airquality.database.gateway import DatabaseGateway
-from airquality.database.adapter import Psycopg2Adapter
+from airquality.database.adapter import DatabaseAdapter, Psycopg2Adapter, Psycopg2PoolAdapter
+from airquality.database.instrument import InstrumentedDatabaseAdapter
 
 
 def _raise(cause: str):
@@ -32,6 +37,7 @@ def _raise(cause: str):
 class Application(object):
     def __init__(self):
         self._exit_code = 0
+        self._instrumented_adapt = None
         if not _SYS_ARGS:
             self._exit_code = 1
             _raise(cause="Expected at least one argument")
@@ -49,20 +55,59 @@ class Application(object):
         if exc_type is not None:
             self._exit_code = 3
             _ROOT_LOGGER.exception(exc_val)
+        _ROOT_LOGGER.debug("%s" % repr(http_connection_stats()))
+        _ROOT_LOGGER.debug("%s" % repr(timezone_cache_stats()))
+        close_http_session()
+        if self._instrumented_adapt is not None:
+            _ROOT_LOGGER.info("query statistics:\n%s" % self._instrumented_adapt.summary())
         _ROOT_LOGGER.debug("finish with exit code %d" % self._exit_code)
         logging.shutdown()
         sys.exit(self._exit_code)
 
+# =========== DATABASE ADAPTER
+    def _database_adapt(self) -> DatabaseAdapter:
+        credentials = {
+            'dbname': _ENVIRON.dbname,
+            'user': _ENVIRON.dbuser,
+            'password': _ENVIRON.dbpwd,
+            'host': _ENVIRON.dbhost,
+            'port': _ENVIRON.dbport
+        }
+        if _ENVIRON.dbpool_maxconn > 1:
+            database_adapt = Psycopg2PoolAdapter(
+                minconn=_ENVIRON.dbpool_minconn, maxconn=_ENVIRON.dbpool_maxconn,
+                ping_after=_ENVIRON.dbpool_ping_after, **credentials
+            )
+        else:
+            database_adapt = Psycopg2Adapter(**credentials)
+        if _ENVIRON.query_stats:
+            self._instrumented_adapt = InstrumentedDatabaseAdapter(
+                database_adapt=database_adapt, slow_query_threshold=_ENVIRON.slow_query_threshold
+            )
+            return self._instrumented_adapt
+        return database_adapt
+
 # =========== MAIN METHOD
     def main(self):
-        with Psycopg2Adapter(
-            dbname=_ENVIRON.dbname,
-            user=_ENVIRON.dbuser,
-            password=_ENVIRON.dbpwd,
-            host=_ENVIRON.dbhost,
-            port=_ENVIRON.dbport
-        ) as database_adapt:
-            database_gway = DatabaseGateway(database_adapt=database_adapt)
+        configure_http_session(
+            pool_connections=_ENVIRON.http_pool_connections, pool_maxsize=_ENVIRON.http_pool_maxsize
+        )
+        _ROOT_LOGGER.debug("decoding json with '%s'" % configure_json_decoder(name=_ENVIRON.json_decoder))
+        configure_timezone_cache(grid=_ENVIRON.timezone_grid, maxsize=_ENVIRON.timezone_cache_size)
+        if _ENVIRON.timezone_warm_up:
+            warm_up_timezone_finder()
+        configure_http_resilience(
+            max_retries=_ENVIRON.http_max_retries, backoff_base=_ENVIRON.http_backoff_base,
+            backoff_max=_ENVIRON.http_backoff_max, failure_threshold=_ENVIRON.circuit_failure_threshold,
+            reset_timeout=_ENVIRON.circuit_reset_timeout
+        )
+        if _ENVIRON.http_cache_dir:
+            configure_http_cache(cache_dir=_ENVIRON.http_cache_dir, max_bytes=_ENVIRON.http_cache_max_bytes)
+        with self._database_adapt() as database_adapt:
+            database_gway = DatabaseGateway(
+                database_adapt=database_adapt,
+                packet_id_block_size=_ENVIRON.packet_id_block_size
+            )
             if self._personality == 'purpleair':
                 Purpleair(database_gway=database_gway).execute()
             elif self._personality == 'atmotube':
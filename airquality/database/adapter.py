@@ -10,8 +10,30 @@ import logging
 _LOGGER = logging.getLogger(__name__)
 
 ######################################################
-from psycopg2 import connect
+import threading
+from time import monotonic
+from typing import Tuple, Iterable
+from dataclasses import dataclass
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from psycopg2 import connect, OperationalError, InterfaceError
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extensions import TRANSACTION_STATUS_UNKNOWN
+
+
+@contextmanager
+def _transaction(conn):
+    """
+    A context manager that temporarily disables the autocommit mode of *conn* so that all the statements executed
+    inside the block are either committed together or rolled back together.
+    """
+
+    conn.autocommit = False
+    try:
+        with conn:
+            yield
+    finally:
+        conn.autocommit = True
 
 
 class DatabaseAdapter(ABC):
@@ -19,6 +41,16 @@ class DatabaseAdapter(ABC):
     AbstractBaseClass that defines the basic interface for interacting with a database.
     """
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _LOGGER.debug('closing database connection')
+        self.close()
+        if exc_type is not None:
+            _LOGGER.exception(exc_val)
+            raise exc_type(exc_val)
+
     @abstractmethod
     def fetchone(self, query: str):
         pass
@@ -31,6 +63,21 @@ class DatabaseAdapter(ABC):
     def execute(self, query: str):
         pass
 
+    @abstractmethod
+    def execute_all(self, queries: Iterable[str]):
+        """
+        A method that executes the *queries* one at a time (as they are generated) within the same transaction.
+        """
+        pass
+
+    @abstractmethod
+    def copy(self, buffer, table: str, columns: Tuple[str, ...], query=""):
+        """
+        A method that streams the rows in *buffer* (COPY text format) into *columns* of *table* and then executes
+        the (optional) *query* within the same transaction.
+        """
+        pass
+
     @abstractmethod
     def close(self):
         pass
@@ -53,16 +100,6 @@ class Psycopg2Adapter(DatabaseAdapter):
         self.conn = connect(dbname=dbname, user=user, password=password, host=host, port=port)
         self.conn.autocommit = True
 
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        _LOGGER.debug('closing database connection')
-        self.close()
-        if exc_type is not None:
-            _LOGGER.exception(exc_val)
-            raise exc_type(exc_val)
-
     def fetchone(self, query: str):
         with self.conn.cursor() as cur:
             cur.execute(query)
@@ -77,8 +114,218 @@ class Psycopg2Adapter(DatabaseAdapter):
         with self.conn.cursor() as cur:
             cur.execute(query)
 
+    def execute_all(self, queries: Iterable[str]):
+        with _transaction(self.conn):
+            with self.conn.cursor() as cur:
+                for query in queries:
+                    cur.execute(query)
+
+    def copy(self, buffer, table: str, columns: Tuple[str, ...], query=""):
+        with _transaction(self.conn):
+            with self.conn.cursor() as cur:
+                cur.copy_expert(sql=f"COPY {table} ({', '.join(columns)}) FROM STDIN;", file=buffer)
+                if query:
+                    cur.execute(query)
+
     def close(self):
         self.conn.close()
 
     def __repr__(self):
         return f"{type(self).__name__}(conn={self.conn!r})"
+
+
+@dataclass
+class PoolUsageStats(object):
+    """
+    A *dataclass* that defines the usage statistics of a *Psycopg2PoolAdapter* connection pool.
+    """
+
+    minconn: int                        # The number of idle connections kept open by the pool.
+    maxconn: int                        # The maximum number of connections that can be checked out at once.
+    in_use: int                         # The number of connections currently checked out.
+    peak_in_use: int                    # The highest number of connections checked out at the same time.
+    checkouts: int                      # The total number of connection checkouts.
+    waits: int                          # The number of checkouts that had to wait for a free connection.
+    discarded: int                      # The number of connections discarded because they failed the health check.
+
+
+class Psycopg2PoolAdapter(DatabaseAdapter):
+    """
+    A class that implements the *DatabaseAdapter* interface on top of a thread-safe psycopg2 connection pool.
+
+    Every call checks out an autocommit connection from the pool and gives it back when it is done, so that
+    different threads can use the database concurrently. A thread that needs to run several calls on the same
+    connection can group them inside a *unit_of_work* block.
+
+    When all the *maxconn* connections are in use, a checkout waits until one is given back.
+    Only *minconn* idle connections are kept open by the pool, the others are closed when given back.
+
+    A connection that is closed (or whose state is unknown) is discarded at checkout. The trivial health check
+    query is run only on the connections that sat idle in the pool for more than *ping_after* seconds, so that the
+    connections reused right away do not pay an extra round trip.
+
+    Keyword arguments:
+        *dbname*            the database name to connect.
+        *user*              the username to log in the database as.
+        *password*          the username's password for database login.
+        *host*              the database's connection host.
+        *port*              the database's connection port.
+        *minconn*           the number of idle connections kept open by the pool.
+        *maxconn*           the maximum number of connections open at the same time.
+        *health_check*      if True, a connection idle for too long is validated with a trivial query before use.
+        *ping_after*        the idle seconds after which a connection is validated with the trivial query.
+
+    """
+
+    _HEALTH_CHECK_QUERY = "SELECT 1;"
+
+    def __init__(
+        self, dbname: str, user: str, password: str, host: str, port: str, minconn=1, maxconn=8, health_check=True,
+        ping_after=30.0
+    ):
+        self._pool = ThreadedConnectionPool(
+            minconn, maxconn, dbname=dbname, user=user, password=password, host=host, port=port
+        )
+        self._minconn = minconn
+        self._maxconn = maxconn
+        self._health_check = health_check
+        self._ping_after = ping_after
+        self._idle_since = {}           # id of a connection given back -> the time it was given back
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self._in_use = self._peak_in_use = self._checkouts = self._waits = self._discarded = 0
+
+# =========== CONNECTION CHECKOUT
+    def _checkout(self):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._waits += 1
+            self._slots.acquire()
+        try:
+            conn = self._healthy_connection()
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._stats_lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+        return conn
+
+    def _healthy_connection(self):
+        while True:
+            conn = self._pool.getconn()
+            if self._is_healthy(conn):
+                conn.autocommit = True
+                return conn
+            _LOGGER.warning('discarding broken database connection')
+            with self._stats_lock:
+                self._discarded += 1
+            self._pool.putconn(conn, close=True)
+
+    def _is_healthy(self, conn) -> bool:
+        with self._stats_lock:
+            idle_since = self._idle_since.pop(id(conn), None)
+        if conn.closed or conn.info.transaction_status == TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if not self._health_check or idle_since is None or monotonic() - idle_since <= self._ping_after:
+            return True
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(self._HEALTH_CHECK_QUERY)
+            return True
+        except (OperationalError, InterfaceError):
+            return False
+
+    def _checkin(self, conn):
+        try:
+            self._pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            with self._stats_lock:
+                if not conn.closed:
+                    self._idle_since[id(conn)] = monotonic()
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._checkin(conn)
+
+    @contextmanager
+    def unit_of_work(self):
+        """
+        A context manager that pins a single pooled connection to the calling thread, so that all the calls done
+        by that thread inside the block use the same connection. Nested blocks reuse the outer connection.
+        """
+
+        if getattr(self._local, 'conn', None) is not None:
+            yield self
+            return
+        self._local.conn = self._checkout()
+        try:
+            yield self
+        finally:
+            conn, self._local.conn = self._local.conn, None
+            self._checkin(conn)
+
+# =========== DATABASE ADAPTER INTERFACE
+    def fetchone(self, query: str):
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query)
+                return cur.fetchone()
+
+    def fetchall(self, query: str):
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query)
+                return cur.fetchall()
+
+    def execute(self, query: str):
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query)
+
+    def execute_all(self, queries: Iterable[str]):
+        with self._connection() as conn:
+            with _transaction(conn):
+                with conn.cursor() as cur:
+                    for query in queries:
+                        cur.execute(query)
+
+    def copy(self, buffer, table: str, columns: Tuple[str, ...], query=""):
+        with self._connection() as conn:
+            with _transaction(conn):
+                with conn.cursor() as cur:
+                    cur.copy_expert(sql=f"COPY {table} ({', '.join(columns)}) FROM STDIN;", file=buffer)
+                    if query:
+                        cur.execute(query)
+
+    def stats(self) -> PoolUsageStats:
+        with self._stats_lock:
+            return PoolUsageStats(
+                minconn=self._minconn,
+                maxconn=self._maxconn,
+                in_use=self._in_use,
+                peak_in_use=self._peak_in_use,
+                checkouts=self._checkouts,
+                waits=self._waits,
+                discarded=self._discarded
+            )
+
+    def close(self):
+        _LOGGER.debug("%s" % repr(self.stats()))
+        self._pool.closeall()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(minconn={self._minconn}, maxconn={self._maxconn})"
@@ -0,0 +1,48 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-14, lun, 15:02
+# ======================================
+import threading
+from typing import Callable
+
+
+class PacketIdAllocator(object):
+    """
+    A class that hands out contiguous ranges of packet ids from blocks reserved in advance, so that the database
+    is queried only when the current block runs out.
+
+    The allocator is thread-safe. The ids left in a block that is too small for a request are skipped, so the
+    packet ids are unique and increasing but may have gaps.
+
+    Keyword arguments:
+        *freserve*          the function that reserves a block of *size* ids and returns the first id of the block.
+        *block_size*        the minimum number of ids to reserve each time the current block runs out.
+
+    """
+
+    def __init__(self, freserve: Callable[[int], int], block_size=10000):
+        if block_size < 1:
+            raise ValueError(f"{type(self).__name__} expected *block_size* to be a positive integer")
+        self._freserve = freserve
+        self._block_size = block_size
+        self._lock = threading.Lock()
+        self._next_id = self._end_id = 0
+
+    def reserve(self, n: int) -> int:
+        """
+        A method that reserves *n* contiguous packet ids and returns the first one.
+        """
+
+        if n < 1:
+            raise ValueError(f"{type(self).__name__} expected to reserve at least one packet id, got '{n}'")
+        with self._lock:
+            if self._end_id - self._next_id < n:
+                size = max(n, self._block_size)
+                self._next_id = self._freserve(size)
+                self._end_id = self._next_id + size
+            start_id = self._next_id
+            self._next_id += n
+            return start_id
+
+    def __repr__(self):
+        return f"{type(self).__name__}(next_id={self._next_id}, end_id={self._end_id}, block_size={self._block_size})"
@@ -5,20 +5,86 @@
 # Description: INSERT HERE THE DESCRIPTION
 #
 ######################################################
+import re
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Set, Dict, List
+from types import MappingProxyType
+from typing import Set, Dict, List, Tuple, Iterable, Mapping
 from airquality.database.adapter import DatabaseAdapter
+from airquality.database.allocator import PacketIdAllocator
+from airquality.extra.decorator import ttl_cache, CacheInfo
 from airquality.datamodel.fromdb import GeoareaLocationDM, OpenweathermapKeyDM, \
     SensorInfoDM, SensorLocationDM, SensorApiParamDM
 
 
+# time-to-live (in seconds) of the cached values of the near-static reference tables.
+_REFERENCE_TTL = 3600.0
+_SENSOR_INFO_TTL = 600.0
+_OPENWEATHERMAP_KEY_TTL = 60.0
+
+_CACHED_QUERIES = ('query_measure_param_owned_by', 'query_openweathermap_keys', 'query_weather_conditions',
+                   'query_place_location', 'query_fixed_sensor_unique_info', 'query_mobile_sensor_unique_info')
+
+# the PurpleAir sensor's name ends with the sensor_index between round brackets (e.g., 'name (1234)').
+_PURPLEAIR_SENSOR_INDEX_PATTERN = re.compile(r'\((\d+)\)$')
+
+_RESERVE_PACKET_ID_QUERY = "UPDATE level0_raw.packet_id_counter SET next_id = next_id + {size} " \
+                           "WHERE counter_name = '{counter}' RETURNING next_id - {size};"
+
+
 class DatabaseGateway(object):
-    def __init__(self, database_adapt: DatabaseAdapter):
+    def __init__(self, database_adapt: DatabaseAdapter, packet_id_block_size=10000):
         self._database_adapt = database_adapt
+        self._station_packet_ids = PacketIdAllocator(
+            freserve=lambda size: self._reserve_packet_id_block(counter='station_measurement', size=size),
+            block_size=packet_id_block_size
+        )
+        self._mobile_packet_ids = PacketIdAllocator(
+            freserve=lambda size: self._reserve_packet_id_block(counter='mobile_measurement', size=size),
+            block_size=packet_id_block_size
+        )
 
     def execute(self, query: str):
         self._database_adapt.execute(query)
 
+    def execute_all(self, queries: Iterable[str]):
+        self._database_adapt.execute_all(queries=queries)
+
+    def copy(self, buffer, table: str, columns: Tuple[str, ...], query=""):
+        self._database_adapt.copy(buffer=buffer, table=table, columns=columns, query=query)
+
+    def insert_measures(self, responses, loader_mode='insert', max_rows=1000, max_bytes=1048576):
+        """
+        A method that stores the measures of the station or mobile *responses* and updates the last acquisition of
+        their sensor, in a single transaction, with the given *loader_mode*:
+
+            'copy'          streams the measures with COPY;
+            'chunked'       runs INSERT statements of at most *max_rows* packets and about *max_bytes* characters;
+            'insert'        runs a single INSERT statement.
+
+        """
+
+        if loader_mode == 'copy':
+            self.copy(
+                buffer=responses.copy_buffer(),
+                table=responses.COPY_TABLE,
+                columns=responses.COPY_COLUMNS,
+                query=responses.last_acquisition_query()
+            )
+        elif loader_mode == 'chunked':
+            self.execute_all(queries=responses.queries(max_rows=max_rows, max_bytes=max_bytes))
+        else:
+            self.execute(query=responses.query())
+
+    def unit_of_work(self):
+        """
+        A method that returns a context manager that runs all the calls done inside it on the same database
+        connection (see *Psycopg2PoolAdapter.unit_of_work*). A single connection adapter needs nothing to do so.
+        """
+
+        unit_of_work = getattr(self._database_adapt, 'unit_of_work', None)
+        return nullcontext() if unit_of_work is None else unit_of_work()
+
 # =========== SELECT ID QUERIES
     def _safe_fetch_id(self, query: str):
         row = self._database_adapt.fetchone(query)
@@ -29,15 +95,32 @@ class DatabaseGateway(object):
             query="SELECT MAX(id) FROM level0_raw.sensor;"
         )
 
-    def query_max_mobile_packet_id_plus_one(self) -> int:
-        return self._safe_fetch_id(
-            query="SELECT MAX(packet_id) FROM level0_raw.mobile_measurement;"
-        )
+# =========== CACHE MANAGEMENT
+    def invalidate_cache(self, *queries: str):
+        """
+        A method that drops the cached values of the given *queries* (all the cached queries if none is given).
+        The caches are defined on the class: the values cached by all the *DatabaseGateway* instances are dropped.
+        """
 
-    def query_max_station_packet_id_plus_one(self) -> int:
-        return self._safe_fetch_id(
-            query="SELECT MAX(packet_id) FROM level0_raw.station_measurement;"
-        )
+        for name in queries or _CACHED_QUERIES:
+            getattr(DatabaseGateway, name).cache_clear()
+
+    def cache_stats(self) -> Dict[str, CacheInfo]:
+        return {name: getattr(DatabaseGateway, name).cache_info() for name in _CACHED_QUERIES}
+
+# =========== PACKET ID RESERVATION
+    def _reserve_packet_id_block(self, counter: str, size: int) -> int:
+        row = self._database_adapt.fetchone(query=_RESERVE_PACKET_ID_QUERY.format(counter=counter, size=size))
+        if row is None:
+            raise ValueError(f"Cannot found a record corresponding to counter_name = '{counter}' in "
+                             f"'level0_raw.packet_id_counter' table (apply 'sql/migrations/001_packet_id_counter.sql')")
+        return row[0]
+
+    def reserve_station_packet_ids(self, n: int) -> int:
+        return self._station_packet_ids.reserve(n)
+
+    def reserve_mobile_packet_ids(self, n: int) -> int:
+        return self._mobile_packet_ids.reserve(n)
 
 # =========== SELECT SET QUERIES
     def query_poscodes_of_country(self, country_code: str) -> Set[str]:
@@ -53,12 +136,13 @@ class DatabaseGateway(object):
         return {row[0] for row in rows}
 
 # =========== SELECT MAPPING QUERIES
-    def query_measure_param_owned_by(self, owner: str) -> Dict[str, int]:
+    @ttl_cache(ttl=_REFERENCE_TTL, maxsize=16, method=True)
+    def query_measure_param_owned_by(self, owner: str) -> Mapping[str, int]:
         query = f"SELECT id, param_code FROM level0_raw.measure_param WHERE param_owner ILIKE '%{owner}%';"
         rows = self._database_adapt.fetchall(query=query)
         if len(rows) == 0:
             raise ValueError(f"Table 'level0_raw.measure_param' doesn't contain sensors owned by = '{owner}'")
-        return {code: ident for ident, code in rows}
+        return MappingProxyType({code: ident for ident, code in rows})
 
 # =========== SELECT LIST QUERIES
     def query_sensor_apiparam_of_type(self, sensor_type: str) -> List[SensorApiParamDM]:
@@ -70,19 +154,36 @@ class DatabaseGateway(object):
             raise ValueError(f"Table 'level0_raw.sensor_api_param' doesn't contain sensors of type = '{sensor_type}'")
         return [SensorApiParamDM(sid=sid, key=key, id=ident, ch=name, last=last) for sid, key, ident, name, last in rows]
 
-    def query_openweathermap_keys(self) -> List[OpenweathermapKeyDM]:
+    @ttl_cache(ttl=_OPENWEATHERMAP_KEY_TTL, maxsize=8, method=True)
+    def query_openweathermap_keys(self) -> Tuple[OpenweathermapKeyDM, ...]:
         query = "SELECT key_value, done_req_min, max_req_min FROM level0_raw.openweathermap_key;"
         rows = self._database_adapt.fetchall(query=query)
         if len(rows) == 0:
             raise ValueError(f"Table 'level0_raw.openweathermap_key' is empty.")
-        return [OpenweathermapKeyDM(key=key_val, n_done=done_r, n_max=max_r) for key_val, done_r, max_r in rows]
+        return tuple(OpenweathermapKeyDM(key=key_val, n_done=done_r, n_max=max_r) for key_val, done_r, max_r in rows)
 
-    def query_weather_conditions(self) -> Dict[str, int]:
+    def update_openweathermap_keys_usage(self, done_requests: Dict[str, int]):
+        """
+        A method that writes back the number of requests done in the last minute with each key in a single
+        statement, and invalidates the cached keys.
+        """
+
+        if not done_requests:
+            return
+        values = ','.join(f"('{key}', {n_done})" for key, n_done in done_requests.items())
+        self._database_adapt.execute(
+            query=f"UPDATE level0_raw.openweathermap_key AS k SET done_req_min = v.n_done "
+                  f"FROM (VALUES {values}) AS v(key_value, n_done) WHERE k.key_value = v.key_value;"
+        )
+        self.invalidate_cache('query_openweathermap_keys')
+
+    @ttl_cache(ttl=_REFERENCE_TTL, maxsize=8, method=True)
+    def query_weather_conditions(self) -> Mapping[str, int]:
         query = "SELECT id, code, icon FROM level0_raw.weather_condition;"
         rows = self._database_adapt.fetchall(query=query)
         if len(rows) == 0:
             raise ValueError(f"Table 'level0_raw.weather_condition' is empty.")
-        return {f"{code}_{icon}": id_ for id_, code, icon in rows}
+        return MappingProxyType({f"{code}_{icon}": id_ for id_, code, icon in rows})
 
 # =========== SELECT SINGLE ROW QUERIES
     def query_last_acquisition_of(self, sensor_id: int, ch_name: str) -> datetime:
@@ -94,6 +195,7 @@ class DatabaseGateway(object):
                              f"channel_name = '{ch_name}' in 'level0_raw.sensor_api_param' table.")
         return row[0]
 
+    @ttl_cache(ttl=_REFERENCE_TTL, maxsize=1024, method=True)
     def query_place_location(self, country_code: str, place_name: str) -> GeoareaLocationDM:
         query = "SELECT id, ST_X(geom), ST_Y(geom) FROM level0_raw.geographical_area " \
                 f"WHERE country_code = '{country_code}' AND place_name = '{place_name}';"
@@ -103,6 +205,7 @@ class DatabaseGateway(object):
                              f"place_name = '{place_name}' in 'level0_raw.geographical_area' table")
         return GeoareaLocationDM(id=row[0], longitude=row[1], latitude=row[2])
 
+    @ttl_cache(ttl=_SENSOR_INFO_TTL, maxsize=4096, method=True)
     def query_fixed_sensor_unique_info(self, sensor_id: int):
         query = "SELECT s.id, s.sensor_name, ST_X(l.geom), ST_Y(l.geom) FROM level0_raw.sensor AS s " \
                 "INNER JOIN level0_raw.sensor_at_location AS l ON s.id = l.sensor_id " \
@@ -113,6 +216,7 @@ class DatabaseGateway(object):
                              f"'{sensor_id}' in 'level0_raw.sensor_at_location' table")
         return SensorInfoDM(sensor_id=row[0], sensor_name=row[1], sensor_lng=row[2], sensor_lat=row[3])
 
+    @ttl_cache(ttl=_SENSOR_INFO_TTL, maxsize=1024, method=True)
     def query_mobile_sensor_unique_info(self, sensor_id: int):
         query = f"SELECT id, sensor_name FROM level0_raw.sensor WHERE id = {sensor_id};"
         row = self._database_adapt.fetchone(query=query)
@@ -131,12 +235,36 @@ class DatabaseGateway(object):
                              f"contains sensor_index = '{sensor_index}' in 'level0_raw.sensor' table.")
         return SensorLocationDM(sensor_id=row[0], longitude=row[1], latitude=row[2])
 
+    def query_purpleair_sensor_locations(self) -> Dict[int, SensorLocationDM]:
+        query = "SELECT s.sensor_name, l.sensor_id, ST_X(l.geom), ST_Y(l.geom) FROM level0_raw.sensor_at_location AS l " \
+                "INNER JOIN level0_raw.sensor AS s ON s.id = l.sensor_id WHERE s.sensor_type ILIKE '%purpleair%' " \
+                "AND l.valid_to IS NULL;"
+        locations = {}
+        for name, sensor_id, lng, lat in self._database_adapt.fetchall(query=query):
+            match = _PURPLEAIR_SENSOR_INDEX_PATTERN.search(name.strip())
+            if match is not None:
+                locations[int(match.group(1))] = SensorLocationDM(sensor_id=sensor_id, longitude=lng, latitude=lat)
+        return locations
+
     def query_hourly_forecast_records(self) -> List:
         return self._database_adapt.fetchall(query="SELECT * FROM level0_raw.hourly_forecast;")
 
     def query_daily_forecast_records(self) -> List:
         return self._database_adapt.fetchall(query="SELECT * FROM level0_raw.daily_forecast;")
 
+    def query_weather_alert_keys(self, days_back=1) -> Set[Tuple[int, str, datetime]]:
+        """
+        A method that loads in a single query the (geoarea_id, alert_event, alert_begin) key of the weather alerts
+        that are still valid (or expired in the last *days_back* days), i.e., of the alerts that the service may
+        return again.
+        """
+
+        rows = self._database_adapt.fetchall(
+            query=f"SELECT geoarea_id, alert_event, alert_begin FROM level0_raw.weather_alert "
+                  f"WHERE alert_until IS NULL OR alert_until >= NOW() - INTERVAL '{days_back} day';"
+        )
+        return {(geoarea_id, event, begin) for geoarea_id, event, begin in rows}
+
     def exists_weather_alert_of(self, alert, geoarea_id: int) -> bool:
         row = self._database_adapt.fetchone(
             query=f"SELECT id FROM level0_raw.weather_alert WHERE geoarea_id = {geoarea_id} "
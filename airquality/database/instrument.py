@@ -0,0 +1,182 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-17, gio, 10:05
+# ======================================
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# ======================================
+import re
+import threading
+from time import perf_counter
+from collections import deque
+from dataclasses import dataclass
+from typing import Tuple, Iterable, List, Dict
+from airquality.database.adapter import DatabaseAdapter
+
+
+_STRING_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_PATTERN = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_VALUES_LIST_PATTERN = re.compile(r"\bVALUES\b[^;]*", re.IGNORECASE)
+_IN_LIST_PATTERN = re.compile(r"\bIN\s*\([^()]*\)", re.IGNORECASE)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+_LATENCY_SAMPLES = 1024
+
+
+def normalize_query(query: str) -> str:
+    """
+    A function that turns *query* into its template by replacing the string and numeric literals with '?' and by
+    collapsing the VALUES and IN lists, so that the queries that differ only by their parameters share the same
+    template.
+
+    :param query:                   the SQL query to normalize
+    :return:                        the SQL template of the query
+    """
+
+    template = _STRING_LITERAL_PATTERN.sub('?', query)
+    template = _NUMBER_LITERAL_PATTERN.sub('?', template)
+    template = _VALUES_LIST_PATTERN.sub('VALUES (...)', template)
+    template = _IN_LIST_PATTERN.sub('IN (...)', template)
+    return _WHITESPACE_PATTERN.sub(' ', template).strip()
+
+
+@dataclass
+class QueryStats(object):
+    """
+    A *dataclass* that defines the statistics collected by *InstrumentedDatabaseAdapter* for a query template.
+    """
+
+    template: str                       # The normalized SQL query.
+    calls: int                          # The number of times the query was executed.
+    total_time: float                   # The total execution time (in seconds).
+    avg_time: float                     # The average execution time (in seconds).
+    p95_time: float                     # The 95th percentile of the (most recent) execution times (in seconds).
+    rows: int                           # The total number of rows returned.
+    bytes: int                          # The total size of the statements (in characters).
+
+
+class _QueryRecord(object):
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.latencies = deque(maxlen=_LATENCY_SAMPLES)
+
+    def stats_of(self, template: str) -> QueryStats:
+        latencies = sorted(self.latencies)
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else 0.0
+        return QueryStats(
+            template=template,
+            calls=self.calls,
+            total_time=self.total_time,
+            avg_time=self.total_time / self.calls if self.calls else 0.0,
+            p95_time=p95,
+            rows=self.rows,
+            bytes=self.bytes
+        )
+
+
+class InstrumentedDatabaseAdapter(DatabaseAdapter):
+    """
+    A class that implements the *DatabaseAdapter* interface by wrapping another adapter and recording, for each
+    query template, the number of calls, the execution time, the rows returned and the statement size.
+
+    A warning is logged for each query that takes longer than *slow_query_threshold* seconds.
+    The other attributes (e.g., *unit_of_work* of the pool adapter) are forwarded to the wrapped adapter.
+
+    Keyword arguments:
+        *database_adapt*            the adapter to wrap.
+        *slow_query_threshold*      the execution time (in seconds) above which a query is logged as slow.
+
+    """
+
+    def __init__(self, database_adapt: DatabaseAdapter, slow_query_threshold=1.0):
+        self._database_adapt = database_adapt
+        self._slow_query_threshold = slow_query_threshold
+        self._lock = threading.Lock()
+        self._records: Dict[str, _QueryRecord] = {}
+
+    def __getattr__(self, item):
+        if item == '_database_adapt':
+            raise AttributeError(item)
+        return getattr(self._database_adapt, item)
+
+# =========== RECORDING METHODS
+    def _record(self, query: str, elapsed: float, rows=0, size=None):
+        template = normalize_query(query)
+        with self._lock:
+            record = self._records.setdefault(template, _QueryRecord())
+            record.calls += 1
+            record.total_time += elapsed
+            record.rows += rows
+            record.bytes += len(query) if size is None else size
+            record.latencies.append(elapsed)
+        if elapsed >= self._slow_query_threshold:
+            _LOGGER.warning("slow query (%.3f s): %s" % (elapsed, template))
+
+    def _timed(self, queries: Iterable[str]):
+        for query in queries:
+            start = perf_counter()
+            yield query
+            self._record(query=query, elapsed=perf_counter() - start)
+
+# =========== DATABASE ADAPTER INTERFACE
+    def fetchone(self, query: str):
+        start = perf_counter()
+        row = self._database_adapt.fetchone(query)
+        self._record(query=query, elapsed=perf_counter() - start, rows=0 if row is None else 1)
+        return row
+
+    def fetchall(self, query: str):
+        start = perf_counter()
+        rows = self._database_adapt.fetchall(query)
+        self._record(query=query, elapsed=perf_counter() - start, rows=len(rows))
+        return rows
+
+    def execute(self, query: str):
+        start = perf_counter()
+        self._database_adapt.execute(query)
+        self._record(query=query, elapsed=perf_counter() - start)
+
+    def execute_all(self, queries: Iterable[str]):
+        self._database_adapt.execute_all(queries=self._timed(queries))
+
+    def copy(self, buffer, table: str, columns: Tuple[str, ...], query=""):
+        size = len(buffer.getvalue()) if hasattr(buffer, 'getvalue') else 0
+        start = perf_counter()
+        self._database_adapt.copy(buffer=buffer, table=table, columns=columns, query=query)
+        self._record(
+            query=f"COPY {table} ({', '.join(columns)}) FROM STDIN;{query}",
+            elapsed=perf_counter() - start,
+            size=size + len(query)
+        )
+
+    def close(self):
+        self._database_adapt.close()
+
+# =========== STATISTICS METHODS
+    def stats(self) -> List[QueryStats]:
+        """
+        A method that returns the statistics of each query template, from the most to the least expensive one.
+        """
+
+        with self._lock:
+            stats = [record.stats_of(template) for template, record in self._records.items()]
+        return sorted(stats, key=lambda s: s.total_time, reverse=True)
+
+    def summary(self, max_template_length=80) -> str:
+        lines = [f"{'calls':>7} {'total(s)':>9} {'avg(ms)':>9} {'p95(ms)':>9} {'rows':>9} {'bytes':>11}  template"]
+        for s in self.stats():
+            template = s.template if len(s.template) <= max_template_length else \
+                s.template[:max_template_length - 3] + '...'
+            lines.append(f"{s.calls:>7} {s.total_time:>9.3f} {s.avg_time * 1000:>9.2f} {s.p95_time * 1000:>9.2f} "
+                         f"{s.rows:>9} {s.bytes:>11}  {template}")
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(database_adapt={self._database_adapt!r}, " \
+               f"slow_query_threshold={self._slow_query_threshold})"
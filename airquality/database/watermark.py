@@ -0,0 +1,50 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-15, mar, 09:12
+# ======================================
+import threading
+from datetime import datetime
+from typing import List
+from airquality.datamodel.fromdb import SensorApiParamDM
+
+
+class WatermarkTable(object):
+    """
+    A class that keeps in memory the last acquisition timestamp (the watermark) of each sensor's channel, keyed
+    by (sensor_id, ch_name).
+
+    The table is loaded from the *SensorApiParamDM* already queried from the database and is advanced in memory
+    after each successful insert, so that the validators do not need to query the database for each window.
+
+    Keyword arguments:
+        *api_param*         the sensor's API parameters (with their last acquisition timestamp).
+
+    """
+
+    def __init__(self, api_param: List[SensorApiParamDM]):
+        self._lock = threading.Lock()
+        self._watermarks = {(param.sid, param.ch): param.last for param in api_param}
+
+    def watermark_of(self, sensor_id: int, ch_name: str) -> datetime:
+        with self._lock:
+            watermark = self._watermarks.get((sensor_id, ch_name))
+        if watermark is None:
+            raise ValueError(f"{type(self).__name__} cannot found the watermark corresponding to "
+                             f"sensor_id = '{sensor_id}' and channel_name = '{ch_name}'")
+        return watermark
+
+    def advance(self, sensor_id: int, ch_name: str, time: datetime):
+        """
+        A method that moves the watermark of the channel forward to *time* (it never moves it backward).
+        """
+
+        with self._lock:
+            current = self._watermarks.get((sensor_id, ch_name))
+            if current is None or time > current:
+                self._watermarks[(sensor_id, ch_name)] = time
+
+    def __len__(self):
+        return len(self._watermarks)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(channels={len(self)})"
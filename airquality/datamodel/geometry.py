@@ -16,6 +16,10 @@ class NullGeometry(object):
     def __str__(self):
         return 'NULL'
 
+    def ewkt(self):
+        """The value used for a NULL geometry when the geometry is loaded through COPY."""
+        return None
+
 
 @dataclass
 class PostgisPoint(object):
@@ -36,3 +40,7 @@ class PostgisPoint(object):
     def __str__(self):
         geom = f"POINT({self.longitude} {self.latitude})"
         return f"ST_GeomFromText('{geom}', {self.srid})"
+
+    def ewkt(self) -> str:
+        """The Extended Well-Known Text of the point (accepted by PostGIS geometry input, e.g., through COPY)."""
+        return f"SRID={self.srid};POINT({self.longitude} {self.latitude})"
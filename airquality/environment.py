@@ -12,6 +12,9 @@ from airquality.meta.singleton import Singleton
 
 
 _LOGGING_DIR_PERMISSION = 0o600         # only the user can read/write from that directory.
+_VALID_LOADER_MODES = ('insert', 'copy', 'chunked')
+_VALID_FORECAST_MODES = ('delete', 'replace')
+_VALID_WINDOW_MODES = ('fixed', 'adaptive')
 
 
 def get_environ(**kwargs):
@@ -45,6 +48,9 @@ class Environment(object, metaclass=Singleton):
             raise KeyError(f"Cannot found '{property_name}' in '{self._env_path}'")
         return property_val
 
+    def _get_from_environ_or_default(self, property_name: str, default):
+        return os.environ.get(property_name, default)
+
 # =========== APPLICATION PROPERTIES
     @property
     def valid_personalities(self) -> Tuple[str]:
@@ -81,6 +87,135 @@ class Environment(object, metaclass=Singleton):
     def url_template(self, personality: str) -> str:
         return self._secure_get_from_environ(f'{personality}_url')
 
+# =========== HTTP SESSION PROPERTIES
+    @property
+    def http_pool_connections(self) -> int:
+        return int(self._get_from_environ_or_default('http_pool_connections', 10))
+
+    @property
+    def http_pool_maxsize(self) -> int:
+        return int(self._get_from_environ_or_default('http_pool_maxsize', 10))
+
+    @property
+    def http_fetch_workers(self) -> int:
+        return int(self._get_from_environ_or_default('http_fetch_workers', 1))
+
+    @property
+    def http_cache_dir(self) -> str:
+        return self._get_from_environ_or_default('http_cache_dir', '')
+
+    @property
+    def http_cache_max_bytes(self) -> int:
+        return int(self._get_from_environ_or_default('http_cache_max_bytes', 268435456))
+
+    @property
+    def http_max_retries(self) -> int:
+        return int(self._get_from_environ_or_default('http_max_retries', 3))
+
+    @property
+    def http_backoff_base(self) -> float:
+        return float(self._get_from_environ_or_default('http_backoff_base', 0.5))
+
+    @property
+    def http_backoff_max(self) -> float:
+        return float(self._get_from_environ_or_default('http_backoff_max', 30.0))
+
+    @property
+    def circuit_failure_threshold(self) -> int:
+        return int(self._get_from_environ_or_default('circuit_failure_threshold', 5))
+
+    @property
+    def circuit_reset_timeout(self) -> float:
+        return float(self._get_from_environ_or_default('circuit_reset_timeout', 60.0))
+
+    @property
+    def json_decoder(self) -> str:
+        return self._get_from_environ_or_default('json_decoder', 'auto')
+
+    @property
+    def timezone_grid(self) -> float:
+        return float(self._get_from_environ_or_default('timezone_grid', 0.01))
+
+    @property
+    def timezone_cache_size(self) -> int:
+        return int(self._get_from_environ_or_default('timezone_cache_size', 4096))
+
+    @property
+    def timezone_warm_up(self) -> bool:
+        return self._get_from_environ_or_default('timezone_warm_up', 'false').lower() in ('true', '1', 'yes')
+
+    @property
+    def json_streaming(self) -> bool:
+        return self._get_from_environ_or_default('json_streaming', 'false').lower() in ('true', '1', 'yes')
+
+    @property
+    def purpleair_snapshot_file(self) -> str:
+        return self._get_from_environ_or_default('purpleair_snapshot_file', '')
+
+    @property
+    def purpleair_snapshot_max_age(self) -> float:
+        return float(self._get_from_environ_or_default('purpleair_snapshot_max_age', 900.0))
+
+    @property
+    def thingspeak_window_mode(self) -> str:
+        mode = self._get_from_environ_or_default('thingspeak_window_mode', 'fixed')
+        if mode not in _VALID_WINDOW_MODES:
+            raise ValueError(f"Expected 'thingspeak_window_mode' to be one of {_VALID_WINDOW_MODES}, got '{mode}'")
+        return mode
+
+    @property
+    def thingspeak_density_file(self) -> str:
+        return self._get_from_environ_or_default('thingspeak_density_file', '')
+
+# =========== DATABASE LOADER PROPERTIES
+    @property
+    def loader_mode(self) -> str:
+        mode = self._get_from_environ_or_default('loader_mode', 'insert')
+        if mode not in _VALID_LOADER_MODES:
+            raise ValueError(f"Expected 'loader_mode' to be one of {_VALID_LOADER_MODES}, got '{mode}'")
+        return mode
+
+    @property
+    def packet_id_block_size(self) -> int:
+        return int(self._get_from_environ_or_default('packet_id_block_size', 10000))
+
+    @property
+    def chunk_max_rows(self) -> int:
+        return int(self._get_from_environ_or_default('chunk_max_rows', 1000))
+
+    @property
+    def chunk_max_bytes(self) -> int:
+        return int(self._get_from_environ_or_default('chunk_max_bytes', 1048576))
+
+    @property
+    def forecast_mode(self) -> str:
+        mode = self._get_from_environ_or_default('forecast_mode', 'delete')
+        if mode not in _VALID_FORECAST_MODES:
+            raise ValueError(f"Expected 'forecast_mode' to be one of {_VALID_FORECAST_MODES}, got '{mode}'")
+        return mode
+
+# =========== DATABASE CONNECTION POOL PROPERTIES
+    @property
+    def dbpool_minconn(self) -> int:
+        return int(self._get_from_environ_or_default('dbpool_minconn', 1))
+
+    @property
+    def dbpool_maxconn(self) -> int:
+        return int(self._get_from_environ_or_default('dbpool_maxconn', 1))
+
+    @property
+    def dbpool_ping_after(self) -> float:
+        return float(self._get_from_environ_or_default('dbpool_ping_after', 30.0))
+
+# =========== DATABASE INSTRUMENTATION PROPERTIES
+    @property
+    def query_stats(self) -> bool:
+        return self._get_from_environ_or_default('query_stats', 'false').lower() in ('true', '1', 'yes')
+
+    @property
+    def slow_query_threshold(self) -> float:
+        return float(self._get_from_environ_or_default('slow_query_threshold', 1.0))
+
 # =========== DATABASE CONNECTION PROPERTIES
     @property
     def dbname(self) -> str:
@@ -2,8 +2,14 @@
 # @author:  Davide Colombo
 # @date:    2022-02-3, gio, 15:38
 # ======================================
+import time
+import weakref
 import logging
+import threading
 import functools
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
 
 
 def log_context(logger_name: str, header: str, teardown: str):
@@ -18,3 +24,65 @@ def log_context(logger_name: str, header: str, teardown: str):
             return value
         return wrapper
     return log_context_decorator
+
+
+def ttl_cache(ttl: float, maxsize=128, method=False):
+    """
+    A decorator that caches the values returned by the decorated function for *ttl* seconds, keyed by the call
+    arguments. When *method* is True the instance (the first argument) is part of the key through a weak reference,
+    so each instance has its own entries and the cache does not keep the instances alive.
+
+    The cache holds at most *maxsize* entries and evicts the least recently used one when it is full.
+    Exceptions raised by the decorated function are not cached. The cached values are returned by reference:
+    the decorated function should return immutable values (e.g., tuples).
+
+    The decorated function exposes *cache_info()* (hit/miss counters), *cache_clear()* and
+    *cache_invalidate(\\*args, \\*\\*kwargs)* for dropping the entry of a single call.
+    """
+
+    def ttl_cache_decorator(func):
+        cache = OrderedDict()
+        lock = threading.Lock()
+        counters = {'hits': 0, 'misses': 0}
+
+        def make_key(args, kwargs):
+            if method and args:
+                args = (weakref.ref(args[0]),) + args[1:]
+            return args, tuple(sorted(kwargs.items()))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            with lock:
+                entry = cache.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    cache.move_to_end(key)
+                    counters['hits'] += 1
+                    return entry[1]
+                counters['misses'] += 1
+            value = func(*args, **kwargs)
+            with lock:
+                cache[key] = (time.monotonic() + ttl, value)
+                cache.move_to_end(key)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return value
+
+        def cache_info() -> CacheInfo:
+            with lock:
+                return CacheInfo(hits=counters['hits'], misses=counters['misses'], maxsize=maxsize, currsize=len(cache))
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+                counters['hits'] = counters['misses'] = 0
+
+        def cache_invalidate(*args, **kwargs):
+            with lock:
+                cache.pop(make_key(args, kwargs), None)
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_invalidate = cache_invalidate
+        return wrapper
+    return ttl_cache_decorator
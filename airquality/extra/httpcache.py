@@ -0,0 +1,207 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-19, sab, 10:40
+# ======================================
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# ======================================
+import os
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Callable
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+_REDACTED = '***'
+_ENTRY_SUFFIX = '.json.gz'
+_SECRET_PARAMS = ('api_key', 'apikey', 'appid', 'key', 'token')
+
+# the windows that ended less than this time ago may still receive data, so they are not considered immutable.
+_IMMUTABLE_GRACE = timedelta(hours=1)
+_END_FORMAT = "%Y-%m-%d %H:%M:%S"
+_DATE_FORMAT = "%Y-%m-%d"
+
+
+def normalize_url(url: str) -> str:
+    """
+    A function that returns *url* with the query parameters sorted by name and the value of the API keys
+    redacted, so that the same resource has always the same cache key and no secret ends up on disk.
+
+    :param url:                     the url to normalize
+    :return:                        the normalized url
+    """
+
+    parts = urlsplit(url)
+    params = sorted(
+        (name, _REDACTED if name.lower() in _SECRET_PARAMS else value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(params), ''))
+
+
+def is_historical_url(url: str, now: Optional[datetime] = None) -> bool:
+    """
+    A function that returns True if *url* asks for a time window that is over, i.e., its 'end' (Thingspeak) or
+    its 'date' (Atmotube) parameter is in the past. The data of such windows do not change anymore.
+
+    :param url:                     the url to check
+    :param now:                     the current naive UTC time (as built by *timest.make_naive*; now in UTC if None)
+    :return:                        True if the url asks for a window in the past, False otherwise.
+    """
+
+    # the 'end' and 'date' parameters are naive UTC times, so they are compared with the naive UTC time.
+    now = datetime.now(tz=timezone.utc).replace(tzinfo=None) if now is None else now
+    params = dict(parse_qsl(urlsplit(url).query))
+    try:
+        if 'end' in params:
+            return datetime.strptime(params['end'], _END_FORMAT) < now - _IMMUTABLE_GRACE
+        if 'date' in params:
+            return datetime.strptime(params['date'], _DATE_FORMAT).date() < (now - _IMMUTABLE_GRACE).date()
+    except ValueError:
+        pass
+    return False
+
+
+@dataclass
+class CachedResponse(object):
+    """
+    A *dataclass* that defines a json response stored in the *DiskResponseCache*.
+    """
+
+    url: str                            # The normalized url of the request.
+    body: Dict                          # The json body of the response.
+    etag: Optional[str] = None          # The 'ETag' header of the response (if any).
+    last_modified: Optional[str] = None     # The 'Last-Modified' header of the response (if any).
+
+    def validators(self) -> Dict[str, str]:
+        """
+        A method that returns the headers for revalidating the cached response with a conditional request.
+        """
+
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class DiskResponseCache(object):
+    """
+    A class that stores the json responses on disk as gzip compressed files, keyed by the normalized url.
+
+    The cache holds at most *max_bytes* (compressed) bytes and evicts the least recently used responses when it
+    is full. It is thread-safe.
+
+    Only the responses that can be reused are stored: the ones of historical windows (that are served without
+    contacting the server) and the ones with an 'ETag' or 'Last-Modified' header (that are revalidated).
+
+    Keyword arguments:
+        *cache_dir*         the directory where the responses are stored (created if missing).
+        *max_bytes*         the maximum size of the cache on disk.
+        *fimmutable*        the function that tells if the response of a url never changes.
+
+    """
+
+    def __init__(self, cache_dir: str, max_bytes=268435456, fimmutable: Callable[[str], bool] = is_historical_url):
+        self._cache_dir = cache_dir
+        self._max_bytes = max_bytes
+        self._fimmutable = fimmutable
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = OrderedDict()         # file name -> size, from the least to the most recently used
+        stats = [(fname, os.stat(os.path.join(cache_dir, fname)))
+                 for fname in os.listdir(cache_dir) if fname.endswith(_ENTRY_SUFFIX)]
+        for fname, stat in sorted(stats, key=lambda item: item[1].st_mtime):
+            self._index[fname] = stat.st_size
+        self._size = sum(self._index.values())
+        self.hits = self.misses = self.revalidated = 0
+
+    def _fname_of(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest() + _ENTRY_SUFFIX
+
+    def is_immutable(self, url: str) -> bool:
+        return self._fimmutable(url)
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        nurl = normalize_url(url)
+        fname = self._fname_of(nurl)
+        with self._lock:
+            if fname not in self._index:
+                self.misses += 1
+                return None
+            path = os.path.join(self._cache_dir, fname)
+            try:
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    entry = CachedResponse(**json.load(f))
+            except (OSError, ValueError, TypeError) as err:
+                _LOGGER.warning("discarding corrupted cache entry '%s': %s" % (fname, str(err)))
+                self._remove(fname)
+                self.misses += 1
+                return None
+            self._touch(fname)
+            self.hits += 1
+            return entry
+
+    def put(self, url: str, body: Dict, etag=None, last_modified=None):
+        if not (etag or last_modified or self.is_immutable(url)):
+            return
+        nurl = normalize_url(url)
+        fname = self._fname_of(nurl)
+        path = os.path.join(self._cache_dir, fname)
+        entry = {'url': nurl, 'body': body, 'etag': etag, 'last_modified': last_modified}
+        with self._lock:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+            self._size -= self._index.pop(fname, 0)
+            self._index[fname] = os.path.getsize(path)
+            self._size += self._index[fname]
+            self._evict()
+
+    def touch(self, url: str):
+        """
+        A method that marks the response of *url* as recently used (e.g., after a successful revalidation).
+        """
+
+        fname = self._fname_of(normalize_url(url))
+        with self._lock:
+            if fname in self._index:
+                self._touch(fname)
+                self.revalidated += 1
+
+    def _touch(self, fname: str):
+        self._index.move_to_end(fname)
+        try:
+            os.utime(os.path.join(self._cache_dir, fname))       # keeps the LRU order across runs
+        except OSError:
+            self._remove(fname)
+
+    def _remove(self, fname: str):
+        self._size -= self._index.pop(fname, 0)
+        try:
+            os.remove(os.path.join(self._cache_dir, fname))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self._size > self._max_bytes and self._index:
+            self._remove(next(iter(self._index)))
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(cache_dir='{self._cache_dir}', entries={len(self)}, size={self._size}, " \
+               f"hits={self.hits}, misses={self.misses}, revalidated={self.revalidated})"
@@ -0,0 +1,86 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-25, ven, 09:05
+# ======================================
+import json
+import importlib
+from typing import Any, Callable, Dict, Union
+
+# the decoders in order of preference: the first one installed is used by default ('auto').
+_PREFERRED_DECODERS = ('orjson', 'ujson', 'json')
+
+
+def _stdlib_loads(data: Union[str, bytes]) -> Any:
+    return json.loads(data)
+
+
+def _with_stdlib_fallback(decoder: Callable[[Union[str, bytes]], Any]) -> Callable[[Union[str, bytes]], Any]:
+    def decode(data: Union[str, bytes]) -> Any:
+        try:
+            return decoder(data)
+        except ValueError:
+            # e.g., NaN/Infinity (rejected by orjson) or integers wider than 64 bits: the standard library has the
+            # last word (and raises the error if the document is malformed).
+            return json.loads(data)
+    return decode
+
+
+def _load_decoder(name: str) -> Callable[[Union[str, bytes]], Any]:
+    if name == 'json':
+        return _stdlib_loads
+    if name not in _PREFERRED_DECODERS:
+        raise ValueError(f"Expected the json decoder to be one of {_PREFERRED_DECODERS + ('auto',)}, got '{name}'")
+    try:
+        return _with_stdlib_fallback(importlib.import_module(name).loads)
+    except ImportError:
+        raise ValueError(f"The json decoder '{name}' is not installed")
+
+
+def available_decoders() -> Dict[str, Callable[[Union[str, bytes]], Any]]:
+    """
+    A function that returns the installed json decoders (by name), in order of preference.
+    """
+
+    decoders = {}
+    for name in _PREFERRED_DECODERS:
+        try:
+            decoders[name] = _load_decoder(name)
+        except ValueError:
+            pass
+    return decoders
+
+
+def configure_json_decoder(name='auto') -> str:
+    """
+    A function that selects the json decoder used by *loads*: 'auto' picks the fastest one installed among
+    'orjson', 'ujson' and the standard library 'json'. A document that 'orjson' or 'ujson' rejects (e.g., with NaN
+    or an integer wider than 64 bits) is decoded again by 'json', so the result never depends on the decoder and
+    a malformed document raises a *ValueError*.
+
+    :param name:                    the name of the decoder or 'auto'
+    :return:                        the name of the selected decoder
+    """
+
+    global _DECODER_NAME, _DECODER
+    if name == 'auto':
+        name = next(iter(available_decoders()))
+    _DECODER = _load_decoder(name)
+    _DECODER_NAME = name
+    return name
+
+
+def json_decoder_name() -> str:
+    return _DECODER_NAME
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    A function that decodes the json document *data* (text or utf-8 encoded bytes) with the selected decoder.
+    """
+
+    return _DECODER(data)
+
+
+_DECODER_NAME = ''
+_DECODER = _stdlib_loads
+configure_json_decoder()
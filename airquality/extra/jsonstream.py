@@ -0,0 +1,99 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-20, dom, 16:05
+# ======================================
+import json
+from typing import Iterable, Generator, Tuple, Any
+
+_WHITESPACE = ' \t\n\r'
+_DECODER = json.JSONDecoder()
+
+
+class _Buffer(object):
+    """
+    A class that holds the text received so far and reads more chunks on demand.
+    """
+
+    def __init__(self, chunks: Iterable[str]):
+        self._chunks = iter(chunks)
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        for chunk in self._chunks:
+            if chunk:
+                self.text = self.text[self.pos:] + chunk
+                self.pos = 0
+                return True
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                raise ValueError("unexpected end of the json document")
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"expected '{char}' at position {self.pos} of the json document, got '{self.peek()}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """
+        A method that decodes the next json value. A value that reaches the end of the text is decoded again after
+        reading more text (e.g., a number split between two chunks).
+        """
+
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+                if end < len(self.text) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def iter_json_members(chunks: Iterable[str], stream_keys=('data',)) -> Generator[Tuple[str, Any], None, None]:
+    """
+    A function that incrementally decodes a json object from the text *chunks* and yields its members as
+    (key, value) tuples. The arrays of the members named in *stream_keys* are not decoded as a whole: a
+    (key, item) tuple is yielded for each of their items as soon as it is received, so that the memory used is
+    bounded by the size of a single item (plus a chunk).
+
+    :param chunks:                  the text chunks of the json document
+    :param stream_keys:             the keys of the arrays to yield item by item
+    :return:                        a generator of (key, value) tuples
+    """
+
+    buffer = _Buffer(chunks)
+    buffer.expect('{')
+    if buffer.peek() == '}':
+        return
+    while True:
+        key = buffer.value()
+        buffer.expect(':')
+        if key in stream_keys and buffer.peek() == '[':
+            buffer.expect('[')
+            if buffer.peek() == ']':
+                buffer.pos += 1
+            else:
+                while True:
+                    yield key, buffer.value()
+                    if buffer.peek() == ']':
+                        buffer.pos += 1
+                        break
+                    buffer.expect(',')
+        else:
+            yield key, buffer.value()
+        if buffer.peek() == '}':
+            return
+        buffer.expect(',')
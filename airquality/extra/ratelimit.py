@@ -0,0 +1,128 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-18, ven, 09:30
+# ======================================
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# ======================================
+import time
+import threading
+from collections import deque
+from typing import Dict, List, Callable
+from airquality.datamodel.fromdb import OpenweathermapKeyDM
+
+_WINDOW_IN_SECONDS = 60.0
+
+
+class TokenBucket(object):
+    """
+    A class that defines a token bucket that holds at most *capacity* tokens and refills *capacity* tokens every
+    *period* seconds (one token at a time).
+
+    Keyword arguments:
+        *capacity*          the maximum number of tokens in the bucket.
+        *tokens*            the number of tokens available at start.
+        *period*            the number of seconds needed to refill the whole bucket.
+        *clock*             the function that returns the current time in seconds.
+
+    """
+
+    def __init__(self, capacity: int, tokens: float, period=_WINDOW_IN_SECONDS, clock: Callable = time.monotonic):
+        if capacity < 1:
+            raise ValueError(f"{type(self).__name__} expected *capacity* to be a positive integer, got '{capacity}'")
+        self.capacity = capacity
+        self._rate = capacity / period
+        self._clock = clock
+        self._tokens = min(float(capacity), max(0.0, tokens))
+        self._last = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(float(self.capacity), self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def try_take(self) -> bool:
+        self._refill()
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """
+        A method that returns the number of seconds before a token is available.
+        """
+
+        self._refill()
+        return 0.0 if self._tokens >= 1.0 else (1.0 - self._tokens) / self._rate
+
+
+class KeyScheduler(object):
+    """
+    A class that spreads the API requests across all the *keys*, by keeping a token bucket for each key that
+    refills *n_max* tokens per minute and starts with *n_max* - *n_done* tokens.
+
+    The *acquire* method is thread-safe and blocks until one of the keys has a token, then it returns the key with
+    the most tokens left. The scheduler also counts the requests done with each key in the last minute, so that
+    they can be written back to the database.
+
+    Keyword arguments:
+        *keys*              the API keys with their per-minute budget.
+        *clock*             the function that returns the current time in seconds.
+        *sleep*             the function that waits for a given number of seconds.
+
+    """
+
+    def __init__(self, keys: List[OpenweathermapKeyDM], clock: Callable = time.monotonic, sleep: Callable = time.sleep):
+        for k in keys:
+            if k.n_max < 1:
+                _LOGGER.warning("skipping an API key with a budget of %d requests per minute" % k.n_max)
+        keys = [k for k in keys if k.n_max >= 1]
+        if not keys:
+            raise ValueError(f"{type(self).__name__} expected at least one API key with a positive budget")
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets = {k.key: TokenBucket(capacity=k.n_max, tokens=k.n_max - k.n_done, clock=clock) for k in keys}
+        now = clock()
+        self._done = {k.key: deque([now] * min(k.n_done, k.n_max)) for k in keys}
+
+    @property
+    def budget(self) -> int:
+        """
+        The combined number of requests per minute of all the keys.
+        """
+
+        return sum(bucket.capacity for bucket in self._buckets.values())
+
+    def acquire(self) -> str:
+        while True:
+            with self._lock:
+                key, bucket = max(self._buckets.items(), key=lambda item: item[1].tokens)
+                if bucket.try_take():
+                    self._done[key].append(self._clock())
+                    return key
+                wait = min(b.wait_time() for b in self._buckets.values())
+            self._sleep(wait)
+
+    def done_requests(self) -> Dict[str, int]:
+        """
+        A method that returns the number of requests done with each key in the last minute.
+        """
+
+        with self._lock:
+            threshold = self._clock() - _WINDOW_IN_SECONDS
+            for done in self._done.values():
+                while done and done[0] <= threshold:
+                    done.popleft()
+            return {key: len(done) for key, done in self._done.items()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(keys={len(self._buckets)}, budget={self.budget})"
@@ -0,0 +1,294 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-24, gio, 09:15
+# ======================================
+"""
+A local stand-in for the Thingspeak, Atmotube, PurpleAir and OpenWeatherMap APIs, for load testing the ingestion
+without hitting (and being rate limited by) the real services. It only depends on the standard library.
+
+The responses have the same shape as the ones in 'test_resources': the Thingspeak feeds and the Atmotube items are
+synthesized for any requested time range (one entry every *feed_interval* seconds), the PurpleAir sensor list has
+*sensors* rows and the OpenWeatherMap response is the 'openweather_data.json' template at the requested coordinates.
+
+Run it with:
+
+    python3 -m airquality.extra.replay --port 8080 --latency 0.05 --error-rate 0.01 --feed-interval 120
+
+and point the '*_url' environment templates at it, e.g.:
+
+    thingspeak_url="http://127.0.0.1:8080/channels/{api_id}/feeds.{api_fmt}?api_key={api_key}"
+    atmotube_url="http://127.0.0.1:8080/api/v1/data?api_key={api_key}&mac={api_id}&order=asc&format={api_fmt}"
+    purpleair_url="http://127.0.0.1:8080/v1/sensors?api_key=replay&fields=replay"
+    openweathermap_url=http://127.0.0.1:8080/data/2.5/onecall?lat={lat}&lon={lon}&appid={api_key}&units=metric
+"""
+import re
+import sys
+import gzip
+import json
+import math
+import time
+import random
+import argparse
+import calendar
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+_THINGSPEAK_PATH = re.compile(r'^/channels/(\d+)/feeds\.json$')
+_ATMOTUBE_PATH = '/api/v1/data'
+_PURPLEAIR_PATH = '/v1/sensors'
+_OPENWEATHERMAP_PATH = '/data/2.5/onecall'
+
+_THINGSPEAK_FMT = "%Y-%m-%d %H:%M:%S"
+_THINGSPEAK_CREATED_AT_FMT = "%Y-%m-%dT%H:%M:%SZ"
+_ATMOTUBE_TIME_FMT = "%Y-%m-%dT%H:%M:%S.000Z"
+_PURPLEAIR_FIELDS = [
+    'sensor_index', 'name', 'latitude', 'longitude', 'primary_id_a', 'primary_key_a', 'primary_id_b',
+    'primary_key_b', 'secondary_id_a', 'secondary_key_a', 'secondary_id_b', 'secondary_key_b', 'date_created'
+]
+
+
+@dataclass
+class ReplayConfig(object):
+    """
+    A *dataclass* that defines the behaviour of the *ReplayServer*.
+    """
+
+    latency: float = 0.0                # The seconds each request waits before being answered.
+    jitter: float = 0.0                 # The maximum random seconds added to the latency.
+    error_rate: float = 0.0             # The fraction of the requests answered with '503 Service Unavailable'.
+    feed_interval: int = 120            # The seconds between two synthesized Thingspeak/Atmotube entries.
+    max_entries: int = 8000             # The maximum number of Thingspeak entries of a response (the most recent).
+    sensors: int = 100                  # The number of sensors of the PurpleAir sensor list.
+    seed: int = 0                       # The seed of the random latency jitter and errors.
+    resource_dir: str = 'test_resources'    # The directory of the 'openweather_data.json' template.
+
+
+def _value_of(channel: int, epoch: int, field: int) -> float:
+    """
+    A function that returns a deterministic, smoothly varying measure for the channel's field at *epoch*.
+    """
+
+    return round(20.0 + 10.0 * math.sin(epoch / 3600.0 + channel + field), 2)
+
+
+def _epochs_between(begin: datetime, until: datetime, interval: int):
+    """
+    A function that returns the UNIX times on the *interval* grid between the (naive UTC) *begin* and *until*.
+    """
+
+    first = math.ceil(calendar.timegm(begin.timetuple()) / interval) * interval
+    return range(first, calendar.timegm(until.timetuple()) + 1, interval)
+
+
+def thingspeak_response(channel: int, begin: datetime, until: datetime, config: ReplayConfig) -> Dict:
+    epochs = _epochs_between(begin=begin, until=until, interval=config.feed_interval)
+    epochs = epochs[-config.max_entries:] if config.max_entries > 0 else epochs
+    feeds = []
+    for entry_id, epoch in enumerate(epochs, start=1):
+        feed = {'created_at': datetime.utcfromtimestamp(epoch).strftime(_THINGSPEAK_CREATED_AT_FMT),
+                'entry_id': entry_id}
+        for field in range(1, 8):
+            feed[f'field{field}'] = "%.2f" % _value_of(channel=channel, epoch=epoch, field=field)
+        feeds.append(feed)
+    return {'channel': {'id': channel, 'name': f'replay channel {channel}'}, 'feeds': feeds}
+
+
+def atmotube_response(mac: str, date: datetime, config: ReplayConfig) -> Dict:
+    channel = sum(mac.encode('utf-8'))
+    until = min(date + timedelta(days=1) - timedelta(seconds=1), datetime.utcnow())
+    items = []
+    for epoch in _epochs_between(begin=date, until=until, interval=config.feed_interval):
+        items.append({
+            'time': datetime.utcfromtimestamp(epoch).strftime(_ATMOTUBE_TIME_FMT),
+            'voc': _value_of(channel, epoch, 1) / 100.0,
+            'pm1': int(_value_of(channel, epoch, 2)),
+            'pm25': int(_value_of(channel, epoch, 3)),
+            'pm10': int(_value_of(channel, epoch, 4)),
+            't': int(_value_of(channel, epoch, 5)),
+            'h': int(_value_of(channel, epoch, 6)),
+            'p': 1000.0 + _value_of(channel, epoch, 7),
+            'coords': {'lat': 45.0 + math.sin(epoch) / 100.0, 'lon': 9.0 + math.cos(epoch) / 100.0}
+        })
+    return {'status': 'OK', 'data': {'items': items}}
+
+
+def purpleair_response(config: ReplayConfig) -> Dict:
+    data = []
+    for index in range(1, config.sensors + 1):
+        channel = 4 * index
+        data.append([
+            index, f'replay sensor {index}', 45.0 + (index % 1000) / 1000.0, 9.0 + (index // 1000) / 1000.0,
+            channel, f'key{index}a1', channel + 1, f'key{index}b1',
+            channel + 2, f'key{index}a2', channel + 3, f'key{index}b2', 1538255423
+        ])
+    return {'api_version': 'replay', 'time_stamp': int(time.time()), 'fields': _PURPLEAIR_FIELDS, 'data': data}
+
+
+def openweathermap_response(lat: float, lon: float, template: Dict) -> Dict:
+    return {**template, 'lat': lat, 'lon': lon}
+
+
+class _ReplayRequestHandler(BaseHTTPRequestHandler):
+    """
+    A class that answers the GET requests of the *ReplayServer*.
+    """
+
+    protocol_version = 'HTTP/1.1'       # keeps the connections alive, like the real services.
+    server: 'ReplayServer'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super(_ReplayRequestHandler, self).log_message(format, *args)
+
+    def do_GET(self):
+        delay, fail = self.server.next_outcome()
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            self._send_json(status=503, body={'error': 'replay server injected error'})
+            return
+        parts = urlsplit(self.path)
+        params = {name: values[0] for name, values in parse_qs(parts.query).items()}
+        try:
+            body = self._route(path=parts.path, params=params)
+        except (KeyError, ValueError) as err:
+            self._send_json(status=400, body={'error': f"bad request: {err!r}"})
+            return
+        if body is None:
+            self._send_json(status=404, body={'error': f"unknown path '{parts.path}'"})
+            return
+        self._send_json(status=200, body=body)
+
+    def _route(self, path: str, params: Dict[str, str]) -> Optional[Dict]:
+        config = self.server.config
+        match = _THINGSPEAK_PATH.match(path)
+        if match is not None:
+            begin = datetime.strptime(params['start'], _THINGSPEAK_FMT)
+            until = datetime.strptime(params['end'], _THINGSPEAK_FMT)
+            return thingspeak_response(channel=int(match.group(1)), begin=begin, until=until, config=config)
+        if path == _ATMOTUBE_PATH:
+            date = datetime.strptime(params['date'], '%Y-%m-%d')
+            return atmotube_response(mac=params['mac'], date=date, config=config)
+        if path == _PURPLEAIR_PATH:
+            return self.server.purpleair_body()
+        if path == _OPENWEATHERMAP_PATH:
+            return openweathermap_response(
+                lat=float(params['lat']), lon=float(params['lon']), template=self.server.openweathermap_template()
+            )
+        return None
+
+    def _send_json(self, status: int, body: Dict):
+        payload = json.dumps(body, separators=(',', ':')).encode('utf-8')
+        gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            payload = gzip.compress(payload, compresslevel=1)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    A class that serves synthetic API responses (see the module docstring) with a thread per connection.
+
+    Keyword arguments:
+        *address*           the (host, port) to listen on (port 0 picks a free port).
+        *config*            the behaviour of the server.
+        *verbose*           whether each request is logged on stderr.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: Optional[ReplayConfig] = None, verbose=False):
+        super(ReplayServer, self).__init__(address, _ReplayRequestHandler)
+        self.config = ReplayConfig() if config is None else config
+        self.verbose = verbose
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._purpleair_body = None
+        self._openweathermap_template = None
+        self.requests = self.errors = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_outcome(self) -> Tuple[float, bool]:
+        """
+        A method that draws the latency and whether the next request fails (in request order, so that a run with
+        the same seed and a single client is reproducible).
+        """
+
+        with self._lock:
+            self.requests += 1
+            delay = self.config.latency + self._random.uniform(0.0, self.config.jitter)
+            fail = self._random.random() < self.config.error_rate
+            if fail:
+                self.errors += 1
+            return delay, fail
+
+    def purpleair_body(self) -> Dict:
+        with self._lock:
+            if self._purpleair_body is None:
+                self._purpleair_body = purpleair_response(config=self.config)
+            return self._purpleair_body
+
+    def openweathermap_template(self) -> Dict:
+        with self._lock:
+            if self._openweathermap_template is None:
+                with open(f"{self.config.resource_dir}/openweather_data.json", 'r') as f:
+                    self._openweathermap_template = json.load(f)
+            return self._openweathermap_template
+
+    def start(self) -> threading.Thread:
+        """
+        A method that serves the requests from a background (daemon) thread and returns the thread.
+        """
+
+        thread = threading.Thread(target=self.serve_forever, name='replay-server', daemon=True)
+        thread.start()
+        return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m airquality.extra.replay', description=__doc__.split('\n')[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before each response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='maximum random seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of the requests answered with 503')
+    parser.add_argument('--feed-interval', type=int, default=120, help='seconds between two synthesized entries')
+    parser.add_argument('--max-entries', type=int, default=8000, help='maximum Thingspeak entries per response')
+    parser.add_argument('--sensors', type=int, default=100, help='number of PurpleAir sensors')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--resource-dir', default='test_resources')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = ReplayConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, feed_interval=args.feed_interval,
+        max_entries=args.max_entries, sensors=args.sensors, seed=args.seed, resource_dir=args.resource_dir
+    )
+    server = ReplayServer(address=(args.host, args.port), config=config, verbose=args.verbose)
+    print(f"replay server listening on {server.url} with {config}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"served {server.requests} requests ({server.errors} injected errors)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-21, lun, 09:50
+# ======================================
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# ======================================
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional, Dict
+from requests.exceptions import RequestException
+
+_CLOSED = 'closed'
+_OPEN = 'open'
+_HALF_OPEN = 'half-open'
+
+
+class CircuitOpenError(RequestException):
+    """
+    An exception raised when a request is not sent because the circuit breaker of the host is open.
+    """
+    pass
+
+
+class RetryPolicy(object):
+    """
+    A class that defines how many times a failed request is retried and how long to wait before each retry.
+
+    The delay grows exponentially with the attempt (*backoff_base* * 2 ^ attempt, capped at *backoff_max*) and
+    is randomized between 0 and that value ("full jitter"), so that concurrent requests do not retry all at
+    once. When the server sends a 'Retry-After' header its value is used instead (capped at *retry_after_max*).
+
+    Keyword arguments:
+        *max_retries*           the number of retries after the first attempt.
+        *backoff_base*          the base delay (in seconds).
+        *backoff_max*           the maximum delay (in seconds) of the exponential backoff.
+        *retry_after_max*       the maximum delay (in seconds) accepted from a 'Retry-After' header.
+        *retry_statuses*        the HTTP status codes that are retried.
+        *rand*                  the function that returns a random float in [0, 1).
+
+    """
+
+    def __init__(
+        self, max_retries=3, backoff_base=0.5, backoff_max=30.0, retry_after_max=120.0,
+        retry_statuses=(429, 500, 502, 503, 504), rand: Callable[[], float] = random.random
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.retry_statuses = retry_statuses
+        self._rand = rand
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        seconds = _parse_retry_after(retry_after)
+        if seconds is not None:
+            return min(seconds, self.retry_after_max)
+        return self._rand() * min(self.backoff_max, self.backoff_base * (2 ** attempt))
+
+    def __repr__(self):
+        return f"{type(self).__name__}(max_retries={self.max_retries}, backoff_base={self.backoff_base}, " \
+               f"backoff_max={self.backoff_max})"
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker(object):
+    """
+    A class that stops sending requests to a host after *failure_threshold* consecutive failures.
+
+    While the circuit is open the requests fail fast with *CircuitOpenError*. After *reset_timeout* seconds a
+    single trial request is let through (half-open state): the circuit closes if it succeeds and opens again if it
+    fails. The class is thread-safe.
+
+    Keyword arguments:
+        *failure_threshold*     the number of consecutive failures that open the circuit.
+        *reset_timeout*         the number of seconds to wait before sending a trial request.
+        *clock*                 the function that returns the current time in seconds.
+
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0, clock: Callable[[], float] = time.monotonic):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = _CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self, host=""):
+        with self._lock:
+            if self._state == _CLOSED:
+                return
+            if self._state == _OPEN and self._clock() - self._opened_at >= self._reset_timeout:
+                self._state = _HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == _HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+        raise CircuitOpenError(f"the circuit breaker of host '{host}' is open: too many consecutive failures")
+
+    def record_success(self):
+        with self._lock:
+            self._state = _CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release(self):
+        """
+        A method that frees the half-open trial slot when the trial ended without a success or a failure (e.g., a 429
+        response or an unexpected error), so that the next request can be the trial.
+        """
+
+        with self._lock:
+            if self._state == _HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record_failure(self, host=""):
+        with self._lock:
+            self._failures += 1
+            if self._state == _HALF_OPEN or self._failures >= self._failure_threshold:
+                if self._state != _OPEN:
+                    _LOGGER.warning("opening the circuit breaker of host '%s' after %d consecutive failures"
+                                    % (host, self._failures))
+                self._state = _OPEN
+                self._opened_at = self._clock()
+                self._trial_in_flight = False
+
+    def __repr__(self):
+        return f"{type(self).__name__}(state='{self.state}', failure_threshold={self._failure_threshold}, " \
+               f"reset_timeout={self._reset_timeout})"
+
+
+class CircuitBreakerRegistry(object):
+    """
+    A class that keeps a *CircuitBreaker* for each host, created on first use with the same settings.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0, clock: Callable[[], float] = time.monotonic):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker_of(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    failure_threshold=self._failure_threshold, reset_timeout=self._reset_timeout, clock=self._clock
+                )
+                self._breakers[host] = breaker
+            return breaker
+
+    def __repr__(self):
+        with self._lock:
+            return f"{type(self).__name__}(breakers={self._breakers!r})"
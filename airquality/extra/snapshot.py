@@ -0,0 +1,154 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-23, mer, 09:40
+# ======================================
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# ======================================
+import os
+import time
+import gzip
+import json
+import fcntl
+import dataclasses
+from contextlib import contextmanager
+from typing import Dict, Optional, Callable, Sequence, Iterable, Generator, Tuple, Any
+from airquality.datamodel.fromapi import PurpleairDM
+from airquality.iterables.abc import IterableItemsABC
+from airquality.iterables.fromapi import PurpleairIterableDatamodels, PurpleairStreamIterableDatamodels
+from airquality.extra.url import json_http_response, json_http_stream
+
+_PURPLEAIR_FIELDS = [field.name for field in dataclasses.fields(PurpleairDM)]
+
+# the layout of the snapshot file: a header line followed by one line for each row.
+_SNAPSHOT_FORMAT = 'rows/1'
+
+
+class SnapshotStore(object):
+    """
+    A class that keeps a snapshot of tabular API data on disk, gzip compressed, as a header line
+    {'format': ..., 'taken_at': ..., 'fields': [...]} followed by one line for each row (the list of its values). The rows are
+    written and read one at a time, so that a snapshot never needs to fit in memory.
+
+    A snapshot older than *max_age* seconds is considered stale. The *locked* method serializes the processes that
+    share the snapshot, so that only the first one downloads the data and the others reuse it.
+
+    Keyword arguments:
+        *path*              the path of the snapshot file.
+        *max_age*           the number of seconds a snapshot stays fresh.
+        *clock*             the function that returns the current (epoch) time in seconds.
+
+    """
+
+    def __init__(self, path: str, max_age: float, clock: Callable[[], float] = time.time):
+        self._path = path
+        self._max_age = max_age
+        self._clock = clock
+
+    @contextmanager
+    def locked(self):
+        """
+        A method that holds an exclusive (advisory) lock on the snapshot until the end of the with block.
+        """
+
+        with open(f"{self._path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield self
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def age(self) -> Optional[float]:
+        header = self._read_header()
+        return None if header is None else self._clock() - header['taken_at']
+
+    def is_fresh(self) -> bool:
+        age = self.age()
+        return age is not None and age <= self._max_age
+
+    def members(self) -> Generator[Tuple[str, Any], None, None]:
+        """
+        A method that reads the snapshot lazily as ('fields', [...]) followed by a ('data', [...]) member for each
+        row, i.e., the members of the tabular json response (see *PurpleairStreamIterableDatamodels*).
+        """
+
+        with gzip.open(self._path, 'rt', encoding='utf-8') as f:
+            yield 'fields', json.loads(f.readline())['fields']
+            for line in f:
+                yield 'data', json.loads(line)
+
+    def save(self, fields: Sequence[str], rows: Iterable[Sequence]) -> int:
+        """
+        A method that writes the *rows* one at a time and replaces the snapshot only when all of them have been
+        written. It returns the number of rows.
+        """
+
+        tmp_path = f"{self._path}.{os.getpid()}.tmp"
+        n_rows = 0
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                header = {'format': _SNAPSHOT_FORMAT, 'taken_at': self._clock(), 'fields': list(fields)}
+                f.write(json.dumps(header, separators=(',', ':')) + '\n')
+                for row in rows:
+                    f.write(json.dumps(list(row), separators=(',', ':')) + '\n')
+                    n_rows += 1
+            os.replace(tmp_path, self._path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return n_rows
+
+    def _read_header(self) -> Optional[Dict]:
+        if not os.path.exists(self._path):
+            return None
+        try:
+            with gzip.open(self._path, 'rt', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+            if header['format'] != _SNAPSHOT_FORMAT:
+                raise ValueError(f"unexpected format '{header['format']}'")
+            float(header['taken_at'])
+            list(header['fields'])
+            return header
+        except (OSError, ValueError, TypeError, KeyError) as err:
+            _LOGGER.warning("discarding corrupted snapshot '%s': %s" % (self._path, str(err)))
+            return None
+
+    def __repr__(self):
+        return f"{type(self).__name__}(path='{self._path}', max_age={self._max_age})"
+
+
+def _downloaded_purpleair_datamodels(url: str, streaming: bool) -> IterableItemsABC:
+    if streaming:
+        return PurpleairStreamIterableDatamodels(members=json_http_stream(url=url))
+    return PurpleairIterableDatamodels(json_response=json_http_response(url=url))
+
+
+def purpleair_datamodels(url: str, streaming=False, snapshot: Optional[SnapshotStore] = None) -> IterableItemsABC:
+    """
+    A function that returns the PurpleAir sensors downloaded from *url*, or the ones of the *snapshot* (if any)
+    when it is still fresh. A stale snapshot is refreshed with the downloaded sensors, one row at a time, so that the
+    'purpleair' and 'purp_update' personalities download the sensor list only once per run. With a snapshot, the
+    sensors are always read back from it and can be iterated only once.
+
+    :param url:                     the url of the PurpleAir sensor list
+    :param streaming:               whether the sensor list is decoded while it is downloaded
+    :param snapshot:                the shared snapshot of the sensor list (None disables it)
+    :return:                        the iterable PurpleAir datamodels
+    """
+
+    if snapshot is None:
+        return _downloaded_purpleair_datamodels(url=url, streaming=streaming)
+
+    with snapshot.locked():
+        if snapshot.is_fresh():
+            _LOGGER.debug("reusing the PurpleAir snapshot taken %.0f seconds ago" % snapshot.age())
+        else:
+            datamodels = _downloaded_purpleair_datamodels(url=url, streaming=streaming)
+            n_rows = snapshot.save(
+                fields=_PURPLEAIR_FIELDS,
+                rows=([getattr(dm, name) for name in _PURPLEAIR_FIELDS] for dm in datamodels)
+            )
+            _LOGGER.debug("saved %d PurpleAir sensors in the snapshot" % n_rows)
+    return PurpleairStreamIterableDatamodels(members=snapshot.members())
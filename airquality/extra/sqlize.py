@@ -2,7 +2,7 @@
 # @author:  Davide Colombo
 # @date:    2022-02-1, mar, 20:39
 # ======================================
-from typing import List
+from typing import List, Iterable, Generator
 
 
 def sqlize_obj(self, attributes: List, header="", teardown="") -> str:
@@ -33,6 +33,53 @@ def sqlize_iterable(iterable) -> str:
     return "(" + ','.join(_safe_sqlize_item(item) for item in iterable) + ")"
 
 
+def chunked_query(template: str, records: Iterable[str], max_rows=1000, max_bytes=1048576) -> Generator[str, None, None]:
+    """
+    A function that lazily splits the SQL *records* into as many statements as needed so that each statement
+    (*template* formatted with the comma separated records as 'val') holds at most *max_rows* records and about
+    *max_bytes* characters of values. A single record longer than *max_bytes* gets a statement of its own.
+
+    :param template:                the SQL statement template with a '{val}' placeholder
+    :param records:                 the iterable of SQL records (e.g., '(1,2,3)')
+    :param max_rows:                the maximum number of records per statement
+    :param max_bytes:               the maximum size of the values of each statement
+    :return:                        a generator of SQL statements
+    """
+
+    if max_rows < 1 or max_bytes < 1:
+        raise ValueError(f"expected *max_rows* and *max_bytes* to be positive integers, got '{max_rows}' and "
+                         f"'{max_bytes}'")
+    chunk = []
+    size = 0
+    for record in records:
+        if chunk and (len(chunk) >= max_rows or size + len(record) > max_bytes):
+            yield template.format(val=','.join(chunk))
+            chunk = []
+            size = 0
+        chunk.append(record)
+        size += len(record) + 1
+    if chunk:
+        yield template.format(val=','.join(chunk))
+
+
+def copyize_iterable(iterable) -> str:
+    """
+    A function that takes an iterable (tuple, list, set, ...) and converts its items into a single row of the
+    PostgreSQL COPY text format (tab separated columns, '\\N' for NULL values, newline terminated).
+
+    :param iterable:                the iterable object to convert into a COPY row
+    :return:                        the COPY row corresponding to the iterable.
+    """
+
+    return '\t'.join(_safe_copyize_item(item) for item in iterable) + '\n'
+
+
+def _safe_copyize_item(item) -> str:
+    if item is None:
+        return '\\N'
+    return str(item).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
 def _safe_sqlize_item(item) -> str:
     if isinstance(item, (float, int)):
         return str(item)
@@ -2,24 +2,118 @@
 # @author:  Davide Colombo
 # @date:    2022-01-19, mer, 12:33
 # ======================================
+import re
+import threading
 from dateutil import tz
-from datetime import datetime
-from timezonefinder import TimezoneFinderL
+from datetime import datetime, timedelta
+from functools import lru_cache
+from dataclasses import dataclass
 
+# the timezone finder (and numpy/numba with it) is imported and built on first use: see *warm_up_timezone_finder*.
+_TIMEZONE_FINDER = None
+_TIMEZONE_FINDER_LOCK = threading.Lock()
 
-_TIMEZONE_FINDER = TimezoneFinderL(in_memory=False)
-_TIMEZONE_FINDER.using_numba()
+_DEFAULT_TIMEZONE_GRID = 0.01
+_DEFAULT_TIMEZONE_CACHE_SIZE = 4096
+_NAME_CACHE_SIZE = 256
 
+# the coordinates of the local timezone.
+_LOCAL_LATITUDE = 45
+_LOCAL_LONGITUDE = 9
 
-def _timezone_from_coords(latitude: float, longitude: float):
-    tzname = _TIMEZONE_FINDER.timezone_at(lng=longitude, lat=latitude)
-    return tz.gettz(tzname)
+# the fixed-format ISO-8601 layouts parsed without *strptime* (see *TimestampParser*).
+_FIXED_FORMATS = {
+    "%Y-%m-%dT%H:%M:%SZ": re.compile(r"(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})()Z\Z", re.ASCII),
+    "%Y-%m-%dT%H:%M:%S.%fZ": re.compile(r"(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})\.(\d{1,6})Z\Z", re.ASCII)
+}
+
+
+@dataclass
+class TimezoneCacheStats(object):
+    """
+    A *dataclass* that defines the hit/miss counters of the timezone caches.
+    """
+
+    coords_hits: int                    # The number of coordinates whose timezone was found in the cache.
+    coords_misses: int                  # The number of coordinates whose timezone was looked up.
+    names_hits: int                     # The number of timezone names whose tzinfo was found in the cache.
+    names_misses: int                   # The number of timezone names whose tzinfo was built.
+
+    @property
+    def coords_hit_rate(self) -> float:
+        total = self.coords_hits + self.coords_misses
+        return self.coords_hits / total if total else 0.0
+
+
+def warm_up_timezone_finder():
+    """
+    A function that imports and builds the timezone finder now rather than at the first conversion from coordinates,
+    e.g., to keep its startup cost out of the first request of a long-running job.
+    """
+
+    global _TIMEZONE_FINDER
+    with _TIMEZONE_FINDER_LOCK:
+        if _TIMEZONE_FINDER is None:
+            from timezonefinder import TimezoneFinderL
+            finder = TimezoneFinderL(in_memory=False)
+            finder.using_numba()
+            _TIMEZONE_FINDER = finder
+        return _TIMEZONE_FINDER
+
+
+def _timezone_finder():
+    finder = _TIMEZONE_FINDER
+    return finder if finder is not None else warm_up_timezone_finder()
 
 
+@lru_cache(maxsize=_NAME_CACHE_SIZE)
 def _timezone_from_name(name: str):
     return tz.gettz(name)
 
 
+def _timezone_of_cell(lat_key, lng_key):
+    if _TIMEZONE_GRID > 0:
+        lat_key, lng_key = lat_key * _TIMEZONE_GRID, lng_key * _TIMEZONE_GRID
+    tzname = _timezone_finder().timezone_at(lng=lng_key, lat=lat_key)
+    return _timezone_from_name(tzname)
+
+
+def configure_timezone_cache(grid=_DEFAULT_TIMEZONE_GRID, maxsize=_DEFAULT_TIMEZONE_CACHE_SIZE):
+    """
+    A function that replaces the cache of the timezones computed from coordinates with an empty one that holds at
+    most *maxsize* timezones. The coordinates are rounded to a grid of *grid* degrees (0.01 is about 1 km) and the
+    timezone of a cell is looked up at its centre, so all the coordinates in the same cell share a single lookup.
+    A *grid* of 0 disables the rounding.
+    """
+
+    global _TIMEZONE_GRID, _COORDS_CACHE
+    if grid < 0:
+        raise ValueError(f"Expected the timezone grid to be a non-negative number of degrees, got '{grid}'")
+    _TIMEZONE_GRID = grid
+    _COORDS_CACHE = lru_cache(maxsize=maxsize)(_timezone_of_cell)
+
+
+def timezone_cache_stats() -> TimezoneCacheStats:
+    coords_info = _COORDS_CACHE.cache_info()
+    names_info = _timezone_from_name.cache_info()
+    return TimezoneCacheStats(
+        coords_hits=coords_info.hits,
+        coords_misses=coords_info.misses,
+        names_hits=names_info.hits,
+        names_misses=names_info.misses
+    )
+
+
+def _timezone_from_coords(latitude: float, longitude: float):
+    if _TIMEZONE_GRID > 0:
+        return _COORDS_CACHE(round(latitude / _TIMEZONE_GRID), round(longitude / _TIMEZONE_GRID))
+    return _COORDS_CACHE(latitude, longitude)
+
+
+_TIMEZONE_GRID = _DEFAULT_TIMEZONE_GRID
+_COORDS_CACHE = lru_cache(maxsize=_DEFAULT_TIMEZONE_CACHE_SIZE)(_timezone_of_cell)
+
+
 def now_utctz() -> datetime:
     """
     A function that returns the current timestamp in the local time zone.
@@ -72,5 +166,71 @@ def make_timezone_aware_FROM_LOCAL(utctime, fmt="") -> datetime:
     """
 
     dt = make_timezone_aware_UTC(utctime, fmt)
-    zone = _timezone_from_coords(latitude=45, longitude=9)
+    zone = _timezone_from_coords(latitude=_LOCAL_LATITUDE, longitude=_LOCAL_LONGITUDE)
     return dt.astimezone(tz=zone)
+
+
+class TimestampParser(object):
+    """
+    A class that converts the UTC time strings of a batch (e.g., the feeds of a response) to timezone-aware datetime
+    objects, with the same results of the *make_timezone_aware_UTC*, *_FROM_LOCAL* and *_FROM_COORDS* functions.
+
+    When *fmt* is one of the fixed ISO-8601 layouts of the APIs ('%Y-%m-%dT%H:%M:%SZ' and '%Y-%m-%dT%H:%M:%S.%fZ')
+    the fields are extracted with a precompiled regular expression instead of going through *strptime*. The UTC
+    offset of a timezone is computed once for each hour of the batch and then added to the times of that hour, unless
+    the offset changes within the hour (i.e., at a DST transition). Any other format (or a time that does not match
+    the layout) takes the *strptime* path.
+
+    Keyword arguments:
+        *fmt*               the format of the UTC time strings.
+
+    """
+
+    def __init__(self, fmt: str):
+        self._fmt = fmt
+        self._pattern = _FIXED_FORMATS.get(fmt)
+        self._utc = tz.tzutc()
+        self._offsets = {}
+
+    def utc(self, utctime) -> datetime:
+        match = self._pattern.match(utctime) if self._pattern is not None and isinstance(utctime, str) else None
+        if match is None:
+            return make_timezone_aware_UTC(utctime, self._fmt)
+        year, month, day, hour, minute, second, fraction = match.groups()
+        try:
+            return datetime(
+                int(year), int(month), int(day), int(hour), int(minute), int(second),
+                int(fraction.ljust(6, '0')) if fraction else 0, tzinfo=self._utc
+            )
+        except ValueError:
+            # an out of range field: let *strptime* raise the same error of the slow path.
+            return make_timezone_aware_UTC(utctime, self._fmt)
+
+    def from_coords(self, utctime, latitude: float, longitude: float) -> datetime:
+        return self._localize(self.utc(utctime), _timezone_from_coords(latitude, longitude))
+
+    def from_local(self, utctime) -> datetime:
+        return self.from_coords(utctime, latitude=_LOCAL_LATITUDE, longitude=_LOCAL_LONGITUDE)
+
+    def _localize(self, dt: datetime, zone) -> datetime:
+        # tzinfo objects are not hashable: the entry keeps a reference to the zone so that its id is not reused.
+        entry = self._offsets.get(id(zone))
+        if entry is None:
+            entry = self._offsets[id(zone)] = (zone, {})
+        hours = entry[1]
+        key = (dt.year, dt.month, dt.day, dt.hour)
+        offset = hours.get(key, False)
+        if offset is False:
+            offset = hours[key] = self._offset_of_hour(dt.replace(minute=0, second=0, microsecond=0), zone)
+        if offset is None:
+            return dt.astimezone(tz=zone)
+        delta, fold = offset
+        return (dt + delta).replace(tzinfo=zone, fold=fold)
+
+    @staticmethod
+    def _offset_of_hour(begin: datetime, zone):
+        first = begin.astimezone(tz=zone)
+        last = (begin + timedelta(hours=1, microseconds=-1)).astimezone(tz=zone)
+        if first.utcoffset() != last.utcoffset() or first.fold != last.fold:
+            return None
+        return first.utcoffset(), first.fold
@@ -1,21 +1,279 @@
 # ======================================
 # @author:  Davide Colombo
 # @date:    2022-01-18, mar, 19:42
+# ======================================
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
 # ======================================
 _DEFAULT_TIMEOUT = 30.0
-_DEFAULT_HEADERS = {'Connection': 'close'}
+_DEFAULT_HEADERS = {'Connection': 'keep-alive', 'Accept-Encoding': 'gzip, deflate'}
+_DEFAULT_CHUNK_SIZE = 65536
+_DEFAULT_POOL_CONNECTIONS = 10
+_DEFAULT_POOL_MAXSIZE = 10
 
 # ======================================
+import time
+import codecs
+import threading
 import requests
-from typing import Dict
+from urllib.parse import urlsplit
+from collections import deque
+from typing import Dict, Iterable, Generator, Tuple, Any
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 import requests.exceptions
+from requests.adapters import HTTPAdapter
+from airquality.extra.httpcache import DiskResponseCache
+from airquality.extra.jsonstream import iter_json_members
+from airquality.extra.jsoncodec import loads
+from airquality.extra.resilience import RetryPolicy, CircuitBreakerRegistry
+
+_SESSION_LOCK = threading.Lock()
+_SESSION = None
+_RESPONSE_CACHE = None
+_RETRY_POLICY = RetryPolicy()
+_CIRCUIT_BREAKERS = CircuitBreakerRegistry()
+
+
+@dataclass
+class HttpConnectionStats(object):
+    """
+    A *dataclass* that defines the connection-reuse counters of the shared HTTP session.
+    """
+
+    requests: int                       # The number of requests sent through the pooled connections.
+    connections: int                    # The number of new connections (i.e., TCP/TLS handshakes) opened.
+    reused: int                         # The number of requests that reused an open (keep-alive) connection.
+
+
+def configure_http_session(pool_connections=_DEFAULT_POOL_CONNECTIONS, pool_maxsize=_DEFAULT_POOL_MAXSIZE):
+    """
+    A function that replaces the shared HTTP session with a new one that keeps alive the connections to at most
+    *pool_connections* hosts, and at most *pool_maxsize* connections for each host. When all the connections to
+    a host are in use, the next request waits until one is released.
+
+    :param pool_connections:        the number of per-host connection pools to keep
+    :param pool_maxsize:            the maximum number of connections to keep for each host
+    :return:                        the new shared HTTP session
+    """
+
+    global _SESSION
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    with _SESSION_LOCK:
+        old_session, _SESSION = _SESSION, session
+    if old_session is not None:
+        old_session.close()
+    return session
+
+
+def http_session() -> requests.Session:
+    """
+    A function that returns the shared HTTP session (created with the default pool size on first use).
+    """
+
+    with _SESSION_LOCK:
+        session = _SESSION
+    return session if session is not None else configure_http_session()
+
+
+def close_http_session():
+    global _SESSION
+    with _SESSION_LOCK:
+        session, _SESSION = _SESSION, None
+    if session is not None:
+        session.close()
+
+
+def http_connection_stats(session=None) -> HttpConnectionStats:
+    """
+    A function that sums up the request and connection counters of the connection pools of *session* (or of the
+    shared HTTP session).
+    """
+
+    if session is None:
+        with _SESSION_LOCK:
+            session = _SESSION
+    n_requests = n_connections = 0
+    if session is not None:
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    n_requests += pool.num_requests
+                    n_connections += pool.num_connections
+    return HttpConnectionStats(
+        requests=n_requests, connections=n_connections, reused=max(0, n_requests - n_connections)
+    )
+
+
+def configure_http_cache(cache_dir: str, max_bytes: int) -> DiskResponseCache:
+    """
+    A function that enables the on-disk cache of the json responses (see *DiskResponseCache*).
+    """
+
+    global _RESPONSE_CACHE
+    _RESPONSE_CACHE = DiskResponseCache(cache_dir=cache_dir, max_bytes=max_bytes)
+    return _RESPONSE_CACHE
 
 
-def json_http_response(url: str, timeout=_DEFAULT_TIMEOUT, headers=None) -> Dict:
+def disable_http_cache():
+    global _RESPONSE_CACHE
+    _RESPONSE_CACHE = None
+
+
+def configure_http_resilience(
+    max_retries=3, backoff_base=0.5, backoff_max=30.0, failure_threshold=5, reset_timeout=60.0
+):
+    """
+    A function that replaces the retry policy of the API requests and resets the per-host circuit breakers
+    (see *RetryPolicy* and *CircuitBreaker*).
+    """
+
+    global _RETRY_POLICY, _CIRCUIT_BREAKERS
+    _RETRY_POLICY = RetryPolicy(max_retries=max_retries, backoff_base=backoff_base, backoff_max=backoff_max)
+    _CIRCUIT_BREAKERS = CircuitBreakerRegistry(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+
+
+def _resilient_get(session: requests.Session, url: str, **kwargs) -> requests.Response:
+    """
+    A function that sends a GET request through the circuit breaker of the host of *url* and retries it after a
+    timeout, a connection error or a retryable status code (e.g., 429 and 503), according to the retry policy.
+    The response of the last attempt is returned (or its error is raised).
+    """
+
+    retry = _RETRY_POLICY
+    host = urlsplit(url).netloc
+    breaker = _CIRCUIT_BREAKERS.breaker_of(host)
+    attempt = 0
+    while True:
+        breaker.allow(host)
+        try:
+            http_response = session.get(url=url, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as err:
+            breaker.record_failure(host)
+            if attempt >= retry.max_retries:
+                raise
+            delay = retry.delay(attempt)
+            _LOGGER.warning("retrying request to host '%s' in %.2fs after error: %s" % (host, delay, str(err)))
+        else:
+            status_code = http_response.status_code
+            if status_code not in retry.retry_statuses:
+                breaker.record_success()
+                return http_response
+            if status_code != 429:              # rate limiting does not mean the host is down
+                breaker.record_failure(host)
+            if attempt >= retry.max_retries:
+                return http_response
+            delay = retry.delay(attempt, retry_after=http_response.headers.get('Retry-After'))
+            http_response.close()
+            _LOGGER.warning("retrying request to host '%s' in %.2fs after status code %d" % (host, delay, status_code))
+        finally:
+            # a half-open trial that ended without a success or a failure (e.g., 429) must not keep the circuit open.
+            breaker.release()
+        attempt += 1
+        time.sleep(delay)
+
+
+def json_http_response(url: str, timeout=_DEFAULT_TIMEOUT, headers=None, session=None, cache=None) -> Dict:
     if headers is None:
         headers = _DEFAULT_HEADERS
-    http_response = requests.get(url=url, timeout=timeout, headers=headers)
+    if session is None:
+        session = http_session()
+    if cache is None:
+        cache = _RESPONSE_CACHE
+
+    cached = None
+    if cache is not None:
+        cached = cache.get(url)
+        if cached is not None:
+            if cache.is_immutable(url):
+                return cached.body
+            headers = {**headers, **cached.validators()}
+
+    http_response = _resilient_get(session, url=url, timeout=timeout, headers=headers)
+    if cached is not None and http_response.status_code == 304:
+        cache.touch(url)
+        return cached.body
     http_response.raise_for_status()
     if http_response.status_code != 204:
-        return http_response.json()
+        body = loads(http_response.content)
+        if cache is not None:
+            cache.put(url=url, body=body, etag=http_response.headers.get('ETag'),
+                      last_modified=http_response.headers.get('Last-Modified'))
+        return body
     raise ValueError(f"[CODE]: 204 - [DESCRIPTION]: http response has not content - [URL]: {http_response.url}")
+
+
+def json_http_stream(
+    url: str, stream_keys=('data',), timeout=_DEFAULT_TIMEOUT, headers=None, session=None, chunk_size=_DEFAULT_CHUNK_SIZE
+) -> Generator[Tuple[str, Any], None, None]:
+    """
+    A function that downloads the (gzip/deflate compressed) json object at *url* and decodes it while it is
+    received (see *iter_json_members*), so that the whole document is never held in memory.
+
+    :param url:                     the url to fetch
+    :param stream_keys:             the keys of the arrays to yield item by item
+    :param timeout:                 the timeout of the request
+    :param headers:                 the headers of the request
+    :param session:                 the HTTP session to use (the shared session if None)
+    :param chunk_size:              the size of the chunks read from the connection
+    :return:                        a generator of (key, value) tuples
+    """
+
+    if headers is None:
+        headers = _DEFAULT_HEADERS
+    if session is None:
+        session = http_session()
+    http_response = _resilient_get(session, url=url, timeout=timeout, headers=headers, stream=True)
+    try:
+        http_response.raise_for_status()
+        if http_response.status_code == 204:
+            raise ValueError(f"[CODE]: 204 - [DESCRIPTION]: http response has not content - "
+                             f"[URL]: {http_response.url}")
+        decoder = codecs.getincrementaldecoder(http_response.encoding or 'utf-8')()
+        chunks = (decoder.decode(chunk) for chunk in http_response.iter_content(chunk_size=chunk_size))
+        yield from iter_json_members(chunks=chunks, stream_keys=stream_keys)
+    finally:
+        http_response.close()
+
+
+def json_http_responses(
+    urls: Iterable[str], max_workers=1, timeout=_DEFAULT_TIMEOUT, headers=None, session=None
+) -> Generator[Dict, None, None]:
+    """
+    A function that fetches the *urls* with up to *max_workers* requests in flight at the same time and yields
+    the json responses in the same order as *urls*. The urls are consumed lazily, at most *max_workers* ahead of
+    the response being yielded. An error is raised when the response of the failing url is reached.
+
+    :param urls:                    the urls to fetch
+    :param max_workers:             the maximum number of requests in flight (1 means one request at a time)
+    :param timeout:                 the timeout of each request
+    :param headers:                 the headers of each request
+    :param session:                 the HTTP session to use (the shared session if None)
+    :return:                        a generator of json responses
+    """
+
+    if max_workers <= 1:
+        for url in urls:
+            yield json_http_response(url=url, timeout=timeout, headers=headers, session=session)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='http')
+    in_flight = deque()
+    try:
+        for url in urls:
+            if len(in_flight) >= max_workers:
+                yield in_flight.popleft().result()
+            in_flight.append(
+                executor.submit(json_http_response, url=url, timeout=timeout, headers=headers, session=session)
+            )
+        while in_flight:
+            yield in_flight.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
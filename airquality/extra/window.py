@@ -0,0 +1,150 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-22, mar, 09:20
+# ======================================
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# ======================================
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+_SECONDS_IN_A_DAY = 86400.0
+
+
+class WindowPlanner(object):
+    """
+    A class that plans the size of the time windows of a channel from its observed density (entries per day), so
+    that a window is expected to hold about *fill_ratio* * *max_entries* entries.
+
+    A dense channel gets short windows and an idle channel gets long windows, within [*min_window*, *max_window*].
+    Until the density is known (or when *adaptive* is False) the windows are *default_window* long.
+
+    A response with *max_entries* entries is considered truncated (the API returns only the most recent entries of
+    the window): the window must be split and the density is raised so that the next windows are shorter.
+
+    Keyword arguments:
+        *density*           the density of the channel observed in the previous runs (if any).
+        *max_entries*       the maximum number of entries returned by the API for a single request.
+        *fill_ratio*        the fraction of *max_entries* that a window is planned to hold.
+        *smoothing*         the weight of the last observation in the density's moving average.
+        *default_window*    the size of the windows when the density is not known.
+        *min_window*        the minimum size of a window (a window of this size is never split).
+        *max_window*        the maximum size of a window.
+        *adaptive*          whether the window size follows the density or is always *default_window*.
+
+    """
+
+    def __init__(
+        self,
+        density: Optional[float] = None,
+        max_entries=8000,
+        fill_ratio=0.5,
+        smoothing=0.5,
+        default_window=timedelta(days=7),
+        min_window=timedelta(hours=1),
+        max_window=timedelta(days=31),
+        adaptive=True
+    ):
+        if not 0 < fill_ratio <= 1:
+            raise ValueError(f"{type(self).__name__} expected *fill_ratio* to be in (0, 1], got '{fill_ratio}'")
+        self.density = density
+        self.max_entries = max_entries
+        self._fill_ratio = fill_ratio
+        self._smoothing = smoothing
+        self._default_window = default_window
+        self._min_window = min_window
+        self._max_window = max_window
+        self._adaptive = adaptive
+
+    def window_size(self) -> timedelta:
+        if not self._adaptive or self.density is None:
+            return self._default_window
+        if self.density <= 0:
+            return self._max_window
+        size = timedelta(days=self._fill_ratio * self.max_entries / self.density)
+        return max(self._min_window, min(self._max_window, size))
+
+    def is_truncated(self, n_entries: int) -> bool:
+        return n_entries >= self.max_entries
+
+    def observe(self, begin: datetime, until: datetime, n_entries: int):
+        """
+        A method that updates the density of the channel with the number of entries received for a window.
+        """
+
+        days = (until - begin).total_seconds() / _SECONDS_IN_A_DAY
+        if days <= 0:
+            return
+        observed = n_entries / days
+        if self.is_truncated(n_entries):
+            # the real density is unknown but at least 'observed': plan the next windows as if it were twice as much.
+            self.density = max(self.density or 0.0, 2 * observed)
+        elif self.density is None:
+            self.density = observed
+        else:
+            self.density = self._smoothing * observed + (1 - self._smoothing) * self.density
+
+    def split(self, begin: datetime, until: datetime) -> Optional[Tuple[Tuple[datetime, datetime], ...]]:
+        """
+        A method that returns the two halves of the window, or None if the window cannot be split any further.
+        """
+
+        if until - begin <= self._min_window:
+            return None
+        middle = begin + (until - begin) / 2
+        middle = middle.replace(microsecond=0)
+        return (begin, middle), (middle, until)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(density={self.density}, max_entries={self.max_entries}, " \
+               f"adaptive={self._adaptive})"
+
+
+class DensityFile(object):
+    """
+    A class that keeps the density (entries per day) of each channel in a json file, so that the *WindowPlanner*
+    of the next run starts from the density observed in the previous runs. It is thread-safe.
+
+    Keyword arguments:
+        *path*              the path of the json file (it is created on the first save).
+
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self._densities: Dict[str, float] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self._densities = {k: float(v) for k, v in json.load(f).items()}
+            except (OSError, ValueError, TypeError, AttributeError) as err:
+                _LOGGER.warning("discarding corrupted density file '%s': %s" % (path, str(err)))
+
+    def density_of(self, channel: str) -> Optional[float]:
+        with self._lock:
+            return self._densities.get(channel)
+
+    def update(self, channel: str, density: Optional[float]):
+        if density is None:
+            return
+        with self._lock:
+            self._densities[channel] = density
+
+    def save(self):
+        with self._lock:
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._densities, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self._path)
+
+    def __len__(self):
+        return len(self._densities)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(path='{self._path}', channels={len(self)})"
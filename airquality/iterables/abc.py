@@ -8,11 +8,57 @@
 from collections.abc import Iterable
 from abc import abstractmethod
 from itertools import islice
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+_EMPTY = object()
+
+
+@dataclass
+class IterableStats(object):
+    """
+    A *dataclass* that defines the counters of a stage of the iterable pipeline, filled while the stage is traversed
+    (e.g., by the *query* method of the responses), so that they are available without traversing it again.
+
+    A stage publishes its counters only when a traversal completes: a partial traversal (e.g., by *bool* or
+    indexing) leaves the counters of the last complete traversal in place.
+    """
+
+    items_in: int = 0                                       # The number of items received by the stage.
+    items_kept: int = 0                                     # The number of items yielded by the stage.
+    dropped: Dict[str, int] = field(default_factory=dict)   # The number of items dropped, by reason.
+    min_timestamp: Any = None                               # The smallest 'timestamp' of the items kept (if any).
+    max_timestamp: Any = None                               # The largest 'timestamp' of the items kept (if any).
+    last: Optional[Any] = None                              # The last item kept.
+
+    def keep(self, item):
+        self.items_kept += 1
+        self.last = item
+        timestamp = getattr(item, 'timestamp', None)
+        if timestamp is not None:
+            if self.min_timestamp is None or timestamp < self.min_timestamp:
+                self.min_timestamp = timestamp
+            if self.max_timestamp is None or timestamp > self.max_timestamp:
+                self.max_timestamp = timestamp
+
+    def drop(self, reason: str, n=1):
+        self.dropped[reason] = self.dropped.get(reason, 0) + n
+
+    @property
+    def items_dropped(self) -> int:
+        return sum(self.dropped.values())
+
+    def __str__(self):
+        dropped = ', '.join(f"{reason}: {n}" for reason, n in self.dropped.items())
+        return f"{self.items_kept}/{self.items_in} kept" + (f" (dropped {dropped})" if dropped else "")
 
 
 class IterableItemsABC(Iterable):
     """
     An *Iterable* that defines the business rules for iterating over a set of *items*.
+
+    The items are computed lazily each time the iterable is traversed (i.e., by *len*, indexing and iteration).
+    Call *materialize* to compute them once and hold them in memory when they are traversed more than once.
     """
 
     @abstractmethod
@@ -31,3 +77,46 @@ class IterableItemsABC(Iterable):
 
     def __len__(self):
         return sum(1 for _ in self.items())
+
+    def __bool__(self):
+        return next(iter(self.items()), _EMPTY) is not _EMPTY
+
+    def materialize(self) -> 'MaterializedIterableItems':
+        """
+        A method that traverses the items once (running all the stages of the pipeline that produce them) and
+        returns them as a *MaterializedIterableItems*.
+        """
+
+        return MaterializedIterableItems(items=self.items())
+
+
+class MaterializedIterableItems(IterableItemsABC):
+    """
+    An *IterableItemsABC* that holds the items in a list, so that *len*, indexing and iteration do not compute
+    them again.
+
+    Keyword arguments:
+        *items*             the items to hold (consumed once).
+
+    """
+
+    def __init__(self, items: Iterable):
+        self._items = list(items)
+
+    def items(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return bool(self._items)
+
+    def materialize(self) -> 'MaterializedIterableItems':
+        return self
+
+    def __repr__(self):
+        return f"{type(self).__name__}(items={len(self._items)})"
@@ -5,7 +5,7 @@
 # Description: INSERT HERE THE DESCRIPTION
 #
 ######################################################
-from typing import Generator, Dict
+from typing import Generator, Dict, Iterable, Tuple, Any
 import airquality.extra.weather as wextra
 from airquality.iterables.abc import IterableItemsABC
 from airquality.datamodel.fromapi import PurpleairDM, AtmotubeDM, ThingspeakDM, OpenweathermapDM
@@ -29,6 +29,49 @@ class PurpleairIterableDatamodels(IterableItemsABC):
         return (PurpleairDM(**(dict(zip(self._fields, data)))) for data in self._data)
 
 
+class PurpleairStreamIterableDatamodels(IterableItemsABC):
+    """
+    A class that implements the *IterableItemsABC* interface and defines the business rules for extracting the
+    items from a PurpleAir json response that is decoded while it is downloaded (see *json_http_stream*).
+
+    The items can be iterated only once, since the underlying stream is consumed.
+
+    Keyword arguments:
+        *members*               the (key, value) members of the json response, with a tuple for each 'data' row.
+
+    """
+
+    def __init__(self, members: Iterable[Tuple[str, Any]]):
+        self._members = members
+        self._consumed = False
+
+    def items(self) -> Generator[PurpleairDM, None, None]:
+        if self._consumed:
+            raise ValueError(f"{type(self).__name__} can be iterated only once")
+        self._consumed = True
+        return self._rows()
+
+    def _rows(self):
+        fields = None
+        pending = []                    # the rows received before the 'fields' member (if any).
+        for key, value in self._members:
+            if key == 'fields':
+                fields = value
+                for data in pending:
+                    yield self._datamodel_of(fields, data)
+                pending = []
+            elif key == 'data':
+                if fields is None:
+                    pending.append(value)
+                else:
+                    yield self._datamodel_of(fields, value)
+        if pending:
+            raise ValueError(f"{type(self).__name__} expected the 'fields' member in the json response")
+
+    def _datamodel_of(self, fields, data) -> PurpleairDM:
+        return PurpleairDM(**(dict(zip(fields, data))))
+
+
 class AtmotubeIterableDatamodels(IterableItemsABC):
     """
     A class that implements the *IterableItemsABC* interface and defines the business rules for
@@ -2,8 +2,8 @@
 # @author:  Davide Colombo
 # @date:    2022-02-2, mer, 12:51
 # ======================================
-import json
 from typing import Generator
+from airquality.extra.jsoncodec import loads
 from airquality.iterables.abc import IterableItemsABC
 from airquality.datamodel.fromfile import GeonamesDM, CityDM
 
@@ -31,8 +31,8 @@ class CityIterableDatamodels(IterableItemsABC):
     """
 
     def __init__(self, filepath: str):
-        with open(filepath, 'r') as f:
-            parsed = json.load(f)
+        with open(filepath, 'rb') as f:
+            parsed = loads(f.read())
             self.cities = parsed['cities']
 
     def items(self) -> Generator[CityDM, None, None]:
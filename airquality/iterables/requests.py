@@ -58,18 +58,18 @@ class AtmotubeIterableRequests(IterableItemsABC):
         self._measure_param = measure_param
 
     def items(self) -> Generator:
+        parser = timest.TimestampParser(fmt=self._TIME_FORMAT)
         for dm in self._datamodels:
             coords = dm.coords
 
-            geolocation = NullGeometry()
-            timestamp = timest.make_timezone_aware_UTC(dm.time, fmt=self._TIME_FORMAT)
             if coords is not None:
                 lat = coords['lat']
                 lng = coords['lon']
                 geolocation = PostgisPoint(latitude=lat, longitude=lng)
-                timestamp = timest.make_timezone_aware_FROM_COORDS(
-                    utctime=dm.time, latitude=lat, longitude=lng, fmt=self._TIME_FORMAT
-                )
+                timestamp = parser.from_coords(utctime=dm.time, latitude=lat, longitude=lng)
+            else:
+                geolocation = NullGeometry()
+                timestamp = parser.utc(dm.time)
 
             yield AddSensorMeasureRequest(
                 timestamp=timestamp,
@@ -94,9 +94,10 @@ class ThingspeakIterableRequests(IterableItemsABC):
         self._api_field_names = api_field_names
 
     def items(self):
+        parser = timest.TimestampParser(fmt=self._TIME_FORMAT)
         for dm in self._datamodels:
             yield AddSensorMeasureRequest(
-                timestamp=timest.make_timezone_aware_FROM_LOCAL(utctime=dm.created_at, fmt=self._TIME_FORMAT),
+                timestamp=parser.from_local(utctime=dm.created_at),
                 measures=[(self._measure_param[fcode], getattr(dm, fname))
                           for fname, fcode in self._api_field_names.items()
                           if getattr(dm, fname) is not None]
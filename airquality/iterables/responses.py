@@ -5,10 +5,11 @@
 # Description: INSERT HERE THE DESCRIPTION
 #
 ######################################################
+from io import StringIO
 from itertools import count
 from typing import Generator
-from airquality.extra.sqlize import sqlize_obj
-from airquality.iterables.abc import IterableItemsABC
+from airquality.extra.sqlize import sqlize_obj, copyize_iterable, chunked_query
+from airquality.iterables.abc import IterableItemsABC, IterableStats
 from airquality.datamodel.fromdb import SensorApiParamDM
 from airquality.datamodel.responses import AddFixedSensorResponse, AddSensorMeasureResponse, \
     AddPlaceResponse, AddWeatherDataResponse
@@ -64,14 +65,28 @@ class MobileMeasureIterableResponses(IterableItemsABC):
     MOBILE_MEASUREMENT_QUERY = "INSERT INTO level0_raw.mobile_measurement (packet_id, " \
                                "param_id, param_value, timestamp, geom) VALUES {val};"
 
+    COPY_TABLE = "level0_raw.mobile_measurement"
+    COPY_COLUMNS = ('packet_id', 'param_id', 'param_value', 'timestamp', 'geom')
+
     def __init__(self, start_packet_id: int, requests: IterableItemsABC, sensor_param: SensorApiParamDM):
         self.requests = requests
         self._sensor_param = sensor_param
         self.start_packet_id = start_packet_id
+        self.stats = IterableStats()
+        self._traversed = False
+
+    def _traverse(self):
+        stats = IterableStats()
+        for req in self.requests:
+            stats.items_in += 1
+            stats.keep(req)
+            yield req
+        self.stats = stats
+        self._traversed = True
 
     def items(self) -> Generator[AddSensorMeasureResponse, None, None]:
         packet_id_counter = count(self.start_packet_id)
-        for req in self.requests:
+        for req in self._traverse():
             packet_id = next(packet_id_counter)
             yield AddSensorMeasureResponse(
                 measure_record=','.join(f"({packet_id}, {param_id}, {param_val}, '{req.timestamp}', {req.geolocation})"
@@ -82,12 +97,54 @@ class MobileMeasureIterableResponses(IterableItemsABC):
         query = self.MOBILE_MEASUREMENT_QUERY.format(
             val=','.join(item.measure_record for item in self.items())
         )
-        query += _UPDATE_LAST_ACQUISITION_QUERY.format(
-            time=self.requests[-1].timestamp,
+        return query + self.last_acquisition_query()
+
+    def queries(self, max_rows=1000, max_bytes=1048576) -> Generator[str, None, None]:
+        """
+        A method that lazily generates the same statements of *query* split in chunks of at most *max_rows*
+        packets and about *max_bytes* characters each.
+        """
+
+        yield from chunked_query(
+            template=self.MOBILE_MEASUREMENT_QUERY,
+            records=(item.measure_record for item in self.items()),
+            max_rows=max_rows,
+            max_bytes=max_bytes
+        )
+        yield self.last_acquisition_query()
+
+    @property
+    def last_acquisition(self):
+        """
+        The timestamp of the last request, taken from the last complete traversal (if any) rather than by
+        traversing the requests again.
+        """
+
+        last = self.stats.last if self._traversed and self.stats.last is not None else self.requests[-1]
+        return last.timestamp
+
+    def last_acquisition_query(self) -> str:
+        return _UPDATE_LAST_ACQUISITION_QUERY.format(
+            time=self.last_acquisition,
             sid=self._sensor_param.sid,
             ch=self._sensor_param.ch
         )
-        return query
+
+    def copy_buffer(self) -> StringIO:
+        """
+        A method that writes the measures into an in-memory buffer in the COPY text format, with columns
+        ordered as in *COPY_COLUMNS*.
+        """
+
+        buffer = StringIO()
+        packet_id_counter = count(self.start_packet_id)
+        for req in self._traverse():
+            packet_id = next(packet_id_counter)
+            geom = req.geolocation.ewkt()
+            for param_id, param_val in req.measures:
+                buffer.write(copyize_iterable((packet_id, param_id, param_val, req.timestamp, geom)))
+        buffer.seek(0)
+        return buffer
 
 
 class StationMeasureIterableResponses(IterableItemsABC):
@@ -99,14 +156,28 @@ class StationMeasureIterableResponses(IterableItemsABC):
     STATION_MEASUREMENT_QUERY = "INSERT INTO level0_raw.station_measurement (packet_id, " \
                                 "sensor_id, param_id, param_value, timestamp) VALUES {val};"
 
+    COPY_TABLE = "level0_raw.station_measurement"
+    COPY_COLUMNS = ('packet_id', 'sensor_id', 'param_id', 'param_value', 'timestamp')
+
     def __init__(self, sensor_param: SensorApiParamDM, start_packet_id: int, requests: IterableItemsABC):
         self._requests = requests
         self._sensor_param = sensor_param
         self._start_packet_id = start_packet_id
+        self.stats = IterableStats()
+        self._traversed = False
+
+    def _traverse(self):
+        stats = IterableStats()
+        for req in self._requests:
+            stats.items_in += 1
+            stats.keep(req)
+            yield req
+        self.stats = stats
+        self._traversed = True
 
     def items(self) -> Generator:
         packet_id_counter = count(self._start_packet_id)
-        for req in self._requests:
+        for req in self._traverse():
             packet_id  = next(packet_id_counter)
             yield AddSensorMeasureResponse(
                 measure_record=','.join(f"({packet_id}, {self._sensor_param.sid}, {param_id}, {param_val}, "
@@ -117,12 +188,53 @@ class StationMeasureIterableResponses(IterableItemsABC):
         query = self.STATION_MEASUREMENT_QUERY.format(
             val=','.join(item.measure_record for item in self.items())
         )
-        query += _UPDATE_LAST_ACQUISITION_QUERY.format(
-            time=self._requests[-1].timestamp,
+        return query + self.last_acquisition_query()
+
+    def queries(self, max_rows=1000, max_bytes=1048576) -> Generator[str, None, None]:
+        """
+        A method that lazily generates the same statements of *query* split in chunks of at most *max_rows*
+        packets and about *max_bytes* characters each.
+        """
+
+        yield from chunked_query(
+            template=self.STATION_MEASUREMENT_QUERY,
+            records=(item.measure_record for item in self.items()),
+            max_rows=max_rows,
+            max_bytes=max_bytes
+        )
+        yield self.last_acquisition_query()
+
+    @property
+    def last_acquisition(self):
+        """
+        The timestamp of the last request, taken from the last complete traversal (if any) rather than by
+        traversing the requests again.
+        """
+
+        last = self.stats.last if self._traversed and self.stats.last is not None else self._requests[-1]
+        return last.timestamp
+
+    def last_acquisition_query(self) -> str:
+        return _UPDATE_LAST_ACQUISITION_QUERY.format(
+            time=self.last_acquisition,
             sid=self._sensor_param.sid,
             ch=self._sensor_param.ch
         )
-        return query
+
+    def copy_buffer(self) -> StringIO:
+        """
+        A method that writes the measures into an in-memory buffer in the COPY text format, with columns
+        ordered as in *COPY_COLUMNS*.
+        """
+
+        buffer = StringIO()
+        packet_id_counter = count(self._start_packet_id)
+        for req in self._traverse():
+            packet_id = next(packet_id_counter)
+            for param_id, param_val in req.measures:
+                buffer.write(copyize_iterable((packet_id, self._sensor_param.sid, param_id, param_val, req.timestamp)))
+        buffer.seek(0)
+        return buffer
 
 
 class AddPlaceIterableResponses(IterableItemsABC):
@@ -147,6 +259,19 @@ class AddPlaceIterableResponses(IterableItemsABC):
     def query(self) -> str:
         return self.GEOAREA_QUERY.format(val=','.join(item.place_record for item in self.items()))
 
+    def queries(self, max_rows=1000, max_bytes=1048576) -> Generator[str, None, None]:
+        """
+        A method that lazily generates the same statements of *query* split in chunks of at most *max_rows*
+        places and about *max_bytes* characters each.
+        """
+
+        yield from chunked_query(
+            template=self.GEOAREA_QUERY,
+            records=(item.place_record for item in self.items()),
+            max_rows=max_rows,
+            max_bytes=max_bytes
+        )
+
 
 class WeatherDataIterableResponses(IterableItemsABC):
     """
@@ -173,9 +298,12 @@ class WeatherDataIterableResponses(IterableItemsABC):
     WEATHER_ALERT_QUERY = "INSERT INTO level0_raw.weather_alert (geoarea_id, sender_name, alert_event, alert_begin, " \
                           "alert_until, description) VALUES {val};"
 
-    def __init__(self, geoarea_id: int, requests: IterableItemsABC):
+    DELETE_FORECAST_QUERY = "DELETE FROM level0_raw.{table} WHERE geoarea_id = {geoarea_id};"
+
+    def __init__(self, geoarea_id: int, requests: IterableItemsABC, replace=False):
         self.requests = requests
         self.geoarea_id = geoarea_id
+        self.replace = replace
 
     def items(self) -> Generator:
         for req in self.requests:
@@ -198,7 +326,21 @@ class WeatherDataIterableResponses(IterableItemsABC):
             dval += item.daily_forecast_record+','
             aval += item.weather_alert_record+','
         query = self.CURRENT_WEATHER_QUERY.format(val=cval.strip(','))
-        query += self.HOURLY_FORECAST_QUERY.format(val=hval.strip(','))
-        query += self.DAILY_FORECAST_QUERY.format(val=dval.strip(','))
+        if not self.replace:
+            query += self.HOURLY_FORECAST_QUERY.format(val=hval.strip(','))
+            query += self.DAILY_FORECAST_QUERY.format(val=dval.strip(','))
+        else:
+            query += self._replace_query('hourly_forecast', fmt=self.HOURLY_FORECAST_QUERY, val=hval.strip(','))
+            query += self._replace_query('daily_forecast', fmt=self.DAILY_FORECAST_QUERY, val=dval.strip(','))
         query += "" if not aval.strip(',') else self.WEATHER_ALERT_QUERY.format(val=aval.strip(','))
         return query
+
+    def _replace_query(self, table: str, fmt: str, val: str) -> str:
+        """
+        A method that deletes the forecast records of the geoarea from *table* and inserts the new ones. Since all the
+        statements are sent together they run in a single transaction, so the readers never see the geoarea without
+        forecasts.
+        """
+
+        query = self.DELETE_FORECAST_QUERY.format(table=table, geoarea_id=self.geoarea_id)
+        return query + (fmt.format(val=val) if val else "")
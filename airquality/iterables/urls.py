@@ -7,9 +7,10 @@
 ######################################################
 from airquality.iterables.abc import IterableItemsABC
 from airquality.extra.timest import make_naive
+from airquality.extra.window import WindowPlanner
 from datetime import datetime, timedelta
 from abc import abstractmethod
-from typing import Generator
+from typing import Generator, Optional, Tuple
 
 ISO_DATETIME_FMT = "%Y-%m-%d %H:%M:%S"              # e.g., 2021-10-11 09:44:37
 
@@ -80,11 +81,47 @@ class AtmotubeIterableUrls(IterableUrlsABC):
 class ThingspeakIterableUrls(IterableUrlsABC):
     """
     A concrete implementation of the *TimeIterableURL* interface that formats the URLs specifically for Thingspeak APIs.
+
+    When a *planner* is given, the size of each window is asked to the planner right before the window's url is
+    generated, so that the windows follow the density observed so far (see *WindowPlanner*).
     """
 
+    def __init__(
+        self,
+        url: str,
+        begin: datetime,
+        until=datetime.now(),
+        step_size_in_days=1,
+        planner: Optional[WindowPlanner] = None     # the planner of the window size (fixed step size if None).
+    ):
+        super(ThingspeakIterableUrls, self).__init__(
+            url=url, begin=begin, until=until, step_size_in_days=step_size_in_days
+        )
+        self.planner = planner
+
+    def windows(self) -> Generator[Tuple[datetime, datetime], None, None]:
+        tmp_begin = self.begin
+        if self.planner is None:
+            while tmp_begin <= self.until:
+                yield tmp_begin, _get_smallest_between(time=self.add_days_to(tmp_begin), upper_bound=self.until)
+                tmp_begin = self.add_days_to(tmp_begin)
+            return
+        while tmp_begin <= self.until:
+            tmp_until = _get_smallest_between(time=tmp_begin + self.planner.window_size(), upper_bound=self.until)
+            yield tmp_begin, tmp_until
+            if tmp_until >= self.until:
+                return
+            tmp_begin = tmp_until
+
+    def window_url(self, begin: datetime, until: datetime) -> str:
+        return f"{self.url}&start={self.format_time(begin)}&end={self.format_time(until)}"
+
+    def items(self) -> Generator[str, None, None]:
+        return (self.window_url(begin=begin, until=until) for begin, until in self.windows())
+
     def format_url(self, begin: datetime, until: datetime) -> str:
         tmp_until = _get_smallest_between(time=self.add_days_to(begin), upper_bound=until)
-        return f"{self.url}&start={self.format_time(begin)}&end={self.format_time(tmp_until)}"
+        return self.window_url(begin=begin, until=tmp_until)
 
     def format_time(self, time: datetime):
         return time.strftime(ISO_DATETIME_FMT).replace(" ", "%20")
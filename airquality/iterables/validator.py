@@ -5,7 +5,7 @@
 # Description: INSERT HERE THE DESCRIPTION
 #
 ######################################################
-from airquality.iterables.abc import IterableItemsABC
+from airquality.iterables.abc import IterableItemsABC, IterableStats
 from typing import Generator, Set, Callable, Dict
 from datetime import datetime
 
@@ -18,11 +18,18 @@ class FixedSensorIterableValidRequests(IterableItemsABC):
     def __init__(self, request: IterableItemsABC, name2remove: Set[str]):
         self.request = request
         self.name2remove = name2remove
+        self.stats = IterableStats()
 
     def items(self) -> Generator:
+        stats = IterableStats()
         for request in self.request:
+            stats.items_in += 1
             if request.name not in self.name2remove:
+                stats.keep(request)
                 yield request
+            else:
+                stats.drop(reason='already stored')
+        self.stats = stats
 
 
 class SensorMeasureIterableValidRequests(IterableItemsABC):
@@ -33,11 +40,18 @@ class SensorMeasureIterableValidRequests(IterableItemsABC):
     def __init__(self, requests: IterableItemsABC, filter_ts: datetime):
         self.request = requests
         self.filter_ts = filter_ts
+        self.stats = IterableStats()
 
     def items(self) -> Generator:
+        stats = IterableStats()
         for request in self.request:
+            stats.items_in += 1
             if request.timestamp > self.filter_ts:
+                stats.keep(request)
                 yield request
+            else:
+                stats.drop(reason='not after last acquisition')
+        self.stats = stats
 
 
 class PlaceIterableValidRequests(IterableItemsABC):
@@ -48,11 +62,18 @@ class PlaceIterableValidRequests(IterableItemsABC):
     def __init__(self, requests: IterableItemsABC, postcodes2remove: Set[str]):
         self.requests = requests
         self.postcodes2remove = postcodes2remove
+        self.stats = IterableStats()
 
     def items(self) -> Generator:
+        stats = IterableStats()
         for request in self.requests:
+            stats.items_in += 1
             if request.poscode not in self.postcodes2remove:
+                stats.keep(request)
                 yield request
+            else:
+                stats.drop(reason='already stored')
+        self.stats = stats
 
 
 class WeatherDataIterableValidRequests(IterableItemsABC):
@@ -69,9 +90,16 @@ class WeatherDataIterableValidRequests(IterableItemsABC):
         self._requests = requests
         self._fexists = fexists
         self._extra = extra
+        self.stats = IterableStats()
 
     def items(self):
+        stats = IterableStats()
         for req in self._requests:
+            stats.items_in += 1
             alerts_to_remove = [alert for alert in req.alerts if self._fexists(alert, **self._extra)]
             req.alerts = [alert for alert in req.alerts if alert not in alerts_to_remove]
+            if alerts_to_remove:
+                stats.drop(reason='known alert', n=len(alerts_to_remove))
+            stats.keep(req)
             yield req
+        self.stats = stats
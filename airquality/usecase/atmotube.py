@@ -23,8 +23,9 @@ from datetime import datetime
 import airquality.usecase as constants
 from airquality.usecase.abc import UsecaseABC
 from airquality.extra.decorator import log_context
-from airquality.extra.url import json_http_response
+from airquality.extra.url import json_http_responses
 from airquality.database.gateway import DatabaseGateway
+from airquality.database.watermark import WatermarkTable
 from airquality.datamodel.fromdb import SensorApiParamDM
 from airquality.iterables.urls import AtmotubeIterableUrls
 from airquality.iterables.fromapi import AtmotubeIterableDatamodels
@@ -44,15 +45,14 @@ class Atmotube(UsecaseABC):
         self._url_template = _ENVIRON.url_template(personality='atmotube')
         self._measure_param = self._database_gway.query_measure_param_owned_by(owner="atmotube")
         self._api_param = self._database_gway.query_sensor_apiparam_of_type(sensor_type="atmotube")
+        self._watermarks = WatermarkTable(api_param=self._api_param)
+        self._loader_mode = _ENVIRON.loader_mode
 
-    def _packet_id(self) -> int:
-        return self._database_gway.query_max_mobile_packet_id_plus_one()
+    def _packet_id(self, n: int) -> int:
+        return self._database_gway.reserve_mobile_packet_ids(n=n)
 
     def _filter_ts_of(self, api_param: SensorApiParamDM) -> datetime:
-        return self._database_gway.query_last_acquisition_of(
-            sensor_id=api_param.sid,
-            ch_name=api_param.ch
-        )
+        return self._watermarks.watermark_of(sensor_id=api_param.sid, ch_name=api_param.ch)
 
     def _urls_of(self, api_param: SensorApiParamDM) -> AtmotubeIterableUrls:
         pre_formatted_url = self._url_template.format(
@@ -73,23 +73,28 @@ class Atmotube(UsecaseABC):
 # =========== RUN METHOD
     def execute(self):
         for param in self._api_param:
-            self._rotate_file(sensor_id=param.sid)
-            self._safe_execute(param=param)
+            with self._database_gway.unit_of_work():
+                self._rotate_file(sensor_id=param.sid)
+                self._safe_execute(param=param)
 
     @log_context(logger_name=__name__, header=constants.START_MESSAGE, teardown=constants.END_MESSAGE)
     def _safe_execute(self, param: SensorApiParamDM):
         _LOGGER.debug("%s" % repr(param))
-        for url in self._urls_of(param):
-            server_jresp = json_http_response(url=url)
+        for server_jresp in json_http_responses(urls=self._urls_of(param), max_workers=_ENVIRON.http_fetch_workers):
             datamodels = AtmotubeIterableDatamodels(json_response=server_jresp)
             requests = AtmotubeIterableRequests(datamodels=datamodels, measure_param=self._measure_param)
-            valid_requests = SensorMeasureIterableValidRequests(requests=requests, filter_ts=self._filter_ts_of(param))
+            validator = SensorMeasureIterableValidRequests(requests=requests, filter_ts=self._filter_ts_of(param))
+            valid_requests = validator.materialize()
             if not valid_requests:
                 _LOGGER.debug('no valid measures found.')
                 continue
 
             responses = MobileMeasureIterableResponses(
-                requests=valid_requests, start_packet_id=self._packet_id(), sensor_param=param
+                requests=valid_requests, start_packet_id=self._packet_id(n=len(valid_requests)), sensor_param=param
+            )
+            self._database_gway.insert_measures(
+                responses=responses, loader_mode=self._loader_mode,
+                max_rows=_ENVIRON.chunk_max_rows, max_bytes=_ENVIRON.chunk_max_bytes
             )
-            self._database_gway.execute(query=responses.query())
-            _LOGGER.debug("inserted %d/%d measures" % (len(valid_requests), len(datamodels)))
+            self._watermarks.advance(sensor_id=param.sid, ch_name=param.ch, time=responses.last_acquisition)
+            _LOGGER.debug("inserted %d/%d measures" % (responses.stats.items_kept, validator.stats.items_in))
@@ -43,11 +43,21 @@ class Geonames(UsecaseABC):
             database_pcodes = self._database_gway.query_poscodes_of_country(country_code=country_code)
             datamodels = GeonamesIterableDatamodels(filepath=join(self._root_dir, fname))
             requests = GeonamesIterableRequests(datamodels=datamodels)
-            valid_requests = PlaceIterableValidRequests(requests=requests, postcodes2remove=database_pcodes)
-            if not valid_requests:
-                _LOGGER.debug('no valid postal codes found.')
-                continue
-
-            responses = AddPlaceIterableResponses(requests=valid_requests)
-            self._database_gway.execute(query=responses.query())
-            _LOGGER.debug('inserted %d/%d places.' % (len(valid_requests), len(datamodels)))
+            validator = PlaceIterableValidRequests(requests=requests, postcodes2remove=database_pcodes)
+            if _ENVIRON.loader_mode == 'chunked':
+                # the country file is streamed into the statements: the requests are never held in memory at once.
+                responses = AddPlaceIterableResponses(requests=validator)
+                self._database_gway.execute_all(
+                    queries=responses.queries(max_rows=_ENVIRON.chunk_max_rows, max_bytes=_ENVIRON.chunk_max_bytes)
+                )
+                if not validator.stats.items_kept:
+                    _LOGGER.debug('no valid postal codes found.')
+                    continue
+            else:
+                valid_requests = validator.materialize()
+                if not valid_requests:
+                    _LOGGER.debug('no valid postal codes found.')
+                    continue
+                responses = AddPlaceIterableResponses(requests=valid_requests)
+                self._database_gway.execute(query=responses.query())
+            _LOGGER.debug('inserted %d/%d places.' % (validator.stats.items_kept, validator.stats.items_in))
@@ -13,12 +13,16 @@ _ENVIRON = environ.get_environ()
 
 ######################################################
 import os
+from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
 import airquality.usecase as constants
 from airquality.usecase.abc import UsecaseABC
 from airquality.datamodel.fromfile import CityDM
 from airquality.extra.decorator import log_context
 from airquality.extra.sqlize import sqlize_iterable
 from airquality.extra.url import json_http_response
+from airquality.extra.ratelimit import KeyScheduler
+from airquality.datamodel.fromdb import GeoareaLocationDM
 from airquality.database.gateway import DatabaseGateway
 from airquality.iterables.requests import OpenweathermapIterableRequests
 from airquality.iterables.validator import WeatherDataIterableValidRequests
@@ -38,44 +42,81 @@ class Openweathermap(UsecaseABC):
 
     def __init__(self, database_gway: DatabaseGateway):
         self._database_gway = database_gway
+        self._replace = _ENVIRON.forecast_mode == 'replace'
         # Database resources
         self._api_keys = self._database_gway.query_openweathermap_keys()
+        self._scheduler = KeyScheduler(keys=self._api_keys)
         self._weather_map = self._database_gway.query_weather_conditions()
-        self._cached_hourly_forecast = self._database_gway.query_hourly_forecast_records()
-        self._cached_daily_forecast = self._database_gway.query_daily_forecast_records()
-        self._database_gway.execute(query=self.DELETE_FORECAST_QUERY)
+        self._known_alerts = self._database_gway.query_weather_alert_keys()
+        self._cached_hourly_forecast = []
+        self._cached_daily_forecast = []
+        if not self._replace:
+            self._cached_hourly_forecast = self._database_gway.query_hourly_forecast_records()
+            self._cached_daily_forecast = self._database_gway.query_daily_forecast_records()
+            self._database_gway.execute(query=self.DELETE_FORECAST_QUERY)
         # File System resources
         self._dir_path = _ENVIRON.input_dir_of(personality='openweathermap')
         self._url_template = _ENVIRON.url_template(personality='openweathermap')
         self._cities = CityIterableDatamodels(filepath=os.path.join(self._dir_path, 'cities.json'))
 
-# =========== SAFE METHOD
-    def _safe_insert_weather_data_of(self, city: CityDM):
+# =========== KNOWN ALERTS METHOD
+    def _is_known_alert(self, alert, geoarea_id: int) -> bool:
+        return (geoarea_id, alert.event, alert.begin) in self._known_alerts
+
+# =========== FETCH METHOD
+    def _fetch(self, task: Tuple[CityDM, GeoareaLocationDM]):
+        """
+        A method that waits for an API key with budget left and downloads the weather data of the city. The error
+        (if any) is returned rather than raised, so that it is handled in city order by *execute*.
+        """
+
+        city, geoarea_info = task
         try:
-            geoarea_info = self._database_gway.query_place_location(
-                country_code=city.country_code,
-                place_name=city.place_name
-            )
-            key_to_use = self._api_keys[0].key      # using only the first key for now
             url = self._url_template.format(
-                api_key=key_to_use,
+                api_key=self._scheduler.acquire(),
                 lat=geoarea_info.latitude,
                 lon=geoarea_info.longitude
             )
-            service_jresp = json_http_response(url=url)
+            return json_http_response(url=url), None
+        except Exception as err:
+            return None, err
+
+    def _tasks(self):
+        for city in self._cities:
+            try:
+                yield city, self._database_gway.query_place_location(
+                    country_code=city.country_code,
+                    place_name=city.place_name
+                )
+            except ValueError as err:
+                _LOGGER.warning("%s" % str(err))
+
+# =========== SAFE METHOD
+    def _safe_insert_weather_data_of(self, city: CityDM, geoarea_info: GeoareaLocationDM, service_jresp):
+        try:
             datamodels = OpenweathermapIterableDatamodels(json_response=service_jresp)
             requests = OpenweathermapIterableRequests(datamodels=datamodels, weather_map=self._weather_map)
             valid_requests = WeatherDataIterableValidRequests(
                 requests=requests,
-                fexists=self._database_gway.exists_weather_alert_of,
+                fexists=self._is_known_alert,
                 extra={'geoarea_id': geoarea_info.id}
+            ).materialize()
+            responses = WeatherDataIterableResponses(
+                requests=valid_requests,
+                geoarea_id=geoarea_info.id,
+                replace=self._replace
             )
-            responses = WeatherDataIterableResponses(requests=valid_requests, geoarea_id=geoarea_info.id)
             self._database_gway.execute(query=responses.query())
             _LOGGER.debug("inserted weather data for city = '%s'" % str(city))
+            self._known_alerts.update(
+                (geoarea_info.id, alert.event, alert.begin) for req in valid_requests for alert in req.alerts
+            )
 
-            self._cached_hourly_forecast = [item for item in self._cached_hourly_forecast if item[1] != geoarea_info.id]
-            self._cached_daily_forecast = [item for item in self._cached_daily_forecast if item[1] != geoarea_info.id]
+            if not self._replace:
+                self._cached_hourly_forecast = [item for item in self._cached_hourly_forecast
+                                                if item[1] != geoarea_info.id]
+                self._cached_daily_forecast = [item for item in self._cached_daily_forecast
+                                               if item[1] != geoarea_info.id]
 
         except ValueError as err:
             _LOGGER.warning("%s" % str(err))
@@ -83,9 +124,19 @@ class Openweathermap(UsecaseABC):
 # =========== EXECUTE METHOD
     @log_context(logger_name=__name__, header=constants.START_MESSAGE, teardown=constants.END_MESSAGE)
     def execute(self):
+        max_workers = max(1, min(_ENVIRON.http_fetch_workers, self._scheduler.budget))
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='openweathermap')
+        succeeded = False
         try:
-            for city in self._cities:
-                self._safe_insert_weather_data_of(city=city)
+            tasks = list(self._tasks())
+            for (city, geoarea_info), (service_jresp, err) in zip(tasks, executor.map(self._fetch, tasks)):
+                if isinstance(err, ValueError):
+                    _LOGGER.warning("%s" % str(err))
+                    continue
+                if err is not None:
+                    raise err
+                self._safe_insert_weather_data_of(city=city, geoarea_info=geoarea_info, service_jresp=service_jresp)
+            succeeded = True
         except BaseException:
             if self._cached_hourly_forecast and self._cached_daily_forecast:
                 query = self.HOURLY_FORECAST_QUERY.format(
@@ -96,3 +147,12 @@ class Openweathermap(UsecaseABC):
                 )
                 self._database_gway.execute(query=query)
             raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            try:
+                self._database_gway.update_openweathermap_keys_usage(done_requests=self._scheduler.done_requests())
+            except Exception as err:
+                if succeeded:
+                    raise
+                # do not hide the error that is being raised.
+                _LOGGER.error("cannot write back the usage of the openweathermap keys: %s" % str(err))
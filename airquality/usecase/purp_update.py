@@ -11,22 +11,28 @@ _ENVIRON = environ.get_environ()
 # ======================================
 import math
 from datetime import datetime
+from typing import List, Tuple
 import airquality.usecase as constants
 import airquality.extra.timest as timest
 from airquality.usecase.abc import UsecaseABC
 from airquality.extra.decorator import log_context
 from airquality.datamodel.geometry import PostgisPoint
 from airquality.database.gateway import DatabaseGateway
-from airquality.extra.url import json_http_response
+from airquality.extra.snapshot import SnapshotStore, purpleair_datamodels
 from airquality.datamodel.fromapi import PurpleairDM
-from airquality.iterables.fromapi import PurpleairIterableDatamodels
 
 
-def _build_query(sensor_id: int, time: datetime, geom: PostgisPoint):
+def _build_query(moves: List[Tuple[int, PostgisPoint]], time: datetime):
+    """
+    A function that builds a single statement that closes the current location of all the moved sensors and
+    inserts their new location.
+    """
+
+    sensor_ids = ','.join(str(sensor_id) for sensor_id, _ in moves)
+    locations = ','.join(f"({sensor_id}, '{time}', {geom})" for sensor_id, geom in moves)
     return f"UPDATE level0_raw.sensor_at_location SET valid_to = '{time}' " \
-           f"WHERE sensor_id = {sensor_id} AND valid_to IS NULL;" \
-           "INSERT INTO level0_raw.sensor_at_location (sensor_id, valid_from, geom) " \
-           f"VALUES ({sensor_id}, '{time}', {geom});"
+           f"WHERE sensor_id IN ({sensor_ids}) AND valid_to IS NULL;" \
+           f"INSERT INTO level0_raw.sensor_at_location (sensor_id, valid_from, geom) VALUES {locations};"
 
 
 def _has_changed_location(datamodel: PurpleairDM, geo) -> bool:
@@ -40,25 +46,47 @@ def _has_changed_location(datamodel: PurpleairDM, geo) -> bool:
 
 
 class PurpUpdate(UsecaseABC):
+    """
+    A class that implements the *UsecaseABC* and defines the business rules for detecting the PurpleAir sensors
+    that have been moved and updating their location.
+
+    All the current sensor locations are loaded in a single query and compared with the API response in one pass,
+    then all the moves are applied with a single statement.
+    """
+
     def __init__(self, database_gway: DatabaseGateway):
         self._database_gway = database_gway
         self._url_template = _ENVIRON.url_template(personality='purp_update')
+        self._database_locations = self._database_gway.query_purpleair_sensor_locations()
+        snapshot_file = _ENVIRON.purpleair_snapshot_file
+        self._snapshot = SnapshotStore(path=snapshot_file, max_age=_ENVIRON.purpleair_snapshot_max_age) \
+            if snapshot_file else None
 
-    def _safe_query_location_of(self, datamodel: PurpleairDM):
+    def _safe_move_of(self, datamodel: PurpleairDM):
+        geo = self._database_locations.get(datamodel.sensor_index)
+        if geo is None:
+            _LOGGER.warning("Cannot found the current location of the sensor with sensor_index = '%d'"
+                            % datamodel.sensor_index)
+            return None
         try:
-            geo = self._database_gway.query_purpleair_sensor_location(sensor_index=datamodel.sensor_index)
             if _has_changed_location(datamodel=datamodel, geo=geo):
-                geom = PostgisPoint(latitude=datamodel.latitude, longitude=datamodel.longitude)
-                query = _build_query(sensor_id=geo.sensor_id, time=timest.now_utctz(), geom=geom)
-                self._database_gway.execute(query=query)
                 _LOGGER.debug("Update sensor at id = '%d' set location to => (%.6f, %.6f)" %
                               (geo.sensor_id, datamodel.longitude, datamodel.latitude))
+                return geo.sensor_id, PostgisPoint(latitude=datamodel.latitude, longitude=datamodel.longitude)
         except ValueError as err:
             _LOGGER.warning(str(err))
+        return None
 
     @log_context(logger_name=__name__, header=constants.START_MESSAGE, teardown=constants.END_MESSAGE)
     def execute(self):
-        server_jresp = json_http_response(url=self._url_template)
-        datamodels = PurpleairIterableDatamodels(json_response=server_jresp)
-        for datamodel in datamodels:
-            self._safe_query_location_of(datamodel=datamodel)
+        datamodels = purpleair_datamodels(
+            url=self._url_template, streaming=_ENVIRON.json_streaming, snapshot=self._snapshot
+        )
+        moves = [move for move in (self._safe_move_of(datamodel=dm) for dm in datamodels) if move is not None]
+        if not moves:
+            _LOGGER.debug('no sensor has changed its location.')
+            return
+
+        self._database_gway.execute(query=_build_query(moves=moves, time=timest.now_utctz()))
+        self._database_gway.invalidate_cache('query_fixed_sensor_unique_info')
+        _LOGGER.debug("updated the location of %d sensors" % len(moves))
@@ -14,10 +14,9 @@ _ENVIRON = environ.get_environ()
 ######################################################
 import airquality.usecase as constant
 from airquality.usecase.abc import UsecaseABC
-from airquality.extra.url import json_http_response
 from airquality.extra.decorator import log_context
+from airquality.extra.snapshot import SnapshotStore, purpleair_datamodels
 from airquality.database.gateway import DatabaseGateway
-from airquality.iterables.fromapi import PurpleairIterableDatamodels
 from airquality.iterables.requests import PurpleairIterableRequests
 from airquality.iterables.validator import FixedSensorIterableValidRequests
 from airquality.iterables.responses import FixedSensorIterableResponses
@@ -34,17 +33,24 @@ class Purpleair(UsecaseABC):
         self._url_template = _ENVIRON.url_template(personality='purpleair')
         self._start_sensor_id = self._database_gway.query_max_sensor_id_plus_one()
         self._database_sensor_names = self._database_gway.query_sensor_names_of_type(sensor_type='purpleair')
+        snapshot_file = _ENVIRON.purpleair_snapshot_file
+        self._snapshot = SnapshotStore(path=snapshot_file, max_age=_ENVIRON.purpleair_snapshot_max_age) \
+            if snapshot_file else None
 
     @log_context(logger_name=__name__, header=constant.START_MESSAGE, teardown=constant.END_MESSAGE)
     def execute(self):
-        server_jresp = json_http_response(url=self._url_template)
-        datamodels = PurpleairIterableDatamodels(json_response=server_jresp)
+        datamodels = purpleair_datamodels(
+            url=self._url_template, streaming=_ENVIRON.json_streaming, snapshot=self._snapshot
+        )
         requests = PurpleairIterableRequests(datamodels=datamodels)
-        valid_requests = FixedSensorIterableValidRequests(request=requests, name2remove=self._database_sensor_names)
+        # the datamodels are traversed once (a stream cannot be traversed again): only the (few) new sensors are
+        # kept in memory.
+        validator = FixedSensorIterableValidRequests(request=requests, name2remove=self._database_sensor_names)
+        valid_requests = validator.materialize()
         if not valid_requests:
             _LOGGER.debug('all the sensors are already stored into the database')
             return
 
         responses = FixedSensorIterableResponses(requests=valid_requests, start_sensor_id=self._start_sensor_id)
         self._database_gway.execute(responses.query())
-        _LOGGER.debug("inserted %d/%d sensors" % (len(valid_requests), len(datamodels)))
+        _LOGGER.debug("inserted %d/%d sensors" % (validator.stats.items_kept, validator.stats.items_in))
@@ -20,11 +20,14 @@ _FILE_ROTATOR = FileHandlerRotator(
 
 ######################################################
 from datetime import datetime
+from collections import deque
 import airquality.usecase as constants
 from airquality.usecase.abc import UsecaseABC
 from airquality.extra.decorator import log_context
-from airquality.extra.url import json_http_response
+from airquality.extra.url import json_http_response, json_http_responses
+from airquality.extra.window import WindowPlanner, DensityFile
 from airquality.database.gateway import DatabaseGateway
+from airquality.database.watermark import WatermarkTable
 from airquality.datamodel.fromdb import SensorApiParamDM
 from airquality.iterables.urls import ThingspeakIterableUrls
 from airquality.iterables.fromapi import ThingspeakIterableDatamodels
@@ -54,15 +57,28 @@ class Thingspeak(UsecaseABC):
         self._url_template = _ENVIRON.url_template(personality='thingspeak')
         self._measure_param = self._database_gway.query_measure_param_owned_by(owner="thingspeak")
         self._api_param = self._database_gway.query_sensor_apiparam_of_type(sensor_type="thingspeak")
+        self._watermarks = WatermarkTable(api_param=self._api_param)
+        self._loader_mode = _ENVIRON.loader_mode
+        self._window_mode = _ENVIRON.thingspeak_window_mode
+        density_file = _ENVIRON.thingspeak_density_file
+        self._densities = DensityFile(path=density_file) if density_file else None
 
-    def _packet_id(self) -> int:
-        return self._database_gway.query_max_station_packet_id_plus_one()
+    def _packet_id(self, n: int) -> int:
+        return self._database_gway.reserve_station_packet_ids(n=n)
 
     def _filter_ts_of(self, param: SensorApiParamDM) -> datetime:
-        return self._database_gway.query_last_acquisition_of(
-            sensor_id=param.sid,
-            ch_name=param.ch
-        )
+        return self._watermarks.watermark_of(sensor_id=param.sid, ch_name=param.ch)
+
+    def _channel_of(self, param: SensorApiParamDM) -> str:
+        return f"{param.sid}:{param.ch}"
+
+    def _planner_of(self, param: SensorApiParamDM) -> WindowPlanner:
+        density = self._densities.density_of(self._channel_of(param)) if self._densities is not None else None
+        return WindowPlanner(density=density, adaptive=self._window_mode == 'adaptive')
+
+    def _fetch_workers(self) -> int:
+        # in adaptive mode a window is planned only after the previous one has been observed: one request at a time.
+        return 1 if self._window_mode == 'adaptive' else _ENVIRON.http_fetch_workers
 
     def _urls_of(self, param: SensorApiParamDM) -> ThingspeakIterableUrls:
         pre_formatted_url = self._url_template.format(
@@ -73,38 +89,87 @@ class Thingspeak(UsecaseABC):
         return ThingspeakIterableUrls(
             url=pre_formatted_url,
             begin=param.last,
-            step_size_in_days=7
+            step_size_in_days=7,
+            planner=self._planner_of(param)
         )
 
+    @staticmethod
+    def _planned_urls(urls: ThingspeakIterableUrls, windows: deque):
+        """
+        A method that yields the urls of the planned windows and queues the windows, so that each response can be
+        matched with its window (the responses come back in the same order).
+        """
+
+        for begin, until in urls.windows():
+            windows.append((begin, until))
+            yield urls.window_url(begin=begin, until=until)
+
     def _rotate_file(self, sensor_id: int):
         sensor_ident = self._database_gway.query_fixed_sensor_unique_info(sensor_id=sensor_id)
         _FILE_ROTATOR.rotate(sensor_ident=sensor_ident)
 
 # =========== EXECUTE METHOD
     def execute(self):
-        for param in self._api_param:
-            self._rotate_file(sensor_id=param.sid)
-            self._safe_execute(param=param)
+        try:
+            for param in self._api_param:
+                with self._database_gway.unit_of_work():
+                    self._rotate_file(sensor_id=param.sid)
+                    self._safe_execute(param=param)
+        finally:
+            if self._densities is not None:
+                self._densities.save()
 
     @log_context(logger_name=__name__, header=constants.START_MESSAGE, teardown=constants.END_MESSAGE)
     def _safe_execute(self, param: SensorApiParamDM):
         _LOGGER.debug("%s" % repr(param))
-        for url in self._urls_of(param):
-            server_jresp = json_http_response(url=url)
-            datamodels = ThingspeakIterableDatamodels(json_response=server_jresp)
-            requests = ThingspeakIterableRequests(
-                datamodels=datamodels, measure_param=self._measure_param, api_field_names=self._FIELD_MAP[param.ch]
-            )
-            valid_requests = SensorMeasureIterableValidRequests(
-                requests=requests, filter_ts=self._filter_ts_of(param)
-            )
-            if not valid_requests:
-                _LOGGER.debug('no valid measures found.')
-                continue
-
-            responses = StationMeasureIterableResponses(
-                requests=valid_requests, sensor_param=param, start_packet_id=self._packet_id()
-            )
-
-            self._database_gway.execute(query=responses.query())
-            _LOGGER.debug("inserted %d/%d measures" % (len(valid_requests), len(datamodels)))
+        urls = self._urls_of(param)
+        windows = deque()
+        try:
+            for server_jresp in json_http_responses(
+                urls=self._planned_urls(urls=urls, windows=windows), max_workers=self._fetch_workers()
+            ):
+                begin, until = windows.popleft()
+                self._process_window(param=param, urls=urls, begin=begin, until=until, server_jresp=server_jresp)
+        finally:
+            if self._densities is not None:
+                self._densities.update(channel=self._channel_of(param), density=urls.planner.density)
+
+    def _process_window(
+        self, param: SensorApiParamDM, urls: ThingspeakIterableUrls, begin: datetime, until: datetime, server_jresp
+    ):
+        datamodels = ThingspeakIterableDatamodels(json_response=server_jresp).materialize()
+        n_entries = len(datamodels)
+        urls.planner.observe(begin=begin, until=until, n_entries=n_entries)
+        if urls.planner.is_truncated(n_entries):
+            halves = urls.planner.split(begin=begin, until=until)
+            if halves is not None:
+                _LOGGER.warning("window [%s, %s] reached %d entries: fetching it in two halves"
+                                % (begin, until, n_entries))
+                for half_begin, half_until in halves:
+                    self._process_window(
+                        param=param, urls=urls, begin=half_begin, until=half_until,
+                        server_jresp=json_http_response(url=urls.window_url(begin=half_begin, until=half_until))
+                    )
+                return
+            _LOGGER.warning("window [%s, %s] reached %d entries and cannot be split any further: some measures may "
+                            "be missing" % (begin, until, n_entries))
+
+        requests = ThingspeakIterableRequests(
+            datamodels=datamodels, measure_param=self._measure_param, api_field_names=self._FIELD_MAP[param.ch]
+        )
+        validator = SensorMeasureIterableValidRequests(requests=requests, filter_ts=self._filter_ts_of(param))
+        valid_requests = validator.materialize()
+        if not valid_requests:
+            _LOGGER.debug('no valid measures found.')
+            return
+
+        responses = StationMeasureIterableResponses(
+            requests=valid_requests, sensor_param=param, start_packet_id=self._packet_id(n=len(valid_requests))
+        )
+
+        self._database_gway.insert_measures(
+            responses=responses, loader_mode=self._loader_mode,
+            max_rows=_ENVIRON.chunk_max_rows, max_bytes=_ENVIRON.chunk_max_bytes
+        )
+        self._watermarks.advance(sensor_id=param.sid, ch_name=param.ch, time=responses.last_acquisition)
+        _LOGGER.debug("inserted %d/%d measures" % (responses.stats.items_kept, validator.stats.items_in))
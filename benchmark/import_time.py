@@ -0,0 +1,80 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-28, lun, 09:30
+# ======================================
+"""
+A benchmark of the startup cost of 'python3 -m airquality <personality>': the time spent importing the application
+modules (measured with 'python3 -X importtime' in a fresh interpreter) and the time spent loading the timezone finder
+on the first conversion from coordinates (see *airquality.extra.timest.warm_up_timezone_finder*).
+
+Run it from the project directory with:
+
+    python3 -m benchmark.import_time [--repeat 5] [--top 10] [personality ...]
+"""
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+_IMPORT_STATEMENT = "import sys; sys.argv = ['airquality', '{personality}']; import airquality.application"
+_WARM_UP_STATEMENT = "import time; from airquality.extra.timest import warm_up_timezone_finder; " \
+                     "t = time.perf_counter(); warm_up_timezone_finder(); print(time.perf_counter() - t)"
+
+
+def _importtime(personality: str) -> Dict[str, int]:
+    """
+    A function that returns the cumulative import time (in microseconds) of each module imported by the application.
+    """
+
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _IMPORT_STATEMENT.format(personality=personality)],
+        capture_output=True, text=True, check=True
+    )
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, module = line.split('|')
+        cumulative[module.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def _warm_up_seconds() -> float:
+    completed = subprocess.run([sys.executable, '-c', _WARM_UP_STATEMENT], capture_output=True, text=True, check=True)
+    return float(completed.stdout.strip())
+
+
+def _best_run(personality: str, repeat: int) -> Dict[str, int]:
+    runs = [_importtime(personality) for _ in range(repeat)]
+    return min(runs, key=lambda run: run.get('airquality.application', 0))
+
+
+def _top_modules(run: Dict[str, int], top: int) -> List[Tuple[str, int]]:
+    third_party = {m: t for m, t in run.items() if not m.startswith('airquality') and '.' not in m}
+    return sorted(third_party.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m benchmark.import_time', description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5, help='the best of *repeat* runs is reported')
+    parser.add_argument('--top', type=int, default=10, help='the number of top-level modules to report')
+    parser.add_argument('personalities', nargs='*', default=['geonames', 'thingspeak'])
+    args = parser.parse_args(argv)
+
+    for personality in args.personalities:
+        try:
+            run = _best_run(personality, repeat=args.repeat)
+        except subprocess.CalledProcessError as err:
+            print(f"cannot import the application for '{personality}' (is the '.env' file in place?):\n{err.stderr}",
+                  file=sys.stderr)
+            return 1
+        print(f"{personality}: importing the application takes {run.get('airquality.application', 0) / 1e3:.1f}ms")
+        for module, cumulative_us in _top_modules(run, top=args.top):
+            print(f"    {module:<32}{cumulative_us / 1e3:>10.1f}ms")
+    warm_up = min(_warm_up_seconds() for _ in range(args.repeat))
+    print(f"loading the timezone finder on first use takes {warm_up * 1e3:.1f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
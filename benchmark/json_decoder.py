@@ -0,0 +1,60 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-25, ven, 11:00
+# ======================================
+"""
+A micro-benchmark of the installed json decoders (see *airquality.extra.jsoncodec*) on the response fixtures of
+'test_resources' and on a full Thingspeak window and PurpleAir sensor list synthesized by the replay server.
+
+Run it from the project directory with:
+
+    python3 -m benchmark.json_decoder [--repeat 5] [--sensors 25000]
+"""
+import os
+import sys
+import json
+import timeit
+import argparse
+from datetime import datetime, timedelta
+from airquality.extra.jsoncodec import available_decoders
+from airquality.extra.replay import ReplayConfig, thingspeak_response, purpleair_response
+
+
+def _documents(resource_dir: str, sensors: int):
+    for filename in sorted(os.listdir(resource_dir)):
+        if filename.endswith('.json'):
+            with open(os.path.join(resource_dir, filename), 'rb') as f:
+                yield filename, f.read()
+    config = ReplayConfig(feed_interval=60, sensors=sensors)
+    until = datetime(2022, 1, 1)
+    feeds = thingspeak_response(channel=1, begin=until - timedelta(days=7), until=until, config=config)
+    yield 'thingspeak 8000 feeds', json.dumps(feeds).encode('utf-8')
+    yield f'purpleair {sensors} sensors', json.dumps(purpleair_response(config=config)).encode('utf-8')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m benchmark.json_decoder', description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5, help='the best of *repeat* runs is reported')
+    parser.add_argument('--sensors', type=int, default=25000, help='the size of the synthesized PurpleAir list')
+    parser.add_argument('--resource-dir', default='test_resources')
+    args = parser.parse_args(argv)
+
+    decoders = available_decoders()
+    print(f"{'document':<32}{'bytes':>12}" + ''.join(f"{name:>22}" for name in decoders))
+    for title, content in _documents(resource_dir=args.resource_dir, sensors=args.sensors):
+        expected = json.loads(content)
+        number = max(1, int(2_000_000 / len(content)))
+        timings = []
+        for name, decoder in decoders.items():
+            if decoder(content) != expected:
+                print(f"'{name}' decodes '{title}' differently from the standard library", file=sys.stderr)
+                return 1
+            best = min(timeit.repeat(lambda: decoder(content), number=number, repeat=args.repeat)) / number
+            timings.append(best)
+        baseline = timings[-1]              # the standard library is always the last decoder
+        print(f"{title:<32}{len(content):>12}" + ''.join(f"{t * 1e3:>12.3f}ms ({baseline / t:4.1f}x)" for t in timings))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-03-01, mar, 09:15
+# ======================================
+"""
+A micro-benchmark of *airquality.extra.timest.TimestampParser* against the *strptime* path of the
+*make_timezone_aware_\\** functions, on a week of Thingspeak feeds and Atmotube items synthesized by the replay server.
+
+Run it from the project directory with:
+
+    python3 -m benchmark.timestamp_parser [--repeat 5] [--feed-interval 60]
+"""
+import sys
+import timeit
+import argparse
+from datetime import datetime, timedelta
+from airquality.extra import timest
+from airquality.extra.replay import ReplayConfig, thingspeak_response, atmotube_response
+from airquality.iterables.requests import ThingspeakIterableRequests, AtmotubeIterableRequests
+
+
+def _batches(feed_interval: int):
+    config = ReplayConfig(feed_interval=feed_interval)
+    until = datetime(2022, 1, 1)
+    feeds = thingspeak_response(channel=1, begin=until - timedelta(days=7), until=until, config=config)['feeds']
+    yield 'thingspeak (local)', ThingspeakIterableRequests._TIME_FORMAT, [f['created_at'] for f in feeds], None
+    days = [until - timedelta(days=day) for day in range(7, 0, -1)]
+    items = [item for day in days for item in atmotube_response(mac='replay', date=day, config=config)['data']['items']]
+    coords = [(item['coords']['lat'], item['coords']['lon']) for item in items]
+    yield 'atmotube (coords)', AtmotubeIterableRequests._TIME_FORMAT, [item['time'] for item in items], coords
+
+
+def _baseline(fmt: str, times, coords):
+    if coords is None:
+        return [timest.make_timezone_aware_FROM_LOCAL(utctime=t, fmt=fmt) for t in times]
+    return [timest.make_timezone_aware_FROM_COORDS(utctime=t, latitude=lat, longitude=lng, fmt=fmt)
+            for t, (lat, lng) in zip(times, coords)]
+
+
+def _parsed(fmt: str, times, coords):
+    parser = timest.TimestampParser(fmt=fmt)
+    if coords is None:
+        return [parser.from_local(utctime=t) for t in times]
+    return [parser.from_coords(utctime=t, latitude=lat, longitude=lng) for t, (lat, lng) in zip(times, coords)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m benchmark.timestamp_parser', description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5, help='the best of *repeat* runs is reported')
+    parser.add_argument('--feed-interval', type=int, default=60, help='the seconds between two synthesized entries')
+    args = parser.parse_args(argv)
+
+    print(f"{'batch':<24}{'rows':>8}{'strptime':>14}{'parser':>14}")
+    for title, fmt, times, coords in _batches(feed_interval=args.feed_interval):
+        expected = _baseline(fmt, times, coords)
+        actual = _parsed(fmt, times, coords)
+        if [(str(dt), dt.fold) for dt in actual] != [(str(dt), dt.fold) for dt in expected]:
+            print(f"the parser converts '{title}' differently from the strptime path", file=sys.stderr)
+            return 1
+        baseline = min(timeit.repeat(lambda: _baseline(fmt, times, coords), number=1, repeat=args.repeat))
+        best = min(timeit.repeat(lambda: _parsed(fmt, times, coords), number=1, repeat=args.repeat))
+        print(f"{title:<24}{len(times):>8}{baseline * 1e3:>12.1f}ms{best * 1e3:>12.1f}ms ({baseline / best:4.1f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
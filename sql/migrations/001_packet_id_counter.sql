@@ -0,0 +1,26 @@
+-- ======================================
+-- @author:  Davide Colombo
+-- @date:    2022-03-02, mer, 09:00
+-- ======================================
+-- The counters of the packet ids of the measurement tables: the application reserves blocks of packet ids by
+-- incrementing 'next_id' (see DatabaseGateway.reserve_station_packet_ids and reserve_mobile_packet_ids).
+-- The counters start right after the largest packet id already stored. Apply once, before running the application:
+--
+--     psql -d <dbname> -f sql/migrations/001_packet_id_counter.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS level0_raw.packet_id_counter (
+    counter_name VARCHAR(50) PRIMARY KEY,
+    next_id BIGINT NOT NULL
+);
+
+INSERT INTO level0_raw.packet_id_counter (counter_name, next_id)
+SELECT 'station_measurement', COALESCE(MAX(packet_id), 0) + 1 FROM level0_raw.station_measurement
+ON CONFLICT (counter_name) DO NOTHING;
+
+INSERT INTO level0_raw.packet_id_counter (counter_name, next_id)
+SELECT 'mobile_measurement', COALESCE(MAX(packet_id), 0) + 1 FROM level0_raw.mobile_measurement
+ON CONFLICT (counter_name) DO NOTHING;
+
+COMMIT;
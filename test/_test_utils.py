@@ -13,6 +13,11 @@ def get_json_response_from_file(filename: str):
         return json.load(f)
 
 
+def get_json_content_from_file(filename: str) -> bytes:
+    with open(f'test_resources/{filename}', 'rb') as f:
+        return f.read()
+
+
 def get_tzinfo_from_timezone_name(tzname: str) -> tzinfo:
     return tz.gettz(tzname)
 
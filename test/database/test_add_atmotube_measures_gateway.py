@@ -62,14 +62,14 @@ class TestDatabaseGatewayAddMobileMeasuresSection(TestCase):
         with self.assertRaises(ValueError):
             gateway.query_measure_param_owned_by(owner="fakeowner")
 
-    def test_get_max_mobile_packet_id_plus_one(self):
+    def test_reserve_mobile_packet_ids_from_counter_block(self):
         mocked_database_adapt = MagicMock()
-        mocked_database_adapt.fetchone.return_value = (12399,)
-        gateway = DatabaseGateway(database_adapt=mocked_database_adapt)
-        self.assertEqual(
-            gateway.query_max_mobile_packet_id_plus_one(),
-            12400
-        )
+        mocked_database_adapt.fetchone.side_effect = [(1,), (11,)]
+        gateway = DatabaseGateway(database_adapt=mocked_database_adapt, packet_id_block_size=10)
+        self.assertEqual(gateway.reserve_mobile_packet_ids(n=7), 1)
+        self.assertEqual(gateway.reserve_mobile_packet_ids(n=7), 11)
+        self.assertEqual(mocked_database_adapt.fetchone.call_count, 2)
+        mocked_database_adapt.execute.assert_not_called()
 
     def test_query_mobile_sensor_unique_info(self):
         mocked_database_adapt = MagicMock()
@@ -79,15 +79,6 @@ class TestDatabaseGatewayAddMobileMeasuresSection(TestCase):
         self.assertEqual(ident.sensor_id, 0)
         self.assertEqual(ident.sensor_name, 'fake_name')
 
-    def test_query_one_when_max_packet_id_is_none(self):
-        mocked_database_adapt = MagicMock()
-        mocked_database_adapt.fetchone.return_value = (None,)
-        gateway = DatabaseGateway(database_adapt=mocked_database_adapt)
-        self.assertEqual(
-            gateway.query_max_mobile_packet_id_plus_one(),
-            1
-        )
-
 
 if __name__ == '__main__':
     main()
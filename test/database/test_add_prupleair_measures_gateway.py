@@ -40,23 +40,24 @@ def _expected_fixed_sensor_unique_info():
 class TestDatabaseGatewayAddStationMeasuresSection(TestCase):
 
 # =========== TEST METHODS
-    def test_get_max_station_packet_id_plus_one(self):
+    def test_reserve_station_packet_ids_from_counter_block(self):
         mocked_database_adapt = MagicMock()
-        mocked_database_adapt.fetchone.return_value = (149,)
-        gateway = DatabaseGateway(database_adapt=mocked_database_adapt)
-        self.assertEqual(
-            gateway.query_max_station_packet_id_plus_one(),
-            150
+        mocked_database_adapt.fetchone.return_value = (500,)
+        gateway = DatabaseGateway(database_adapt=mocked_database_adapt, packet_id_block_size=100)
+        self.assertEqual(gateway.reserve_station_packet_ids(n=40), 500)
+        self.assertEqual(gateway.reserve_station_packet_ids(n=60), 540)
+        mocked_database_adapt.execute.assert_not_called()
+        mocked_database_adapt.fetchone.assert_called_once_with(
+            query="UPDATE level0_raw.packet_id_counter SET next_id = next_id + 100 "
+                  "WHERE counter_name = 'station_measurement' RETURNING next_id - 100;"
         )
 
-    def test_get_one_when_max_station_packet_id_is_none(self):
+    def test_raise_value_error_when_packet_id_counter_is_missing(self):
         mocked_database_adapt = MagicMock()
-        mocked_database_adapt.fetchone.return_value = (None,)
+        mocked_database_adapt.fetchone.return_value = None
         gateway = DatabaseGateway(database_adapt=mocked_database_adapt)
-        self.assertEqual(
-            gateway.query_max_station_packet_id_plus_one(),
-            1
-        )
+        with self.assertRaises(ValueError):
+            gateway.reserve_station_packet_ids(n=1)
 
     def test_query_fixed_sensor_unique_info(self):
         mocked_database_adapt = MagicMock()
@@ -68,6 +69,25 @@ class TestDatabaseGatewayAddStationMeasuresSection(TestCase):
         self.assertEqual(ident.sensor_lng, -9.0)
         self.assertEqual(ident.sensor_lat, 44.0)
 
+    def test_insert_measures_with_each_loader_mode(self):
+        mocked_database_adapt = MagicMock()
+        mocked_responses = MagicMock()
+        mocked_responses.queries.return_value = iter(["q1;", "q2;"])
+        gateway = DatabaseGateway(database_adapt=mocked_database_adapt)
+
+        gateway.insert_measures(responses=mocked_responses, loader_mode='copy')
+        mocked_database_adapt.copy.assert_called_once_with(
+            buffer=mocked_responses.copy_buffer.return_value,
+            table=mocked_responses.COPY_TABLE,
+            columns=mocked_responses.COPY_COLUMNS,
+            query=mocked_responses.last_acquisition_query.return_value
+        )
+        gateway.insert_measures(responses=mocked_responses, loader_mode='chunked', max_rows=10, max_bytes=100)
+        mocked_responses.queries.assert_called_once_with(max_rows=10, max_bytes=100)
+        mocked_database_adapt.execute_all.assert_called_once_with(queries=mocked_responses.queries.return_value)
+        gateway.insert_measures(responses=mocked_responses)
+        mocked_database_adapt.execute.assert_called_once_with(mocked_responses.query.return_value)
+
 
 if __name__ == '__main__':
     main()
@@ -5,6 +5,7 @@
 from unittest import TestCase, main
 from unittest.mock import MagicMock
 from airquality.database.gateway import DatabaseGateway
+from airquality.datamodel.fromdb import SensorLocationDM
 from airquality.datamodel.responses import AddFixedSensorResponse
 
 
@@ -70,6 +71,22 @@ class TestDatabaseGatewayAddFixedSensorsSection(TestCase):
         self.assertEqual(geo.latitude, 45.02345)
         self.assertEqual(geo.longitude, 9.12345)
 
+    def test_query_purpleair_locations_keyed_by_sensor_index(self):
+        mocked_database_adapt = MagicMock()
+        mocked_database_adapt.fetchall.return_value = [
+            ('n1 (123)', 12, 9.12345, 45.02345),
+            ('n2 (1234)', 13, 10.5, 44.5),
+            ('unnamed sensor', 14, 11.0, 43.0)
+        ]
+        gateway = DatabaseGateway(database_adapt=mocked_database_adapt)
+        locations = gateway.query_purpleair_sensor_locations()
+        self.assertEqual(
+            locations,
+            {123: SensorLocationDM(sensor_id=12, longitude=9.12345, latitude=45.02345),
+             1234: SensorLocationDM(sensor_id=13, longitude=10.5, latitude=44.5)}
+        )
+        mocked_database_adapt.fetchall.assert_called_once()
+
     def test_execute_query(self):
         mocked_database_adapt = MagicMock()
         mocked_database_adapt.execute = MagicMock()
@@ -85,6 +85,14 @@ class TestDatabaseGatewayAddWeatherDataSection(TestCase):
             _expected_weather_map()
         )
 
+    def test_cached_weather_conditions_are_read_only(self):
+        mocked_database_adapt = MagicMock()
+        mocked_database_adapt.fetchall.return_value = _test_database_weather_conditions()
+        gateway = DatabaseGateway(database_adapt=mocked_database_adapt)
+        with self.assertRaises(TypeError):
+            gateway.query_weather_conditions()['fake_key'] = 0
+        self.assertEqual(gateway.query_weather_conditions(), _expected_weather_map())
+
     def test_raise_value_error_when_weather_conditions_are_empty(self):
         mocked_database_adapt = MagicMock()
         mocked_database_adapt.fetchall.return_value = []
@@ -92,6 +100,22 @@ class TestDatabaseGatewayAddWeatherDataSection(TestCase):
         with self.assertRaises(ValueError):
             gateway.query_weather_conditions()
 
+    def test_query_weather_alert_keys(self):
+        mocked_database_adapt = MagicMock()
+        mocked_database_adapt.fetchall.return_value = [
+            (14400, 'event', datetime(2022, 1, 10, 9, 45)),
+            (14401, 'event', datetime(2022, 1, 10, 9, 45))
+        ]
+        gateway = DatabaseGateway(database_adapt=mocked_database_adapt)
+        self.assertEqual(
+            gateway.query_weather_alert_keys(),
+            {(14400, 'event', datetime(2022, 1, 10, 9, 45)), (14401, 'event', datetime(2022, 1, 10, 9, 45))}
+        )
+        mocked_database_adapt.fetchall.assert_called_with(
+            query="SELECT geoarea_id, alert_event, alert_begin FROM level0_raw.weather_alert "
+                  "WHERE alert_until IS NULL OR alert_until >= NOW() - INTERVAL '1 day';"
+        )
+
     def test_true_when_already_exists_weather_alert_record(self):
         mocked_database_adapt = MagicMock()
         mocked_database_adapt.fetchone.return_value = _test_existing_weather_alert_record()
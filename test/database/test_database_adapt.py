@@ -5,8 +5,9 @@
 # Description: INSERT HERE THE DESCRIPTION
 #
 ######################################################
+from io import StringIO
 from unittest import TestCase, main
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, patch, call
 
 import psycopg2.errors
 
@@ -74,6 +75,52 @@ class TestDatabaseAdapter(TestCase):
         mocked_cursor.execute.assert_called_with(test_query)
         mocked_conn.close.assert_called_once()
 
+    @patch('airquality.database.adapter.connect')
+    def test_copy(self, mocked_connect):
+        mocked_cursor = MagicMock()
+        mocked_cursor.__enter__.return_value = mocked_cursor
+        mocked_conn = MagicMock()
+        mocked_conn.cursor.return_value = mocked_cursor
+        mocked_connect.return_value = mocked_conn
+
+        test_buffer = StringIO("1\t2\n")
+        with Psycopg2Adapter(**self.get_test_connection_properties) as adapter:
+            adapter.copy(buffer=test_buffer, table="schema.table", columns=('c1', 'c2'), query="update query.")
+        mocked_cursor.copy_expert.assert_called_with(sql="COPY schema.table (c1, c2) FROM STDIN;", file=test_buffer)
+        mocked_cursor.execute.assert_called_with("update query.")
+        mocked_conn.__enter__.assert_called_once()
+        mocked_conn.__exit__.assert_called_once()
+        self.assertTrue(mocked_conn.autocommit)
+
+    @patch('airquality.database.adapter.connect')
+    def test_execute_all_within_transaction(self, mocked_connect):
+        mocked_cursor = MagicMock()
+        mocked_cursor.__enter__.return_value = mocked_cursor
+        mocked_conn = MagicMock()
+        mocked_conn.cursor.return_value = mocked_cursor
+        mocked_connect.return_value = mocked_conn
+
+        with Psycopg2Adapter(**self.get_test_connection_properties) as adapter:
+            adapter.execute_all(queries=(q for q in ["query 1.", "query 2."]))
+        self.assertEqual(mocked_cursor.execute.call_args_list, [call("query 1."), call("query 2.")])
+        mocked_conn.__enter__.assert_called_once()
+        self.assertTrue(mocked_conn.autocommit)
+
+    @patch('airquality.database.adapter.connect')
+    def test_copy_restore_autocommit_on_psycopg2_Error(self, mocked_connect):
+        mocked_cursor = MagicMock()
+        mocked_cursor.__enter__.return_value = mocked_cursor
+        mocked_cursor.copy_expert.side_effect = [psycopg2.Error("psycopg2 error")]
+        mocked_conn = MagicMock()
+        mocked_conn.cursor.return_value = mocked_cursor
+        mocked_connect.return_value = mocked_conn
+
+        with Psycopg2Adapter(**self.get_test_connection_properties) as adapter:
+            with self.assertRaises(psycopg2.Error):
+                adapter.copy(buffer=StringIO(), table="schema.table", columns=('c1',), query="update query.")
+        mocked_cursor.execute.assert_not_called()
+        self.assertTrue(mocked_conn.autocommit)
+
     @patch('airquality.database.adapter.connect')
     def test_exit_on_psycopg2_Error(self, mocked_connect):
         mocked_cursor = MagicMock()
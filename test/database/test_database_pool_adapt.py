@@ -0,0 +1,198 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-14, lun, 10:21
+# ======================================
+import threading
+from io import StringIO
+from unittest import TestCase, main
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+
+from airquality.database.adapter import Psycopg2PoolAdapter, PoolUsageStats
+from airquality.database.gateway import DatabaseGateway
+
+
+def _test_connection_properties():
+    return {'dbname': 'fakedbname', 'user': 'fakeuser', 'password': 'fakepassword', 'host': 'fakehost',
+            'port': 'fakeport'}
+
+
+def _mocked_connection(fetchone=None, closed=0) -> MagicMock:
+    mocked_cursor = MagicMock()
+    mocked_cursor.__enter__.return_value = mocked_cursor
+    mocked_cursor.fetchone.return_value = fetchone
+    mocked_conn = MagicMock()
+    mocked_conn.closed = closed
+    mocked_conn.cursor.return_value = mocked_cursor
+    return mocked_conn
+
+
+class TestDatabasePoolAdapter(TestCase):
+
+    @patch('airquality.database.adapter.ThreadedConnectionPool')
+    def test_fetchone_checkout_and_checkin_connection(self, mocked_pool_class):
+        mocked_conn = _mocked_connection(fetchone=("some value",))
+        mocked_pool = mocked_pool_class.return_value
+        mocked_pool.getconn.return_value = mocked_conn
+
+        with Psycopg2PoolAdapter(minconn=1, maxconn=4, **_test_connection_properties()) as adapter:
+            actual = adapter.fetchone("query.")
+            stats = adapter.stats()
+
+        self.assertEqual(actual, ("some value",))
+        mocked_conn.cursor.return_value.execute.assert_called_with("query.")
+        mocked_pool.putconn.assert_called_once_with(mocked_conn, close=False)
+        mocked_pool.closeall.assert_called_once()
+        self.assertTrue(mocked_conn.autocommit)
+        self.assertEqual(
+            stats,
+            PoolUsageStats(minconn=1, maxconn=4, in_use=0, peak_in_use=1, checkouts=1, waits=0, discarded=0)
+        )
+
+    @patch('airquality.database.adapter.monotonic')
+    @patch('airquality.database.adapter.ThreadedConnectionPool')
+    def test_discard_connection_that_fails_health_check(self, mocked_pool_class, mocked_monotonic):
+        mocked_monotonic.side_effect = [0.0, 100.0, 100.0]
+        broken_conn = _mocked_connection()
+        closed_conn = _mocked_connection(closed=1)
+        healthy_conn = _mocked_connection()
+        mocked_pool = mocked_pool_class.return_value
+        mocked_pool.getconn.side_effect = [broken_conn, broken_conn, closed_conn, healthy_conn]
+
+        with Psycopg2PoolAdapter(**_test_connection_properties()) as adapter:
+            adapter.execute("query 1.")
+            broken_conn.cursor.return_value.execute.side_effect = [psycopg2.OperationalError("server closed")]
+            adapter.execute("query 2.")
+            stats = adapter.stats()
+
+        broken_conn.cursor.return_value.execute.assert_called_with("SELECT 1;")
+        mocked_pool.putconn.assert_any_call(broken_conn, close=True)
+        mocked_pool.putconn.assert_any_call(closed_conn, close=True)
+        mocked_pool.putconn.assert_called_with(healthy_conn, close=False)
+        healthy_conn.cursor.return_value.execute.assert_called_once_with("query 2.")
+        self.assertEqual(stats.discarded, 2)
+        self.assertEqual(stats.checkouts, 2)
+
+    @patch('airquality.database.adapter.monotonic')
+    @patch('airquality.database.adapter.ThreadedConnectionPool')
+    def test_ping_only_connections_idle_for_too_long(self, mocked_pool_class, mocked_monotonic):
+        clock = [0.0]
+        mocked_monotonic.side_effect = lambda: clock[0]
+        mocked_conn = _mocked_connection()
+        mocked_pool = mocked_pool_class.return_value
+        mocked_pool.getconn.return_value = mocked_conn
+
+        with Psycopg2PoolAdapter(ping_after=30.0, **_test_connection_properties()) as adapter:
+            adapter.execute("query 1.")
+            clock[0] = 10.0
+            adapter.execute("query 2.")
+            clock[0] = 100.0
+            adapter.execute("query 3.")
+
+        self.assertEqual(
+            [c.args[0] for c in mocked_conn.cursor.return_value.execute.call_args_list],
+            ["query 1.", "query 2.", "SELECT 1;", "query 3."]
+        )
+
+    @patch('airquality.database.adapter.ThreadedConnectionPool')
+    def test_discard_connection_in_unknown_state_without_query(self, mocked_pool_class):
+        lost_conn = _mocked_connection()
+        lost_conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+        healthy_conn = _mocked_connection()
+        mocked_pool = mocked_pool_class.return_value
+        mocked_pool.getconn.side_effect = [lost_conn, healthy_conn]
+
+        with Psycopg2PoolAdapter(**_test_connection_properties()) as adapter:
+            adapter.execute("query.")
+
+        lost_conn.cursor.assert_not_called()
+        mocked_pool.putconn.assert_any_call(lost_conn, close=True)
+        healthy_conn.cursor.return_value.execute.assert_called_once_with("query.")
+
+    @patch('airquality.database.adapter.ThreadedConnectionPool')
+    def test_unit_of_work_uses_a_single_connection(self, mocked_pool_class):
+        mocked_conn = _mocked_connection()
+        mocked_pool = mocked_pool_class.return_value
+        mocked_pool.getconn.return_value = mocked_conn
+
+        with Psycopg2PoolAdapter(health_check=False, **_test_connection_properties()) as adapter:
+            with adapter.unit_of_work():
+                adapter.execute("query 1.")
+                with adapter.unit_of_work():
+                    adapter.fetchall("query 2.")
+                self.assertEqual(adapter.stats().in_use, 1)
+            stats = adapter.stats()
+
+        mocked_pool.getconn.assert_called_once()
+        mocked_pool.putconn.assert_called_once_with(mocked_conn, close=False)
+        self.assertEqual(stats.in_use, 0)
+
+    @patch('airquality.database.adapter.ThreadedConnectionPool')
+    def test_copy_within_transaction(self, mocked_pool_class):
+        mocked_conn = _mocked_connection()
+        mocked_pool = mocked_pool_class.return_value
+        mocked_pool.getconn.return_value = mocked_conn
+
+        test_buffer = StringIO("1\t2\n")
+        with Psycopg2PoolAdapter(health_check=False, **_test_connection_properties()) as adapter:
+            adapter.copy(buffer=test_buffer, table="schema.table", columns=('c1', 'c2'), query="update query.")
+
+        mocked_cursor = mocked_conn.cursor.return_value
+        mocked_cursor.copy_expert.assert_called_with(sql="COPY schema.table (c1, c2) FROM STDIN;", file=test_buffer)
+        mocked_cursor.execute.assert_called_with("update query.")
+        mocked_conn.__exit__.assert_called_once()
+        self.assertTrue(mocked_conn.autocommit)
+
+    @patch('airquality.database.adapter.ThreadedConnectionPool')
+    def test_wait_for_free_connection_when_pool_is_exhausted(self, mocked_pool_class):
+        mocked_pool = mocked_pool_class.return_value
+        mocked_pool.getconn.side_effect = lambda: _mocked_connection()
+
+        adapter = Psycopg2PoolAdapter(maxconn=1, health_check=False, **_test_connection_properties())
+        first_checked_out = threading.Event()
+        release_first = threading.Event()
+
+        def hold_connection():
+            with adapter.unit_of_work():
+                first_checked_out.set()
+                release_first.wait(timeout=5)
+
+        worker = threading.Thread(target=hold_connection)
+        worker.start()
+        first_checked_out.wait(timeout=5)
+        threading.Timer(0.05, release_first.set).start()
+        adapter.execute("query.")
+        worker.join(timeout=5)
+
+        stats = adapter.stats()
+        self.assertEqual(stats.waits, 1)
+        self.assertEqual(stats.checkouts, 2)
+        self.assertEqual(stats.peak_in_use, 1)
+
+
+class TestDatabaseGatewayUnitOfWork(TestCase):
+
+    @patch('airquality.database.adapter.ThreadedConnectionPool')
+    def test_gateway_calls_share_the_pinned_connection(self, mocked_pool_class):
+        mocked_pool = mocked_pool_class.return_value
+        mocked_pool.getconn.return_value = _mocked_connection(fetchone=(1,))
+
+        with Psycopg2PoolAdapter(**_test_connection_properties()) as adapter:
+            gateway = DatabaseGateway(database_adapt=adapter)
+            with gateway.unit_of_work():
+                gateway.execute(query="query.")
+                gateway.reserve_station_packet_ids(n=1)
+
+        mocked_pool.getconn.assert_called_once()
+
+    def test_single_connection_adapter_needs_no_unit_of_work(self):
+        mocked_adapt = MagicMock(spec=['execute'])
+        gateway = DatabaseGateway(database_adapt=mocked_adapt)
+        with gateway.unit_of_work():
+            gateway.execute(query="query.")
+        mocked_adapt.execute.assert_called_once_with("query.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-17, gio, 11:20
+# ======================================
+from io import StringIO
+from unittest import TestCase, main
+from unittest.mock import MagicMock, patch
+from airquality.database.instrument import InstrumentedDatabaseAdapter, normalize_query
+
+
+class TestNormalizeQuery(TestCase):
+
+    def test_replace_literals_with_placeholder(self):
+        self.assertEqual(
+            normalize_query("SELECT id FROM level0_raw.sensor WHERE name = 'n1 (12)' AND id = 12;"),
+            "SELECT id FROM level0_raw.sensor WHERE name = ? AND id = ?;"
+        )
+
+    def test_collapse_values_and_in_lists(self):
+        self.assertEqual(
+            normalize_query("UPDATE t SET v = 1 WHERE id IN (12,14);INSERT INTO t (a, b) VALUES (1, 2.5),(3, 'x');"),
+            "UPDATE t SET v = ? WHERE id IN (...);INSERT INTO t (a, b) VALUES (...);"
+        )
+
+
+class TestInstrumentedDatabaseAdapter(TestCase):
+
+    @patch('airquality.database.instrument.perf_counter')
+    def test_record_query_stats_per_template(self, mocked_perf_counter):
+        mocked_perf_counter.side_effect = [0.0, 0.1, 1.0, 1.3, 2.0, 2.2]
+        mocked_adapt = MagicMock()
+        mocked_adapt.fetchall.return_value = [(1,), (2,)]
+        adapter = InstrumentedDatabaseAdapter(database_adapt=mocked_adapt)
+        adapter.fetchall("SELECT * FROM t WHERE id = 1;")
+        adapter.fetchall("SELECT * FROM t WHERE id = 2;")
+        adapter.execute("DELETE FROM t;")
+
+        stats = adapter.stats()
+        self.assertEqual([s.template for s in stats], ["SELECT * FROM t WHERE id = ?;", "DELETE FROM t;"])
+        self.assertEqual(stats[0].calls, 2)
+        self.assertAlmostEqual(stats[0].total_time, 0.4)
+        self.assertAlmostEqual(stats[0].avg_time, 0.2)
+        self.assertAlmostEqual(stats[0].p95_time, 0.3)
+        self.assertEqual(stats[0].rows, 4)
+        self.assertEqual(stats[0].bytes, 58)
+        self.assertIn("DELETE FROM t;", adapter.summary())
+
+    @patch('airquality.database.instrument.perf_counter')
+    def test_log_slow_query(self, mocked_perf_counter):
+        mocked_perf_counter.side_effect = [0.0, 2.0]
+        adapter = InstrumentedDatabaseAdapter(database_adapt=MagicMock(), slow_query_threshold=1.0)
+        with self.assertLogs('airquality.database.instrument', level='WARNING') as logs:
+            adapter.execute("DELETE FROM t WHERE id = 3;")
+        self.assertIn("slow query (2.000 s): DELETE FROM t WHERE id = ?;", logs.output[0])
+
+    def test_record_each_statement_of_execute_all_and_copy(self):
+        mocked_adapt = MagicMock()
+        mocked_adapt.execute_all.side_effect = lambda queries: list(queries)
+        adapter = InstrumentedDatabaseAdapter(database_adapt=mocked_adapt)
+        adapter.execute_all(queries=iter(["INSERT INTO t VALUES (1);", "INSERT INTO t VALUES (2),(3);"]))
+        adapter.copy(buffer=StringIO("1\t2\n"), table="t", columns=('a', 'b'))
+
+        stats = {s.template: s for s in adapter.stats()}
+        self.assertEqual(stats["INSERT INTO t VALUES (...);"].calls, 2)
+        self.assertEqual(stats["COPY t (a, b) FROM STDIN;"].bytes, 4)
+        mocked_adapt.copy.assert_called_once()
+
+    def test_forward_other_attributes_to_wrapped_adapter(self):
+        mocked_adapt = MagicMock()
+        with InstrumentedDatabaseAdapter(database_adapt=mocked_adapt) as adapter:
+            adapter.unit_of_work()
+        mocked_adapt.unit_of_work.assert_called_once()
+        mocked_adapt.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    main()
@@ -35,6 +35,39 @@ class TestDatabaseGatewayServiceAPIParamSection(TestCase):
         with self.assertRaises(ValueError):
             gateway.query_openweathermap_keys()
 
+    def test_cache_openweathermap_keys(self):
+        mocked_database_adapt = MagicMock()
+        mocked_database_adapt.fetchall.return_value = _test_database_openweathermap_keys()
+        gateway = DatabaseGateway(database_adapt=mocked_database_adapt)
+        gateway.query_openweathermap_keys()
+        self._assert_openweathermap_keys(
+            key=gateway.query_openweathermap_keys()
+        )
+        mocked_database_adapt.fetchall.assert_called_once()
+        self.assertGreaterEqual(gateway.cache_stats()['query_openweathermap_keys'].hits, 1)
+
+        gateway.invalidate_cache('query_openweathermap_keys')
+        gateway.query_openweathermap_keys()
+        self.assertEqual(mocked_database_adapt.fetchall.call_count, 2)
+
+    def test_cached_openweathermap_keys_are_immutable(self):
+        mocked_database_adapt = MagicMock()
+        mocked_database_adapt.fetchall.return_value = _test_database_openweathermap_keys()
+        gateway = DatabaseGateway(database_adapt=mocked_database_adapt)
+        keys = gateway.query_openweathermap_keys()
+        with self.assertRaises(AttributeError):
+            keys.append(None)
+        self.assertEqual(len(gateway.query_openweathermap_keys()), 2)
+
+    def test_update_openweathermap_keys_usage_in_one_statement(self):
+        mocked_database_adapt = MagicMock()
+        gateway = DatabaseGateway(database_adapt=mocked_database_adapt)
+        gateway.update_openweathermap_keys_usage(done_requests={'key1': 3, 'key2': 0})
+        mocked_database_adapt.execute.assert_called_once_with(
+            query="UPDATE level0_raw.openweathermap_key AS k SET done_req_min = v.n_done "
+                  "FROM (VALUES ('key1', 3),('key2', 0)) AS v(key_value, n_done) WHERE k.key_value = v.key_value;"
+        )
+
     def _assert_openweathermap_keys(self, key):
         self.assertEqual(key[0].key, "key1")
         self.assertEqual(key[0].n_done, 0)
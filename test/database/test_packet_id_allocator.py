@@ -0,0 +1,53 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-14, lun, 15:40
+# ======================================
+from unittest import TestCase, main
+from unittest.mock import MagicMock
+from airquality.database.allocator import PacketIdAllocator
+
+
+def _mocked_freserve(*block_starts) -> MagicMock:
+    mocked_f = MagicMock()
+    mocked_f.side_effect = list(block_starts)
+    return mocked_f
+
+
+class TestPacketIdAllocator(TestCase):
+
+    def test_hand_out_ids_from_the_current_block(self):
+        mocked_freserve = _mocked_freserve(100)
+        allocator = PacketIdAllocator(freserve=mocked_freserve, block_size=10)
+        self.assertEqual(allocator.reserve(3), 100)
+        self.assertEqual(allocator.reserve(4), 103)
+        self.assertEqual(allocator.reserve(3), 107)
+        mocked_freserve.assert_called_once_with(10)
+
+    def test_reserve_new_block_when_the_current_one_runs_out(self):
+        mocked_freserve = _mocked_freserve(100, 250)
+        allocator = PacketIdAllocator(freserve=mocked_freserve, block_size=10)
+        self.assertEqual(allocator.reserve(8), 100)
+        self.assertEqual(allocator.reserve(3), 250)
+        self.assertEqual(allocator.reserve(7), 253)
+        self.assertEqual(mocked_freserve.call_count, 2)
+
+    def test_reserve_block_larger_than_block_size(self):
+        mocked_freserve = _mocked_freserve(1, 26)
+        allocator = PacketIdAllocator(freserve=mocked_freserve, block_size=10)
+        self.assertEqual(allocator.reserve(25), 1)
+        self.assertEqual(allocator.reserve(1), 26)
+        mocked_freserve.assert_any_call(25)
+        mocked_freserve.assert_called_with(10)
+
+    def test_raise_value_error_when_reserve_less_than_one_id(self):
+        allocator = PacketIdAllocator(freserve=_mocked_freserve(1), block_size=10)
+        with self.assertRaises(ValueError):
+            allocator.reserve(0)
+
+    def test_raise_value_error_when_block_size_is_not_positive(self):
+        with self.assertRaises(ValueError):
+            PacketIdAllocator(freserve=_mocked_freserve(1), block_size=0)
+
+
+if __name__ == '__main__':
+    main()
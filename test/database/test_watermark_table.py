@@ -0,0 +1,44 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-15, mar, 09:40
+# ======================================
+from datetime import datetime
+from unittest import TestCase, main
+from airquality.datamodel.fromdb import SensorApiParamDM
+from airquality.database.watermark import WatermarkTable
+
+
+def _test_sensor_api_param():
+    return [
+        SensorApiParamDM(sid=1, key="k1", id="i1", ch="1A", last=datetime(2021, 12, 20, 11, 38)),
+        SensorApiParamDM(sid=1, key="k2", id="i2", ch="1B", last=datetime(2021, 12, 21, 9, 10)),
+        SensorApiParamDM(sid=2, key="k3", id="i3", ch="1A", last=datetime(2022, 1, 2, 17, 0))
+    ]
+
+
+class TestWatermarkTable(TestCase):
+
+# =========== SETUP METHOD
+    def setUp(self) -> None:
+        self._watermarks = WatermarkTable(api_param=_test_sensor_api_param())
+
+# =========== TEST METHODS
+    def test_load_watermarks_from_sensor_api_param(self):
+        self.assertEqual(len(self._watermarks), 3)
+        self.assertEqual(self._watermarks.watermark_of(sensor_id=1, ch_name="1B"), datetime(2021, 12, 21, 9, 10))
+        self.assertEqual(self._watermarks.watermark_of(sensor_id=2, ch_name="1A"), datetime(2022, 1, 2, 17, 0))
+
+    def test_advance_watermark_forward_only(self):
+        self._watermarks.advance(sensor_id=1, ch_name="1A", time=datetime(2021, 12, 27, 11, 38))
+        self.assertEqual(self._watermarks.watermark_of(sensor_id=1, ch_name="1A"), datetime(2021, 12, 27, 11, 38))
+        self._watermarks.advance(sensor_id=1, ch_name="1A", time=datetime(2021, 12, 22, 0, 0))
+        self.assertEqual(self._watermarks.watermark_of(sensor_id=1, ch_name="1A"), datetime(2021, 12, 27, 11, 38))
+        self.assertEqual(self._watermarks.watermark_of(sensor_id=1, ch_name="1B"), datetime(2021, 12, 21, 9, 10))
+
+    def test_raise_value_error_when_channel_is_missing(self):
+        with self.assertRaises(ValueError):
+            self._watermarks.watermark_of(sensor_id=3, ch_name="1A")
+
+
+if __name__ == '__main__':
+    main()
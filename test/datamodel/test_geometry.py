@@ -25,6 +25,16 @@ class TestGeometry(TestCase):
             "NULL"
         )
 
+    def test_point_geometry_ewkt(self):
+        geo = PostgisPoint(latitude=5, longitude=10)
+        self.assertEqual(
+            geo.ewkt(),
+            "SRID=4326;POINT(10 5)"
+        )
+
+    def test_null_geometry_ewkt(self):
+        self.assertIsNone(NullGeometry().ewkt())
+
     def test_raise_ValueError_when_create_point_geometry(self):
         with self.assertRaises(ValueError):
             PostgisPoint(latitude=-92, longitude=147)
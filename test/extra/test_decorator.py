@@ -0,0 +1,94 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-15, mar, 16:02
+# ======================================
+import gc
+import weakref
+from unittest import TestCase, main
+from unittest.mock import MagicMock, patch
+from airquality.extra.decorator import ttl_cache, CacheInfo
+
+
+def _cached_function(ttl=10.0, maxsize=2):
+    mocked_f = MagicMock()
+    mocked_f.side_effect = lambda x: x * 10
+    mocked_f.__name__ = 'mocked_f'
+    return mocked_f, ttl_cache(ttl=ttl, maxsize=maxsize)(mocked_f)
+
+
+class TestTTLCacheDecorator(TestCase):
+
+    def test_return_cached_value_and_count_hits_and_misses(self):
+        mocked_f, cached_f = _cached_function()
+        self.assertEqual(cached_f(1), 10)
+        self.assertEqual(cached_f(1), 10)
+        self.assertEqual(cached_f(x=1), 10)
+        self.assertEqual(mocked_f.call_count, 2)
+        self.assertEqual(cached_f.cache_info(), CacheInfo(hits=1, misses=2, maxsize=2, currsize=2))
+
+    @patch('airquality.extra.decorator.time')
+    def test_call_function_again_when_value_is_expired(self, mocked_time):
+        mocked_time.monotonic.side_effect = [0.0, 5.0, 11.0, 11.0]
+        mocked_f, cached_f = _cached_function(ttl=10.0)
+        cached_f(1)
+        cached_f(1)
+        cached_f(1)
+        self.assertEqual(mocked_f.call_count, 2)
+        self.assertEqual(cached_f.cache_info().hits, 1)
+
+    def test_evict_least_recently_used_value(self):
+        mocked_f, cached_f = _cached_function(maxsize=2)
+        cached_f(1)
+        cached_f(2)
+        cached_f(1)
+        cached_f(3)
+        self.assertEqual(cached_f.cache_info().currsize, 2)
+        cached_f(1)
+        self.assertEqual(mocked_f.call_count, 3)
+        cached_f(2)
+        self.assertEqual(mocked_f.call_count, 4)
+
+    def test_explicit_invalidation(self):
+        mocked_f, cached_f = _cached_function()
+        cached_f(1)
+        cached_f(2)
+        cached_f.cache_invalidate(1)
+        cached_f(1)
+        cached_f(2)
+        self.assertEqual(mocked_f.call_count, 3)
+        cached_f.cache_clear()
+        self.assertEqual(cached_f.cache_info(), CacheInfo(hits=0, misses=0, maxsize=2, currsize=0))
+
+    def test_exceptions_are_not_cached(self):
+        mocked_f = MagicMock()
+        mocked_f.side_effect = [ValueError, 42]
+        mocked_f.__name__ = 'mocked_f'
+        cached_f = ttl_cache(ttl=10.0)(mocked_f)
+        with self.assertRaises(ValueError):
+            cached_f()
+        self.assertEqual(cached_f(), 42)
+        self.assertEqual(cached_f(), 42)
+        self.assertEqual(mocked_f.call_count, 2)
+
+    def test_cached_method_does_not_keep_the_instance_alive(self):
+        class _Owner(object):
+            def __init__(self, value):
+                self.value = value
+
+            @ttl_cache(ttl=10.0, method=True)
+            def query(self):
+                return self.value
+
+        first, second = _Owner(1), _Owner(2)
+        self.assertEqual(first.query(), 1)
+        self.assertEqual(second.query(), 2)
+        self.assertEqual(first.query(), 1)
+        self.assertEqual(_Owner.query.cache_info().hits, 1)
+        first_ref = weakref.ref(first)
+        del first
+        gc.collect()
+        self.assertIsNone(first_ref())
+
+
+if __name__ == '__main__':
+    main()
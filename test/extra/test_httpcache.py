@@ -0,0 +1,144 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-19, sab, 11:35
+# ======================================
+import json
+import os
+import time
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase, main
+from unittest.mock import MagicMock
+from airquality.extra.url import json_http_response
+from airquality.extra.httpcache import DiskResponseCache, normalize_url, is_historical_url
+
+
+def _test_now():
+    return datetime(2022, 2, 19, 12, 0, 0)
+
+
+def _mocked_response(status_code=200, body=None, headers=None) -> MagicMock:
+    mocked_r = MagicMock()
+    mocked_r.status_code = status_code
+    mocked_r.content = json.dumps(body).encode('utf-8')
+    mocked_r.headers = {} if headers is None else headers
+    return mocked_r
+
+
+class TestNormalizeUrl(TestCase):
+
+    def test_sort_params_and_redact_api_keys(self):
+        self.assertEqual(
+            normalize_url("https://API.thingspeak.com/channels/1/feeds.json?api_key=SECRET&start=a&end=b"),
+            "https://api.thingspeak.com/channels/1/feeds.json?api_key=%2A%2A%2A&end=b&start=a"
+        )
+
+    def test_historical_thingspeak_and_atmotube_urls(self):
+        self.assertTrue(is_historical_url("https://h/f?end=2022-02-18%2012:00:00", now=_test_now()))
+        self.assertFalse(is_historical_url("https://h/f?end=2022-02-19%2011:30:00", now=_test_now()))
+        self.assertTrue(is_historical_url("https://h/f?date=2022-02-18", now=_test_now()))
+        self.assertFalse(is_historical_url("https://h/f?date=2022-02-19", now=_test_now()))
+        self.assertFalse(is_historical_url("https://h/f?api_key=k", now=_test_now()))
+
+
+class TestIsHistoricalUrlInLocalTimezone(TestCase):
+
+    def setUp(self) -> None:
+        self._tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'Europe/Rome'
+        time.tzset()
+
+    def tearDown(self) -> None:
+        if self._tz is None:
+            del os.environ['TZ']
+        else:
+            os.environ['TZ'] = self._tz
+        time.tzset()
+
+    def test_compare_the_window_with_the_utc_time(self):
+        utcnow = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+        recent_end = (utcnow - timedelta(minutes=30)).strftime("%Y-%m-%d%%20%H:%M:%S")
+        future_end = (utcnow + timedelta(minutes=30)).strftime("%Y-%m-%d%%20%H:%M:%S")
+        past_end = (utcnow - timedelta(hours=2)).strftime("%Y-%m-%d%%20%H:%M:%S")
+        self.assertFalse(is_historical_url(f"https://h/f?end={recent_end}"))
+        self.assertFalse(is_historical_url(f"https://h/f?end={future_end}"))
+        self.assertTrue(is_historical_url(f"https://h/f?end={past_end}"))
+        self.assertFalse(is_historical_url(f"https://h/f?date={utcnow.strftime('%Y-%m-%d')}"))
+
+
+class TestDiskResponseCache(TestCase):
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def test_store_compressed_response_without_api_key(self):
+        cache = DiskResponseCache(cache_dir=self._tmpdir.name, fimmutable=lambda url: True)
+        cache.put(url="https://h/f?api_key=SECRET&date=2022-02-18", body={'data': [1, 2]})
+        entry = cache.get(url="https://h/f?date=2022-02-18&api_key=OTHER")
+        self.assertEqual(entry.body, {'data': [1, 2]})
+        self.assertEqual(len(cache), 1)
+        fname = os.listdir(self._tmpdir.name)[0]
+        self.assertTrue(fname.endswith('.json.gz'))
+        with open(os.path.join(self._tmpdir.name, fname), 'rb') as f:
+            self.assertNotIn(b'SECRET', f.read())
+
+    def test_do_not_store_mutable_response_without_validators(self):
+        cache = DiskResponseCache(cache_dir=self._tmpdir.name, fimmutable=lambda url: False)
+        cache.put(url="https://h/f", body={})
+        self.assertEqual(len(cache), 0)
+        cache.put(url="https://h/f", body={}, etag='"v1"')
+        self.assertEqual(cache.get(url="https://h/f").validators(), {'If-None-Match': '"v1"'})
+
+    def test_evict_least_recently_used_responses(self):
+        cache = DiskResponseCache(cache_dir=self._tmpdir.name, fimmutable=lambda url: True)
+        cache.put(url="https://h/1", body={'v': 'x' * 100})
+        cache.put(url="https://h/2", body={'v': 'y' * 100})
+        cache.get(url="https://h/1")
+        cache._max_bytes = cache.size - 1
+        cache.put(url="https://h/3", body={'v': 'z'})
+        self.assertIsNone(cache.get(url="https://h/2"))
+        self.assertIsNotNone(cache.get(url="https://h/1"))
+        self.assertLessEqual(cache.size, cache._max_bytes)
+
+    def test_reload_index_from_disk(self):
+        DiskResponseCache(cache_dir=self._tmpdir.name, fimmutable=lambda url: True).put(url="https://h/1", body={})
+        cache = DiskResponseCache(cache_dir=self._tmpdir.name)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get(url="https://h/1").body, {})
+
+
+class TestCachedURLReader(TestCase):
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._session = MagicMock()
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def test_serve_historical_window_from_cache(self):
+        cache = DiskResponseCache(cache_dir=self._tmpdir.name, fimmutable=lambda url: True)
+        self._session.get.return_value = _mocked_response(body={'feeds': []})
+        json_http_response(url="https://h/f?end=x", session=self._session, cache=cache)
+        actual = json_http_response(url="https://h/f?end=x", session=self._session, cache=cache)
+        self.assertEqual(actual, {'feeds': []})
+        self._session.get.assert_called_once()
+
+    def test_revalidate_mutable_response(self):
+        cache = DiskResponseCache(cache_dir=self._tmpdir.name, fimmutable=lambda url: False)
+        self._session.get.side_effect = [
+            _mocked_response(body={'feeds': [1]}, headers={'ETag': '"v1"'}),
+            _mocked_response(status_code=304)
+        ]
+        json_http_response(url="https://h/f", session=self._session, cache=cache)
+        actual = json_http_response(url="https://h/f", session=self._session, cache=cache)
+        self.assertEqual(actual, {'feeds': [1]})
+        self.assertEqual(self._session.get.call_args[1]['headers']['If-None-Match'], '"v1"')
+        self.assertEqual(cache.revalidated, 1)
+
+
+if __name__ == '__main__':
+    main()
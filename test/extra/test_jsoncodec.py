@@ -0,0 +1,63 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-25, ven, 10:10
+# ======================================
+import json
+import math
+from unittest import TestCase, main
+from unittest.mock import patch
+import test._test_utils as tutils
+from airquality.extra.jsoncodec import loads, configure_json_decoder, json_decoder_name, available_decoders
+
+
+class TestJsonCodec(TestCase):
+
+    def tearDown(self) -> None:
+        configure_json_decoder()
+
+    def test_stdlib_decoder(self):
+        self.assertEqual(configure_json_decoder(name='json'), 'json')
+        self.assertEqual(json_decoder_name(), 'json')
+        self.assertEqual(loads(b'{"a": [1, 2.5, null, true]}'), {'a': [1, 2.5, None, True]})
+        self.assertEqual(loads('{"a": "à"}'), {'a': 'à'})
+
+    def test_auto_selects_the_first_installed_decoder(self):
+        self.assertEqual(configure_json_decoder(name='auto'), next(iter(available_decoders())))
+        self.assertIn('json', available_decoders())
+
+    def test_raise_value_error_when_decoder_is_unknown(self):
+        with self.assertRaises(ValueError):
+            configure_json_decoder(name='simplejson')
+
+    @patch('airquality.extra.jsoncodec.importlib.import_module')
+    def test_raise_value_error_when_decoder_is_not_installed(self, mocked_import):
+        mocked_import.side_effect = ImportError
+        with self.assertRaises(ValueError):
+            configure_json_decoder(name='orjson')
+        self.assertEqual(list(available_decoders()), ['json'])
+
+    def test_all_decoders_return_the_same_structures(self):
+        for filename in ('thingspeak_response_1A.json', 'purpleair_response.json', 'openweather_data.json',
+                         'atmotube_response.json', 'weather_cities.json'):
+            content = tutils.get_json_content_from_file(filename=filename)
+            expected = json.loads(content)
+            for name, decoder in available_decoders().items():
+                self.assertEqual(decoder(content), expected, msg=f"{name} on {filename}")
+
+    @patch('airquality.extra.jsoncodec.importlib.import_module')
+    def test_fall_back_to_stdlib_when_the_decoder_rejects_the_document(self, mocked_import):
+        mocked_import.return_value.loads.side_effect = ValueError("NaN is not valid json")
+        configure_json_decoder(name='orjson')
+        self.assertEqual(loads(b'{"a": 123456789012345678901234567890}'), {'a': 123456789012345678901234567890})
+        self.assertTrue(math.isnan(loads(b'{"a": NaN}')['a']))
+        with self.assertRaises(ValueError):
+            loads(b'{"a": ')
+
+    def test_all_decoders_raise_value_error_on_malformed_document(self):
+        for decoder in available_decoders().values():
+            with self.assertRaises(ValueError):
+                decoder(b'{"a": ')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-20, dom, 17:10
+# ======================================
+import json
+from unittest import TestCase, main
+from airquality.extra.jsonstream import iter_json_members
+
+
+def _chunks_of(text: str, size: int):
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+
+def _test_document():
+    return {"api_version": "V1.0.10", "fields": ["sensor_index", "name"],
+            "data": [[1, "n1"], [2, "n2 \"quoted\""], [12345, "n3"]], "data_time_stamp": 1645370000}
+
+
+class TestIterJsonMembers(TestCase):
+
+    def test_yield_streamed_array_item_by_item(self):
+        text = json.dumps(_test_document())
+        for size in (1, 3, 7, len(text)):
+            self.assertEqual(
+                list(iter_json_members(chunks=_chunks_of(text, size))),
+                [("api_version", "V1.0.10"), ("fields", ["sensor_index", "name"]), ("data", [1, "n1"]),
+                 ("data", [2, "n2 \"quoted\""]), ("data", [12345, "n3"]), ("data_time_stamp", 1645370000)]
+            )
+
+    def test_do_not_split_number_across_chunks(self):
+        self.assertEqual(
+            list(iter_json_members(chunks=['{"data": [12', '34], "n": 5', '6}'])),
+            [("data", 1234), ("n", 56)]
+        )
+
+    def test_empty_object_and_array(self):
+        self.assertEqual(list(iter_json_members(chunks=['{ }'])), [])
+        self.assertEqual(list(iter_json_members(chunks=['{"data": []}'])), [])
+
+    def test_raise_value_error_when_document_is_truncated(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_members(chunks=['{"data": [[1, "n1"], [2, ']))
+
+    def test_raise_value_error_when_document_is_not_an_object(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_members(chunks=['[1, 2]']))
+
+
+if __name__ == '__main__':
+    main()
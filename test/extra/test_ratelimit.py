@@ -0,0 +1,86 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-18, ven, 10:12
+# ======================================
+from unittest import TestCase, main
+from airquality.datamodel.fromdb import OpenweathermapKeyDM
+from airquality.extra.ratelimit import TokenBucket, KeyScheduler
+
+
+class _FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+class TestTokenBucket(TestCase):
+
+    def test_take_and_refill_tokens(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(capacity=60, tokens=1, clock=clock)
+        self.assertTrue(bucket.try_take())
+        self.assertFalse(bucket.try_take())
+        self.assertAlmostEqual(bucket.wait_time(), 1.0)
+        clock.now = 1.0
+        self.assertTrue(bucket.try_take())
+
+    def test_tokens_do_not_exceed_capacity(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(capacity=10, tokens=5, clock=clock)
+        clock.now = 3600.0
+        self.assertEqual(bucket.tokens, 10)
+
+    def test_raise_value_error_when_capacity_is_not_positive(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(capacity=0, tokens=0)
+
+
+class TestKeyScheduler(TestCase):
+
+    def test_spread_requests_across_keys(self):
+        clock = _FakeClock()
+        keys = [OpenweathermapKeyDM(key='k1', n_done=0, n_max=2), OpenweathermapKeyDM(key='k2', n_done=0, n_max=2)]
+        scheduler = KeyScheduler(keys=keys, clock=clock, sleep=clock.sleep)
+        self.assertEqual(sorted(scheduler.acquire() for _ in range(4)), ['k1', 'k1', 'k2', 'k2'])
+        self.assertEqual(clock.now, 0.0)
+        self.assertEqual(scheduler.budget, 4)
+        self.assertEqual(scheduler.done_requests(), {'k1': 2, 'k2': 2})
+
+    def test_wait_when_all_budgets_are_exhausted(self):
+        clock = _FakeClock()
+        keys = [OpenweathermapKeyDM(key='k1', n_done=60, n_max=60)]
+        scheduler = KeyScheduler(keys=keys, clock=clock, sleep=clock.sleep)
+        self.assertEqual(scheduler.done_requests(), {'k1': 60})
+        self.assertEqual(scheduler.acquire(), 'k1')
+        self.assertAlmostEqual(clock.now, 1.0)
+
+    def test_forget_requests_older_than_one_minute(self):
+        clock = _FakeClock()
+        scheduler = KeyScheduler(keys=[OpenweathermapKeyDM(key='k1', n_done=3, n_max=60)], clock=clock)
+        scheduler.acquire()
+        clock.now = 30.0
+        scheduler.acquire()
+        clock.now = 61.0
+        self.assertEqual(scheduler.done_requests(), {'k1': 1})
+
+    def test_raise_value_error_when_keys_are_empty(self):
+        with self.assertRaises(ValueError):
+            KeyScheduler(keys=[])
+
+    def test_skip_keys_without_budget(self):
+        keys = [OpenweathermapKeyDM(key='k1', n_done=0, n_max=0), OpenweathermapKeyDM(key='k2', n_done=0, n_max=2)]
+        scheduler = KeyScheduler(keys=keys, clock=_FakeClock())
+        self.assertEqual(scheduler.budget, 2)
+        self.assertEqual(scheduler.acquire(), 'k2')
+        with self.assertRaises(ValueError):
+            KeyScheduler(keys=keys[:1])
+
+
+if __name__ == '__main__':
+    main()
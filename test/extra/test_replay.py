@@ -0,0 +1,61 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-24, gio, 11:20
+# ======================================
+from unittest import TestCase, main
+import requests
+from airquality.extra.url import json_http_response
+from airquality.extra.replay import ReplayServer, ReplayConfig
+from airquality.iterables.fromapi import PurpleairIterableDatamodels, ThingspeakIterableDatamodels, \
+    AtmotubeIterableDatamodels
+
+
+class TestReplayServer(TestCase):
+
+    def setUp(self) -> None:
+        self._server = ReplayServer(address=('127.0.0.1', 0), config=ReplayConfig(feed_interval=60, sensors=5))
+        self._server.start()
+
+    def tearDown(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def test_synthesize_thingspeak_feeds_for_any_range(self):
+        url = f"{self._server.url}/channels/42/feeds.json?api_key=k" \
+              f"&start=2021-12-20%2011:00:30&end=2021-12-20%2012:00:00"
+        json_response = json_http_response(url=url)
+        datamodels = ThingspeakIterableDatamodels(json_response=json_response)
+        self.assertEqual(len(datamodels), 60)
+        self.assertEqual(json_response['feeds'][0]['created_at'], '2021-12-20T11:01:00Z')
+        self.assertEqual(json_response, json_http_response(url=url))
+
+    def test_thingspeak_feeds_are_capped(self):
+        self._server.config.max_entries = 10
+        url = f"{self._server.url}/channels/42/feeds.json?start=2021-12-20%2000:00:00&end=2021-12-21%2000:00:00"
+        feeds = json_http_response(url=url)['feeds']
+        self.assertEqual(len(feeds), 10)
+        self.assertEqual(feeds[-1]['created_at'], '2021-12-21T00:00:00Z')
+
+    def test_synthesize_atmotube_day(self):
+        url = f"{self._server.url}/api/v1/data?api_key=k&mac=aa:bb&order=asc&format=json&date=2021-08-10"
+        datamodels = AtmotubeIterableDatamodels(json_response=json_http_response(url=url))
+        self.assertEqual(len(datamodels), 1440)
+
+    def test_serve_purpleair_sensor_list(self):
+        datamodels = PurpleairIterableDatamodels(json_response=json_http_response(url=f"{self._server.url}/v1/sensors"))
+        self.assertEqual(len(datamodels), 5)
+        self.assertEqual(datamodels[4].sensor_index, 5)
+
+    def test_inject_errors(self):
+        self._server.config.error_rate = 1.0
+        http_response = requests.get(f"{self._server.url}/v1/sensors")
+        self.assertEqual(http_response.status_code, 503)
+        self.assertEqual(self._server.errors, 1)
+
+    def test_unknown_path_and_bad_parameters(self):
+        self.assertEqual(requests.get(f"{self._server.url}/unknown").status_code, 404)
+        self.assertEqual(requests.get(f"{self._server.url}/channels/1/feeds.json").status_code, 400)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-21, lun, 10:35
+# ======================================
+import threading
+from unittest import TestCase, main
+from airquality.extra.resilience import RetryPolicy, CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError
+
+
+class _FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRetryPolicy(TestCase):
+
+    def test_exponential_backoff_with_full_jitter(self):
+        policy = RetryPolicy(backoff_base=0.5, backoff_max=3.0, rand=lambda: 0.5)
+        self.assertEqual([policy.delay(attempt) for attempt in range(4)], [0.25, 0.5, 1.0, 1.5])
+
+    def test_retry_after_seconds_overrides_backoff(self):
+        policy = RetryPolicy(retry_after_max=10.0, rand=lambda: 0.5)
+        self.assertEqual(policy.delay(0, retry_after='4'), 4.0)
+        self.assertEqual(policy.delay(0, retry_after='3600'), 10.0)
+
+    def test_retry_after_http_date_in_the_past(self):
+        policy = RetryPolicy(rand=lambda: 0.5)
+        self.assertEqual(policy.delay(0, retry_after='Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+    def test_ignore_malformed_retry_after(self):
+        policy = RetryPolicy(backoff_base=1.0, rand=lambda: 1.0)
+        self.assertEqual(policy.delay(1, retry_after='soon'), 2.0)
+
+
+class TestCircuitBreaker(TestCase):
+
+    def test_open_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=_FakeClock())
+        breaker.record_failure()
+        breaker.allow()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+
+    def test_success_resets_the_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2, clock=_FakeClock())
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_half_open_lets_a_single_trial_through(self):
+        clock = _FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0, clock=clock)
+        breaker.record_failure()
+        clock.now = 30.0
+        breaker.allow()
+        self.assertEqual(breaker.state, 'half-open')
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+        breaker.allow()
+
+    def test_released_trial_lets_the_next_request_through(self):
+        clock = _FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0, clock=clock)
+        breaker.record_failure()
+        clock.now = 30.0
+        breaker.allow()
+        breaker.release()
+        self.assertEqual(breaker.state, 'half-open')
+        breaker.allow()
+
+    def test_failed_trial_opens_the_circuit_again(self):
+        clock = _FakeClock()
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30.0, clock=clock)
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now = 45.0
+        breaker.allow()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+        clock.now = 60.0
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+
+    def test_concurrent_callers_get_a_single_trial(self):
+        clock = _FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=1.0, clock=clock)
+        breaker.record_failure()
+        clock.now = 1.0
+        allowed = []
+
+        def call():
+            try:
+                breaker.allow()
+                allowed.append(True)
+            except CircuitOpenError:
+                pass
+
+        threads = [threading.Thread(target=call) for _ in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(allowed), 1)
+
+
+class TestCircuitBreakerRegistry(TestCase):
+
+    def test_one_breaker_per_host(self):
+        registry = CircuitBreakerRegistry(failure_threshold=1)
+        registry.breaker_of('api.thingspeak.com').record_failure()
+        self.assertIs(registry.breaker_of('api.thingspeak.com'), registry.breaker_of('api.thingspeak.com'))
+        self.assertEqual(registry.breaker_of('api.thingspeak.com').state, 'open')
+        self.assertEqual(registry.breaker_of('api.atmotube.com').state, 'closed')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-23, mer, 10:30
+# ======================================
+import os
+import gzip
+import json
+import tempfile
+from unittest import TestCase, main
+from unittest.mock import patch
+from airquality.extra.snapshot import SnapshotStore, purpleair_datamodels
+
+
+class _FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSnapshotStore(TestCase):
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._tmpdir.name, 'purpleair.json.gz')
+        self._clock = _FakeClock()
+        self._store = SnapshotStore(path=self._path, max_age=60.0, clock=self._clock)
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def test_read_fresh_snapshot(self):
+        self.assertFalse(self._store.is_fresh())
+        self.assertEqual(self._store.save(fields=['name', 'sensor_index'], rows=iter([['n1', 1], ['n2', 2]])), 2)
+        self._clock.now += 60.0
+        self.assertTrue(self._store.is_fresh())
+        self.assertEqual(self._store.age(), 60.0)
+        self.assertEqual(
+            list(self._store.members()),
+            [('fields', ['name', 'sensor_index']), ('data', ['n1', 1]), ('data', ['n2', 2])]
+        )
+
+    def test_stale_snapshot_is_not_fresh(self):
+        self._store.save(fields=['name'], rows=[['n1']])
+        self._clock.now += 61.0
+        self.assertFalse(self._store.is_fresh())
+
+    def test_discard_corrupted_snapshot(self):
+        with open(self._path, 'wb') as f:
+            f.write(b'not a gzip file')
+        self.assertFalse(self._store.is_fresh())
+        self.assertIsNone(self._store.age())
+
+    def test_discard_snapshot_of_another_format(self):
+        with gzip.open(self._path, 'wt', encoding='utf-8') as f:
+            json.dump({'taken_at': self._clock(), 'fields': ['name'], 'data': [['n1']]}, f)
+        self.assertFalse(self._store.is_fresh())
+
+    def test_keep_previous_snapshot_when_rows_fail(self):
+        self._store.save(fields=['name'], rows=[['n1']])
+
+        def failing_rows():
+            yield ['n2']
+            raise ValueError("broken stream")
+
+        with self.assertRaises(ValueError):
+            self._store.save(fields=['name'], rows=failing_rows())
+        self.assertEqual(list(self._store.members()), [('fields', ['name']), ('data', ['n1'])])
+        self.assertEqual(os.listdir(self._tmpdir.name), ['purpleair.json.gz'])
+
+    def test_locked_snapshot(self):
+        with self._store.locked() as store:
+            store.save(fields=['name'], rows=[])
+        self.assertTrue(os.path.exists(f"{self._path}.lock"))
+        self.assertEqual(list(self._store.members()), [('fields', ['name'])])
+
+
+@patch('airquality.extra.snapshot.json_http_stream')
+class TestPurpleairDatamodels(TestCase):
+
+    def test_stream_sensors_into_the_snapshot(self, mocked_stream):
+        fields = ['sensor_index', 'name', 'latitude', 'longitude', 'primary_id_a', 'primary_key_a', 'primary_id_b',
+                  'primary_key_b', 'secondary_id_a', 'secondary_key_a', 'secondary_id_b', 'secondary_key_b',
+                  'date_created']
+        rows = [[i, f'n{i}', 45.0, 9.0, 1, 'k', 2, 'k', 3, 'k', 4, 'k', 1531432748] for i in range(3)]
+        mocked_stream.return_value = iter([('fields', fields)] + [('data', row) for row in rows])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            snapshot = SnapshotStore(path=os.path.join(tmpdir, 'purpleair.json.gz'), max_age=60.0)
+            first = [dm.name for dm in purpleair_datamodels(url='fake_url', streaming=True, snapshot=snapshot)]
+            second = [dm.name for dm in purpleair_datamodels(url='fake_url', streaming=True, snapshot=snapshot)]
+        self.assertEqual(first, ['n0', 'n1', 'n2'])
+        self.assertEqual(second, first)
+        mocked_stream.assert_called_once_with(url='fake_url')
+
+
+if __name__ == '__main__':
+    main()
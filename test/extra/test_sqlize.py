@@ -5,7 +5,7 @@
 from datetime import datetime
 import test._test_utils as tutils
 from unittest import TestCase, main
-from airquality.extra.sqlize import sqlize_iterable, sqlize_obj
+from airquality.extra.sqlize import sqlize_iterable, sqlize_obj, copyize_iterable, chunked_query
 
 
 def _timezone_info():
@@ -97,5 +97,42 @@ class TestSqlizeIterable(TestCase):
         self.assertEqual(actual, "(12, 33,'n1','t1',hi)")
 
 
+class TestCopyizeIterable(TestCase):
+
+    def test_copyize_tuple(self):
+        self.assertEqual(
+            copyize_iterable(_iterable()),
+            "1\t\\N\t2022-01-24 10:37:00-05:00\tHello\n"
+        )
+
+    def test_copyize_escape_special_characters(self):
+        self.assertEqual(
+            copyize_iterable(('a\tb', 'c\nd', 'e\\f')),
+            "a\\tb\tc\\nd\te\\\\f\n"
+        )
+
+
+class TestChunkedQuery(TestCase):
+
+    def test_split_records_by_number_of_rows(self):
+        self.assertEqual(
+            list(chunked_query(template="INSERT {val};", records=['(1)', '(2)', '(3)'], max_rows=2)),
+            ["INSERT (1),(2);", "INSERT (3);"]
+        )
+
+    def test_split_records_by_size(self):
+        self.assertEqual(
+            list(chunked_query(template="INSERT {val};", records=['(1)', '(22)', '(333)'], max_bytes=8)),
+            ["INSERT (1),(22);", "INSERT (333);"]
+        )
+
+    def test_empty_records(self):
+        self.assertEqual(list(chunked_query(template="INSERT {val};", records=[])), [])
+
+    def test_raise_value_error_when_chunk_size_is_not_positive(self):
+        with self.assertRaises(ValueError):
+            list(chunked_query(template="INSERT {val};", records=['(1)'], max_rows=0))
+
+
 if __name__ == '__main__':
     main()
@@ -3,7 +3,7 @@
 # @date:    2022-01-19, mer, 14:27
 # ======================================
 from dateutil import tz
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest import TestCase, main
 from unittest.mock import patch, MagicMock
 import airquality.extra.timest as timest
@@ -118,5 +118,90 @@ class TestTimestUtilityFunctions(TestCase):
         )
 
 
+class TestTimestampParser(TestCase):
+
+    def test_parse_fixed_format_like_strptime(self):
+        for fmt, utctime in [("%Y-%m-%dT%H:%M:%SZ", '2021-12-08T00:00:00Z'),
+                             ("%Y-%m-%dT%H:%M:%S.%fZ", '2021-08-08T00:00:00.125Z'),
+                             ("%Y-%m-%dT%H:%M:%SZ", '2021-1-8T00:00:00Z'),
+                             ("%Y-%m-%d %H:%M:%S", '2021-08-08 10:00:00')]:
+            self.assertEqual(
+                timest.TimestampParser(fmt=fmt).utc(utctime),
+                timest.make_timezone_aware_UTC(utctime=utctime, fmt=fmt)
+            )
+
+    def test_raise_same_errors_of_strptime(self):
+        parser = timest.TimestampParser(fmt="%Y-%m-%dT%H:%M:%SZ")
+        with self.assertRaises(ValueError):
+            parser.utc('2021-13-08T00:00:00Z')
+        with self.assertRaises(TypeError):
+            parser.utc(1531432748)
+
+    def test_localize_across_dst_transitions_like_astimezone(self):
+        fmt = "%Y-%m-%dT%H:%M:%SZ"
+        parser = timest.TimestampParser(fmt=fmt)
+        for begin in [datetime(2021, 3, 27, 23), datetime(2021, 10, 30, 23)]:
+            for minutes in range(0, 240, 7):
+                utctime = (begin + timedelta(minutes=minutes)).strftime(fmt)
+                expected = timest.make_timezone_aware_FROM_LOCAL(utctime=utctime, fmt=fmt)
+                actual = parser.from_local(utctime=utctime)
+                self.assertEqual(str(actual), str(expected))
+                self.assertEqual(actual.fold, expected.fold)
+                self.assertIs(actual.tzinfo, expected.tzinfo)
+
+
+class TestTimezoneCache(TestCase):
+
+    def tearDown(self) -> None:
+        timest.configure_timezone_cache()
+
+    @patch('airquality.extra.timest._TIMEZONE_FINDER')
+    def test_coordinates_in_the_same_cell_share_a_single_lookup(self, mocked_finder):
+        mocked_finder.timezone_at.return_value = 'Europe/Rome'
+        timest.configure_timezone_cache(grid=0.01, maxsize=16)
+        for lat, lng in [(45.1686197, 9.1561581), (45.1711, 9.1589), (45.1686197, 9.1561581)]:
+            self.assertEqual(
+                timest.make_timezone_aware_FROM_COORDS(utctime=1642859435, latitude=lat, longitude=lng),
+                datetime(2022, 1, 22, 14, 50, 35, tzinfo=_rome_timezone())
+            )
+        mocked_finder.timezone_at.assert_called_once_with(lng=9.16, lat=45.17)
+        stats = timest.timezone_cache_stats()
+        self.assertEqual(stats.coords_misses, 1)
+        self.assertEqual(stats.coords_hits, 2)
+        self.assertAlmostEqual(stats.coords_hit_rate, 2 / 3)
+
+    @patch('airquality.extra.timest._TIMEZONE_FINDER')
+    def test_local_timezone_is_looked_up_once(self, mocked_finder):
+        mocked_finder.timezone_at.return_value = 'Europe/Rome'
+        timest.configure_timezone_cache()
+        for _ in range(5):
+            timest.make_timezone_aware_FROM_LOCAL(utctime=1642859435)
+        mocked_finder.timezone_at.assert_called_once()
+        self.assertEqual(timest.timezone_cache_stats().coords_hits, 4)
+
+    @patch('airquality.extra.timest._TIMEZONE_FINDER')
+    def test_zero_grid_disables_the_rounding(self, mocked_finder):
+        mocked_finder.timezone_at.return_value = 'Europe/Rome'
+        timest.configure_timezone_cache(grid=0)
+        timest.make_timezone_aware_FROM_COORDS(utctime=1642859435, latitude=45.1686197, longitude=9.1561581)
+        timest.make_timezone_aware_FROM_COORDS(utctime=1642859435, latitude=45.1711, longitude=9.1589)
+        self.assertEqual(mocked_finder.timezone_at.call_count, 2)
+        mocked_finder.timezone_at.assert_called_with(lng=9.1589, lat=45.1711)
+
+    @patch('airquality.extra.timest._TIMEZONE_FINDER', None)
+    def test_timezone_finder_is_built_once_on_first_use(self):
+        with patch('timezonefinder.TimezoneFinderL') as mocked_cls:
+            mocked_cls.return_value.timezone_at.return_value = 'Europe/Rome'
+            timest.configure_timezone_cache()
+            timest.make_timezone_aware_FROM_COORDS(utctime=1642859435, latitude=45.17, longitude=9.16)
+            timest.make_timezone_aware_FROM_COORDS(utctime=1642859435, latitude=40.71, longitude=-74.01)
+            self.assertIs(timest.warm_up_timezone_finder(), mocked_cls.return_value)
+        mocked_cls.assert_called_once_with(in_memory=False)
+
+    def test_raise_value_error_when_grid_is_negative(self):
+        with self.assertRaises(ValueError):
+            timest.configure_timezone_cache(grid=-1)
+
+
 if __name__ == '__main__':
     main()
@@ -2,10 +2,16 @@
 # @author:  Davide Colombo
 # @date:    2022-01-18, mar, 20:09
 # ======================================
+import json
+import time
+import threading
 from unittest import TestCase, main
 from unittest.mock import patch, MagicMock
 import requests
-from airquality.extra.url import json_http_response
+from airquality.extra.url import json_http_response, configure_http_session, http_session, \
+    http_connection_stats, close_http_session, HttpConnectionStats, json_http_responses, json_http_stream, \
+    configure_http_resilience
+from airquality.extra.resilience import CircuitOpenError
 
 
 def _test_status_code():
@@ -18,9 +24,8 @@ def _test_json_response():
 
 def _mocked_json_response() -> MagicMock:
     mocked_response = MagicMock()
-    mocked_response.content = _test_json_response()
     mocked_response.status_code = _test_status_code()
-    mocked_response.json.return_value = {"p1": "a1", "p2": "a2"}
+    mocked_response.content = json.dumps({"p1": "a1", "p2": "a2"}).encode('utf-8')
     return mocked_response
 
 
@@ -41,7 +46,7 @@ def _mocked_not_content_response() -> MagicMock:
 class TestURLReader(TestCase):
 
 # =========== TEST METHODS
-    @patch('airquality.extra.url.requests.get')
+    @patch('airquality.extra.url.requests.Session.get')
     def test_successfully_get_response_from_server(self, mocked_get):
         mocked_get.return_value = _mocked_json_response()
         actual_jresp = json_http_response(url='fake url')
@@ -50,18 +55,185 @@ class TestURLReader(TestCase):
             {"p1": "a1", "p2": "a2"}
         )
 
-    @patch('airquality.extra.url.requests.get')
+    @patch('airquality.extra.url.requests.Session.get')
     def test_raise_bad_api_server_response_error(self, mocked_get):
         mocked_get.return_value = _mocked_http_bad_response()
         with self.assertRaises(requests.HTTPError):
             json_http_response(url='fake url')
 
-    @patch('airquality.extra.url.requests.get')
+    @patch('airquality.extra.url.requests.Session.get')
     def test_value_error_when_response_has_not_content(self, mocked_get):
         mocked_get.return_value = _mocked_not_content_response()
         with self.assertRaises(ValueError):
             json_http_response(url='fake_url')
 
+    @patch('airquality.extra.url.requests.Session.get')
+    def test_keep_alive_request_through_shared_session(self, mocked_get):
+        mocked_get.return_value = _mocked_json_response()
+        json_http_response(url='fake url')
+        mocked_get.assert_called_once_with(
+            url='fake url', timeout=30.0, headers={'Connection': 'keep-alive', 'Accept-Encoding': 'gzip, deflate'}
+        )
+
+    def test_decode_compressed_response_while_downloading(self):
+        mocked_r = MagicMock()
+        mocked_r.status_code = 200
+        mocked_r.encoding = None
+        accented = '\u00e8'.encode('utf-8')
+        mocked_r.iter_content.return_value = iter(
+            [b'{"fields": ["a"], "da', b'ta": [[1], ["', accented[:1], accented[1:] + b'"]]}']
+        )
+        mocked_session = MagicMock()
+        mocked_session.get.return_value = mocked_r
+        actual = list(json_http_stream(url='fake url', session=mocked_session))
+        self.assertEqual(actual, [('fields', ['a']), ('data', [1]), ('data', ['\u00e8'])])
+        self.assertTrue(mocked_session.get.call_args[1]['stream'])
+        mocked_r.close.assert_called_once()
+
+
+class TestHttpSession(TestCase):
+
+    def tearDown(self) -> None:
+        close_http_session()
+
+    def test_configure_pool_size_of_shared_session(self):
+        session = configure_http_session(pool_connections=2, pool_maxsize=16)
+        self.assertIs(http_session(), session)
+        adapter = session.get_adapter('https://api.thingspeak.com')
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 16)
+        self.assertTrue(adapter._pool_block)
+
+    def test_replace_and_close_previous_session(self):
+        old_session = configure_http_session()
+        with patch.object(old_session, 'close') as mocked_close:
+            new_session = configure_http_session()
+            mocked_close.assert_called_once()
+        self.assertIsNot(old_session, new_session)
+
+    def test_connection_reuse_counters(self):
+        session = configure_http_session()
+        pool = session.get_adapter('https://fakehost').poolmanager.connection_from_url('https://fakehost')
+        pool.num_requests = 5
+        pool.num_connections = 2
+        self.assertEqual(http_connection_stats(), HttpConnectionStats(requests=5, connections=2, reused=3))
+
+    def test_empty_counters_without_session(self):
+        close_http_session()
+        self.assertEqual(http_connection_stats(), HttpConnectionStats(requests=0, connections=0, reused=0))
+
+
+class TestConcurrentURLReader(TestCase):
+
+    def _fake_get(self, url, timeout, headers):
+        with self._lock:
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        time.sleep(0.05 if url == 'url0' else 0.01)
+        with self._lock:
+            self._in_flight -= 1
+        if url == 'bad url':
+            return _mocked_http_bad_response()
+        mocked_r = MagicMock()
+        mocked_r.status_code = 200
+        mocked_r.content = json.dumps({'url': url}).encode('utf-8')
+        return mocked_r
+
+    def setUp(self) -> None:
+        self._lock = threading.Lock()
+        self._in_flight = self._peak_in_flight = 0
+        self._session = MagicMock()
+        self._session.get.side_effect = self._fake_get
+
+    def test_yield_responses_in_url_order(self):
+        urls = [f"url{i}" for i in range(6)]
+        actual = list(json_http_responses(urls=iter(urls), max_workers=3, session=self._session))
+        self.assertEqual(actual, [{'url': url} for url in urls])
+        self.assertLessEqual(self._peak_in_flight, 3)
+        self.assertGreater(self._peak_in_flight, 1)
+
+    def test_one_request_at_a_time_by_default(self):
+        actual = list(json_http_responses(urls=['url0', 'url1'], session=self._session))
+        self.assertEqual(actual, [{'url': 'url0'}, {'url': 'url1'}])
+        self.assertEqual(self._peak_in_flight, 1)
+
+    def test_raise_error_when_failing_response_is_reached(self):
+        responses = json_http_responses(urls=['url0', 'bad url', 'url2'], max_workers=2, session=self._session)
+        self.assertEqual(next(responses), {'url': 'url0'})
+        with self.assertRaises(requests.HTTPError):
+            next(responses)
+
+
+def _mocked_status_response(status_code: int, headers=None) -> MagicMock:
+    mocked_r = MagicMock()
+    mocked_r.status_code = status_code
+    mocked_r.headers = headers or {}
+    mocked_r.raise_for_status.side_effect = [requests.HTTPError]
+    return mocked_r
+
+
+@patch('airquality.extra.url.time.sleep')
+@patch('airquality.extra.url.requests.Session.get')
+class TestResilientURLReader(TestCase):
+
+    def setUp(self):
+        configure_http_resilience(max_retries=2, backoff_base=0.5, backoff_max=30.0, failure_threshold=3,
+                                  reset_timeout=60.0)
+
+    def tearDown(self):
+        configure_http_resilience()
+
+    def test_retry_transient_server_error(self, mocked_get, mocked_sleep):
+        mocked_get.side_effect = [_mocked_status_response(503), _mocked_json_response()]
+        self.assertEqual(json_http_response(url='https://api.thingspeak.com/feeds'), {"p1": "a1", "p2": "a2"})
+        self.assertEqual(mocked_get.call_count, 2)
+        self.assertEqual(mocked_sleep.call_count, 1)
+
+    def test_retry_timeout_and_connection_error(self, mocked_get, mocked_sleep):
+        mocked_get.side_effect = [requests.Timeout, requests.ConnectionError, _mocked_json_response()]
+        self.assertEqual(json_http_response(url='https://api.thingspeak.com/feeds'), {"p1": "a1", "p2": "a2"})
+        self.assertEqual(mocked_sleep.call_count, 2)
+
+    def test_honor_retry_after_header(self, mocked_get, mocked_sleep):
+        mocked_get.side_effect = [_mocked_status_response(429, headers={'Retry-After': '7'}), _mocked_json_response()]
+        json_http_response(url='https://api.openweathermap.org/onecall')
+        mocked_sleep.assert_called_once_with(7.0)
+
+    def test_raise_error_when_retries_are_exhausted(self, mocked_get, mocked_sleep):
+        mocked_get.side_effect = [_mocked_status_response(502) for _ in range(3)]
+        with self.assertRaises(requests.HTTPError):
+            json_http_response(url='https://api.thingspeak.com/feeds')
+        self.assertEqual(mocked_get.call_count, 3)
+
+    def test_do_not_retry_client_error(self, mocked_get, mocked_sleep):
+        mocked_get.return_value = _mocked_http_bad_response()
+        with self.assertRaises(requests.HTTPError):
+            json_http_response(url='https://api.thingspeak.com/feeds')
+        self.assertEqual(mocked_get.call_count, 1)
+        mocked_sleep.assert_not_called()
+
+    def test_fail_fast_when_circuit_is_open(self, mocked_get, mocked_sleep):
+        mocked_get.side_effect = requests.ConnectionError
+        with self.assertRaises(requests.ConnectionError):
+            json_http_response(url='https://api.thingspeak.com/feeds?window=1')
+        self.assertEqual(mocked_get.call_count, 3)
+        with self.assertRaises(CircuitOpenError):
+            json_http_response(url='https://api.thingspeak.com/feeds?window=2')
+        self.assertEqual(mocked_get.call_count, 3)
+        mocked_get.side_effect = None
+        mocked_get.return_value = _mocked_json_response()
+        self.assertEqual(json_http_response(url='https://api.atmotube.com/data'), {"p1": "a1", "p2": "a2"})
+
+    def test_rate_limited_trial_does_not_keep_the_circuit_open(self, mocked_get, mocked_sleep):
+        configure_http_resilience(max_retries=0, failure_threshold=1, reset_timeout=0.0)
+        mocked_get.side_effect = [_mocked_status_response(503), _mocked_status_response(429), _mocked_json_response()]
+        with self.assertRaises(requests.HTTPError):
+            json_http_response(url='https://api.thingspeak.com/feeds?window=1')
+        with self.assertRaises(requests.HTTPError):
+            json_http_response(url='https://api.thingspeak.com/feeds?window=2')
+        self.assertEqual(json_http_response(url='https://api.thingspeak.com/feeds?window=3'), {"p1": "a1", "p2": "a2"})
+        self.assertEqual(mocked_get.call_count, 3)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,79 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-22, mar, 10:05
+# ======================================
+import os
+import tempfile
+from datetime import datetime, timedelta
+from unittest import TestCase, main
+from airquality.extra.window import WindowPlanner, DensityFile
+
+
+class TestWindowPlanner(TestCase):
+
+    def setUp(self) -> None:
+        self._begin = datetime(2022, 1, 1)
+
+    def test_default_window_until_density_is_known(self):
+        planner = WindowPlanner(default_window=timedelta(days=7))
+        self.assertEqual(planner.window_size(), timedelta(days=7))
+
+    def test_window_size_follows_density(self):
+        planner = WindowPlanner(density=1000.0, max_entries=8000, fill_ratio=0.5)
+        self.assertEqual(planner.window_size(), timedelta(days=4))
+        planner = WindowPlanner(density=0.0, max_window=timedelta(days=31))
+        self.assertEqual(planner.window_size(), timedelta(days=31))
+        planner = WindowPlanner(density=1e9, min_window=timedelta(hours=1))
+        self.assertEqual(planner.window_size(), timedelta(hours=1))
+
+    def test_fixed_window_when_not_adaptive(self):
+        planner = WindowPlanner(density=1000.0, default_window=timedelta(days=7), adaptive=False)
+        self.assertEqual(planner.window_size(), timedelta(days=7))
+
+    def test_observe_updates_the_moving_average(self):
+        planner = WindowPlanner(smoothing=0.5)
+        planner.observe(begin=self._begin, until=self._begin + timedelta(days=2), n_entries=200)
+        self.assertEqual(planner.density, 100.0)
+        planner.observe(begin=self._begin, until=self._begin + timedelta(days=1), n_entries=300)
+        self.assertEqual(planner.density, 200.0)
+
+    def test_truncated_response_raises_the_density(self):
+        planner = WindowPlanner(density=10.0, max_entries=8000)
+        self.assertTrue(planner.is_truncated(8000))
+        planner.observe(begin=self._begin, until=self._begin + timedelta(days=8), n_entries=8000)
+        self.assertEqual(planner.density, 2000.0)
+
+    def test_split_window_in_halves(self):
+        planner = WindowPlanner(min_window=timedelta(hours=1))
+        until = self._begin + timedelta(days=1)
+        self.assertEqual(
+            planner.split(begin=self._begin, until=until),
+            ((self._begin, self._begin + timedelta(hours=12)), (self._begin + timedelta(hours=12), until))
+        )
+        self.assertIsNone(planner.split(begin=self._begin, until=self._begin + timedelta(hours=1)))
+
+
+class TestDensityFile(TestCase):
+
+    def test_densities_survive_between_runs(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'density.json')
+            densities = DensityFile(path=path)
+            self.assertIsNone(densities.density_of('99:1A'))
+            densities.update(channel='99:1A', density=1440.0)
+            densities.update(channel='99:1B', density=None)
+            densities.save()
+            reloaded = DensityFile(path=path)
+            self.assertEqual(reloaded.density_of('99:1A'), 1440.0)
+            self.assertEqual(len(reloaded), 1)
+
+    def test_discard_corrupted_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'density.json')
+            with open(path, 'w') as f:
+                f.write('{not json')
+            self.assertEqual(len(DensityFile(path=path)), 0)
+
+
+if __name__ == '__main__':
+    main()
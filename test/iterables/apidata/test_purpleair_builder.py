@@ -4,7 +4,7 @@
 # ======================================
 import test._test_utils as tutils
 from unittest import TestCase, main
-from airquality.iterables.fromapi import PurpleairIterableDatamodels
+from airquality.iterables.fromapi import PurpleairIterableDatamodels, PurpleairStreamIterableDatamodels
 
 
 def _test_purpleair_api_json_response():
@@ -28,6 +28,16 @@ class TestPurpleairAPIDataBuilder(TestCase):
         self._assert_index_error(index=3)
         self._assert_index_error(index=-4)
 
+    def test_create_purpleair_datamodel_from_stream(self):
+        jresp = _test_purpleair_api_json_response()
+        members = [('data', row) for row in jresp['data']] + [('fields', jresp['fields'])]
+        datamodels = PurpleairStreamIterableDatamodels(members=iter(members))
+        self.assertEqual([dm.name for dm in datamodels], ["n1", "n2", "n3"])
+        with self.assertRaises(ValueError):
+            list(datamodels)
+        with self.assertRaises(ValueError):
+            len(datamodels)
+
 # =========== SUPPORT METHODS
     def _assert_index_error(self, index):
         with self.assertRaises(IndexError):
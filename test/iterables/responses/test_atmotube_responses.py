@@ -76,6 +76,18 @@ def _test_sensor_api_param_datamodel():
     )
 
 
+def _expected_copy_rows():
+    geom = "SRID=4326;POINT(9.145 45.876)"
+    ts = "2021-12-29 19:33:00+01:00"
+    return f"12399\t66\t0.17\t{ts}\t{geom}\n" \
+           f"12399\t48\t8\t{ts}\t{geom}\n" \
+           f"12399\t94\t10\t{ts}\t{geom}\n" \
+           f"12399\t2\t11\t{ts}\t{geom}\n" \
+           f"12399\t4\t29\t{ts}\t{geom}\n" \
+           f"12399\t12\t42\t{ts}\t{geom}\n" \
+           f"12399\t39\t1004.68\t{ts}\t{geom}\n"
+
+
 class TestAddAtmotubeMeasuresResponseBuilder(TestCase):
 
 # =========== SETUP METHOD
@@ -93,6 +105,16 @@ class TestAddAtmotubeMeasuresResponseBuilder(TestCase):
             _expected_measure_record()
         )
 
+    def test_copy_buffer_of_mobile_measures(self):
+        self.assertEqual(
+            self._response_builder.copy_buffer().read(),
+            _expected_copy_rows()
+        )
+        self.assertEqual(
+            self._response_builder.COPY_COLUMNS,
+            ('packet_id', 'param_id', 'param_value', 'timestamp', 'geom')
+        )
+
 
 if __name__ == '__main__':
     main()
@@ -122,6 +122,17 @@ class TestAddOpenweathermapDataResponseBuilder(TestCase):
         )
         self._assert_response()
 
+    def test_replace_forecasts_of_the_geoarea(self):
+        responses = WeatherDataIterableResponses(requests=_mocked_request_builder(), geoarea_id=14400, replace=True)
+        query = responses.query()
+        self.assertIn(
+            "DELETE FROM level0_raw.hourly_forecast WHERE geoarea_id = 14400;" +
+            WeatherDataIterableResponses.HOURLY_FORECAST_QUERY.format(val=_expected_hourly_forecast_record()),
+            query
+        )
+        self.assertIn("DELETE FROM level0_raw.daily_forecast WHERE geoarea_id = 14400;", query)
+        self.assertNotIn("staging", query)
+
 # =========== SUPPORT METHOD
     def _assert_response(self):
         resp = self._response_builder[0]
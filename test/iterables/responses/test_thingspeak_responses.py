@@ -37,6 +37,14 @@ def _expected_measure_record():
            f"(140, 99, 16, 60, '{ts}')"
 
 
+def _expected_copy_rows():
+    ts = '2021-12-20 12:18:40+01:00'
+    return f"140\t99\t12\t20.5\t{ts}\n" \
+           f"140\t99\t14\t37.43\t{ts}\n" \
+           f"140\t99\t15\t55\t{ts}\n" \
+           f"140\t99\t16\t60\t{ts}\n"
+
+
 def _test_sensor_api_param_datamodel():
     return SensorApiParamDM(
         sid=99,
@@ -68,6 +76,58 @@ class TestAddThingspeakMeasureResponseBuilder(TestCase):
             _expected_measure_record()
         )
 
+    def test_copy_buffer_of_station_measures(self):
+        self.assertEqual(
+            self._response_builder.copy_buffer().read(),
+            _expected_copy_rows()
+        )
+        self.assertEqual(
+            self._response_builder.COPY_TABLE,
+            "level0_raw.station_measurement"
+        )
+
+    def test_split_station_measures_queries_in_chunks(self):
+        mocked_v = MagicMock()
+        mocked_v.__iter__.return_value = [_test_sensor_request(), _test_sensor_request()]
+        mocked_v.__getitem__.return_value = _test_sensor_request()
+        responses = StationMeasureIterableResponses(
+            requests=mocked_v, start_packet_id=140, sensor_param=_test_sensor_api_param_datamodel()
+        )
+        queries = list(responses.queries(max_rows=1))
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(
+            queries[0],
+            StationMeasureIterableResponses.STATION_MEASUREMENT_QUERY.format(val=_expected_measure_record())
+        )
+        self.assertIn("(141, 99, 12, 20.5,", queries[1])
+        self.assertEqual(queries[2], responses.last_acquisition_query())
+        self.assertEqual(''.join(responses.queries()), responses.query())
+
+    def test_last_acquisition_is_taken_from_the_traversal_statistics(self):
+        mocked_v = MagicMock()
+        mocked_v.__iter__.return_value = [_test_sensor_request(), _test_sensor_request()]
+        responses = StationMeasureIterableResponses(
+            requests=mocked_v, start_packet_id=140, sensor_param=_test_sensor_api_param_datamodel()
+        )
+        responses.copy_buffer()
+        self.assertEqual(responses.stats.items_in, 2)
+        self.assertEqual(responses.stats.items_kept, 2)
+        self.assertEqual(responses.stats.max_timestamp, _test_sensor_request().timestamp)
+        self.assertEqual(responses.last_acquisition, _test_sensor_request().timestamp)
+        mocked_v.__getitem__.assert_not_called()
+
+    def test_partial_traversal_keeps_the_statistics_of_the_last_complete_one(self):
+        mocked_v = MagicMock()
+        mocked_v.__iter__.return_value = [_test_sensor_request(), _test_sensor_request()]
+        responses = StationMeasureIterableResponses(
+            requests=mocked_v, start_packet_id=140, sensor_param=_test_sensor_api_param_datamodel()
+        )
+        responses.copy_buffer()
+        self.assertTrue(responses)
+        self.assertEqual(responses.stats.items_in, 2)
+        self.assertEqual(responses.last_acquisition, _test_sensor_request().timestamp)
+        mocked_v.__getitem__.assert_not_called()
+
 
 if __name__ == '__main__':
     main()
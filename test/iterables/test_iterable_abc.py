@@ -0,0 +1,69 @@
+# ======================================
+# @author:  Davide Colombo
+# @date:    2022-02-26, sab, 10:20
+# ======================================
+from unittest import TestCase, main
+from unittest.mock import MagicMock
+from airquality.iterables.abc import IterableItemsABC, MaterializedIterableItems, IterableStats
+
+
+class _CountingIterableItems(IterableItemsABC):
+
+    def __init__(self, n: int):
+        self._n = n
+        self.produced = 0
+
+    def items(self):
+        for i in range(self._n):
+            self.produced += 1
+            yield i
+
+
+class TestIterableItemsABC(TestCase):
+
+    def test_lazy_items_are_computed_on_each_traversal(self):
+        iterable = _CountingIterableItems(n=3)
+        self.assertEqual(len(iterable), 3)
+        self.assertEqual(iterable[-1], 2)
+        self.assertGreater(iterable.produced, 6)
+
+    def test_truth_value_stops_at_the_first_item(self):
+        iterable = _CountingIterableItems(n=100)
+        self.assertTrue(iterable)
+        self.assertEqual(iterable.produced, 1)
+        self.assertFalse(_CountingIterableItems(n=0))
+
+    def test_materialize_computes_the_items_once(self):
+        iterable = _CountingIterableItems(n=3)
+        materialized = iterable.materialize()
+        self.assertIsInstance(materialized, MaterializedIterableItems)
+        self.assertTrue(materialized)
+        self.assertEqual(len(materialized), 3)
+        self.assertEqual(materialized[-1], 2)
+        self.assertEqual(list(materialized), [0, 1, 2])
+        self.assertEqual(list(materialized), [0, 1, 2])
+        self.assertEqual(iterable.produced, 3)
+        self.assertIs(materialized.materialize(), materialized)
+        with self.assertRaises(IndexError):
+            materialized[3]
+
+
+class TestIterableStats(TestCase):
+
+    def test_keep_and_drop_items(self):
+        stats = IterableStats()
+        stats.items_in = 4
+        stats.keep(MagicMock(timestamp=3))
+        stats.keep(MagicMock(timestamp=1))
+        stats.drop('already stored', n=2)
+        self.assertEqual(stats.items_kept, 2)
+        self.assertEqual(stats.items_dropped, 2)
+        self.assertEqual(stats.min_timestamp, 1)
+        self.assertEqual(stats.max_timestamp, 3)
+        self.assertEqual(stats.last.timestamp, 1)
+        self.assertEqual(str(stats), "2/4 kept (dropped already stored: 2)")
+        self.assertEqual(str(IterableStats()), "0/0 kept")
+
+
+if __name__ == '__main__':
+    main()
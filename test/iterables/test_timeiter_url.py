@@ -6,9 +6,10 @@
 #
 ######################################################
 from airquality.iterables.urls import AtmotubeIterableUrls, ThingspeakIterableUrls
+from airquality.extra.window import WindowPlanner
 from unittest import TestCase, main
 import test._test_utils as tutils
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 def _rome_timezone():
@@ -68,6 +69,20 @@ class TestThingspeakTimeIterableURL(TestCase):
         with self.assertRaises(IndexError):
             print(self._urls[4])
 
+    def test_windows_follow_the_planner(self):
+        planner = WindowPlanner(default_window=timedelta(days=7))
+        urls = ThingspeakIterableUrls(url="some_url", begin=self._begin, until=self._until, planner=planner)
+        windows = urls.windows()
+        begin, until = next(windows)
+        self.assertEqual((begin, until), (datetime(2021, 12, 1, 7, 46), datetime(2021, 12, 8, 7, 46)))
+        planner.observe(begin=begin, until=until, n_entries=70)       # 10 entries per day
+        self.assertEqual(next(windows), (datetime(2021, 12, 8, 7, 46), datetime(2021, 12, 29, 7, 10)))
+        self.assertIsNone(next(windows, None))
+        self.assertEqual(
+            urls.window_url(begin=begin, until=until),
+            "some_url&start=2021-12-01%2007:46:00&end=2021-12-08%2007:46:00"
+        )
+
 
 # ======================================== ATMOTUBE TESTS ========================================
 def _expected_atmotube_repr():
@@ -74,6 +74,23 @@ class TestAddSensorMeasuresRequestValidator(TestCase):
         )
         self._assert_valid_requests()
 
+    def test_validator_statistics_are_filled_while_traversing(self):
+        valid_requests = list(self._validator)
+        stats = self._validator.stats
+        self.assertEqual(stats.items_in, 2)
+        self.assertEqual(stats.items_kept, 1)
+        self.assertEqual(stats.dropped, {'not after last acquisition': 1})
+        self.assertIs(stats.last, valid_requests[-1])
+        self.assertEqual(stats.min_timestamp, stats.max_timestamp)
+        self.assertEqual(str(stats), "1/2 kept (dropped not after last acquisition: 1)")
+
+    def test_partial_traversal_does_not_publish_the_statistics(self):
+        self.assertTrue(self._validator)
+        self.assertEqual(self._validator.stats.items_in, 0)
+        list(self._validator)
+        self.assertTrue(self._validator)
+        self.assertEqual(str(self._validator.stats), "1/2 kept (dropped not after last acquisition: 1)")
+
 # =========== SUPPORT METHODS
     def _assert_valid_requests(self):
         req = self._validator[0]
@@ -115,6 +115,93 @@ class TestEnvironment(TestCase):
             mode=0o600
         )
 
+    def test_get_http_pool_properties(self):
+        http_environ = {'http_pool_connections': '4', 'http_pool_maxsize': '32', 'http_fetch_workers': '8'}
+        with patch.dict(os.environ, http_environ):
+            env = Environment()
+            self.assertEqual(env.http_fetch_workers, 8)
+            self.assertEqual(env.http_pool_connections, 4)
+            self.assertEqual(env.http_pool_maxsize, 32)
+
+    def test_http_cache_is_disabled_by_default(self):
+        with patch.dict(os.environ, _fake_environ_personalities()):
+            self.assertEqual(Environment().http_cache_dir, '')
+
+    def test_get_http_resilience_properties(self):
+        resilience_environ = {
+            'http_max_retries': '5', 'http_backoff_base': '0.25', 'http_backoff_max': '8',
+            'circuit_failure_threshold': '10', 'circuit_reset_timeout': '120'
+        }
+        with patch.dict(os.environ, resilience_environ):
+            env = Environment()
+            self.assertEqual(env.http_max_retries, 5)
+            self.assertEqual(env.http_backoff_base, 0.25)
+            self.assertEqual(env.http_backoff_max, 8.0)
+            self.assertEqual(env.circuit_failure_threshold, 10)
+            self.assertEqual(env.circuit_reset_timeout, 120.0)
+
+    def test_get_timezone_cache_properties(self):
+        with patch.dict(os.environ, {'timezone_grid': '0.05', 'timezone_cache_size': '128'}):
+            env = Environment()
+            self.assertEqual(env.timezone_grid, 0.05)
+            self.assertEqual(env.timezone_cache_size, 128)
+            self.assertFalse(env.timezone_warm_up)
+
+    def test_default_thingspeak_window_mode(self):
+        with patch.dict(os.environ, _fake_environ_personalities()):
+            self.assertEqual(Environment().thingspeak_window_mode, 'fixed')
+
+    def test_raise_value_error_when_thingspeak_window_mode_is_invalid(self):
+        with patch.dict(os.environ, {'thingspeak_window_mode': 'bad_mode'}):
+            with self.assertRaises(ValueError):
+                Environment().thingspeak_window_mode
+
+    def test_default_loader_mode(self):
+        with patch.dict(os.environ, _fake_environ_personalities()):
+            self.assertEqual(Environment().loader_mode, 'insert')
+
+    def test_get_loader_mode(self):
+        with patch.dict(os.environ, {'loader_mode': 'copy'}):
+            self.assertEqual(Environment().loader_mode, 'copy')
+
+    def test_raise_value_error_when_loader_mode_is_invalid(self):
+        with patch.dict(os.environ, {'loader_mode': 'bad_mode'}):
+            with self.assertRaises(ValueError):
+                Environment().loader_mode
+
+    def test_get_chunk_properties(self):
+        with patch.dict(os.environ, {'loader_mode': 'chunked', 'chunk_max_rows': '50', 'chunk_max_bytes': '4096'}):
+            env = Environment()
+            self.assertEqual(env.loader_mode, 'chunked')
+            self.assertEqual(env.chunk_max_rows, 50)
+            self.assertEqual(env.chunk_max_bytes, 4096)
+
+    def test_get_query_stats_properties(self):
+        with patch.dict(os.environ, {'query_stats': 'true', 'slow_query_threshold': '0.25'}):
+            env = Environment()
+            self.assertTrue(env.query_stats)
+            self.assertEqual(env.slow_query_threshold, 0.25)
+
+    def test_default_forecast_mode(self):
+        with patch.dict(os.environ, _fake_environ_personalities()):
+            self.assertEqual(Environment().forecast_mode, 'delete')
+
+    def test_get_forecast_mode(self):
+        with patch.dict(os.environ, {'forecast_mode': 'replace'}):
+            self.assertEqual(Environment().forecast_mode, 'replace')
+
+    def test_raise_value_error_when_forecast_mode_is_invalid(self):
+        with patch.dict(os.environ, {'forecast_mode': 'bad_mode'}):
+            with self.assertRaises(ValueError):
+                Environment().forecast_mode
+
+    def test_get_database_pool_properties(self):
+        with patch.dict(os.environ, {'dbpool_minconn': '4', 'dbpool_maxconn': '16', 'dbpool_ping_after': '5'}):
+            env = Environment()
+            self.assertEqual(env.dbpool_minconn, 4)
+            self.assertEqual(env.dbpool_maxconn, 16)
+            self.assertEqual(env.dbpool_ping_after, 5.0)
+
 
 if __name__ == '__main__':
     main()
@@ -8,7 +8,9 @@
 import test._test_utils as tutils
 from datetime import datetime
 from unittest import TestCase, main
+from functools import partial
 from unittest.mock import MagicMock, patch
+from airquality.database.gateway import DatabaseGateway
 from airquality.datamodel.fromdb import SensorApiParamDM, SensorInfoDM
 from airquality.usecase.atmotube import Atmotube
 
@@ -20,9 +22,9 @@ def _test_measure_param():
     return {'voc': 66, 'pm1': 48, 'pm25': 94, 'pm10': 2, 't': 4, 'h': 12, 'p': 39}
 
 
-def _test_max_mobile_packet_id_plus_one() -> int:
+def _test_start_mobile_packet_id() -> int:
     """
-    :return: the integer that represents the mobile max packet id plus one (returned by the DatabaseGateway).
+    :return: the integer that represents the first mobile packet id reserved by the DatabaseGateway.
     """
     return 12399
 
@@ -59,10 +61,10 @@ def _mocked_database_gway() -> MagicMock:
     :return: a *MagicMock* instance that implements all the *DatabaseGateway* relevant methods for this class.
     """
     mocked_gateway = MagicMock()
+    mocked_gateway.insert_measures.side_effect = partial(DatabaseGateway.insert_measures, mocked_gateway)
     mocked_gateway.query_measure_param_owned_by.return_value = _test_measure_param()
-    mocked_gateway.query_max_mobile_packet_id_plus_one.return_value = _test_max_mobile_packet_id_plus_one()
+    mocked_gateway.reserve_mobile_packet_ids.return_value = _test_start_mobile_packet_id()
     mocked_gateway.query_sensor_apiparam_of_type.return_value = [_test_sensor_api_param()]
-    mocked_gateway.query_last_acquisition_of.return_value = datetime(2021, 8, 11, 1, 59, tzinfo=_test_timezone())
     mocked_gateway.execute = MagicMock()
     mocked_gateway.query_mobile_sensor_unique_info.return_value = _test_sensor_identity()
     return mocked_gateway
@@ -75,7 +77,7 @@ def _mocked_json_api_resp() -> MagicMock:
 
     mocked_resp = MagicMock()
     mocked_resp.status_code = 200
-    mocked_resp.json.return_value = tutils.get_json_response_from_file(filename='atmotube_response.json')
+    mocked_resp.content = tutils.get_json_content_from_file(filename='atmotube_response.json')
     return mocked_resp
 
 
@@ -152,13 +154,14 @@ class AddAtmotubeMeasuresIntegrationTest(TestCase):
 # =========== TEST METHODS
 #     @patch('airquality.extra.logger_extra.logging')
     @patch('airquality.environment.os')
-    @patch('airquality.extra.url.requests.get')
+    @patch('airquality.extra.url.requests.Session.get')
     def test_add_atmotube_measures_usecase(self, mocked_get, mocked_os):
         mocked_os.environ = _mocked_environ()
         mocked_get.return_value = _mocked_json_api_resp()
         self._usecase.execute()
         self._assert_responses()
         self._assert_usecase_properties()
+        self._mocked_database_gway.unit_of_work.assert_called_once()
 
 # =========== SUPPORT METHODS
     def _assert_responses(self):
@@ -171,6 +174,11 @@ class AddAtmotubeMeasuresIntegrationTest(TestCase):
     def _assert_usecase_properties(self):
         self.assertEqual(self._usecase._measure_param, _test_measure_param())
         self.assertEqual(self._usecase._api_param, [_test_sensor_api_param()])
+        self.assertEqual(
+            self._usecase._filter_ts_of(_test_sensor_api_param()),
+            datetime(2021, 8, 11, 2, 0, tzinfo=_test_timezone())
+        )
+        self._mocked_database_gway.query_last_acquisition_of.assert_not_called()
 
 
 if __name__ == '__main__':
@@ -76,6 +76,25 @@ class TestAddPlaces(TestCase):
         self._assert_query()
         self._assert_usecase_properties(usecase)
 
+    @patch('airquality.environment.os')
+    @patch('airquality.usecase.geonames.listdir')
+    @patch('airquality.usecase.geonames.isfile')
+    @patch('airquality.iterables.fromfile.open')
+    def test_chunked_mode_streams_the_country_file(self, mocked_open, mocked_isfile, mocked_listdir, mocked_os):
+        mocked_os.environ = {**_mocked_environ(), 'loader_mode': 'chunked'}
+        mocked_listdir.return_value = _test_directory_content()
+        mocked_isfile.return_value = [True, True, True]
+        mocked_open.return_value = _mocked_responses()
+        self._mocked_database_gway.execute_all.side_effect = lambda queries: self.__setattr__('_queries', list(queries))
+        usecase = Geonames(database_gway=self._mocked_database_gway)
+        with patch('airquality.iterables.abc.IterableItemsABC.materialize') as mocked_materialize:
+            with self.assertLogs('airquality.usecase.geonames', level='DEBUG') as logs:
+                usecase.execute()
+        mocked_materialize.assert_not_called()
+        self._mocked_database_gway.execute.assert_not_called()
+        self.assertEqual(self._queries, [_expected_query()])
+        self.assertIn('inserted 1/1 places.', '\n'.join(logs.output))
+
 # =========== SUPPORT METHODS
     def _assert_query(self):
         query = self._mocked_database_gway.execute.call_args[1]['query']
@@ -5,10 +5,13 @@
 # Description: INSERT HERE THE DESCRIPTION
 #
 ######################################################
+import json
 import test._test_utils as tutils
 from datetime import datetime
 from unittest import TestCase, main
+from functools import partial
 from unittest.mock import MagicMock, patch
+from airquality.database.gateway import DatabaseGateway
 from airquality.datamodel.fromdb import SensorApiParamDM, SensorInfoDM
 from airquality.usecase.thingspeak import Thingspeak
 
@@ -20,9 +23,9 @@ def _test_measure_param():
     return {'pm1.0_atm_a': 12, 'pm2.5_atm_a': 13, 'pm10.0_atm_a': 14, 'temperature_a': 15, 'humidity_a': 16}
 
 
-def _test_max_station_packet_id_plus_one() -> int:
+def _test_start_station_packet_id() -> int:
     """
-    :return: the integer that represents the station max packet id plus one (returned by the DatabaseGateway).
+    :return: the integer that represents the first station packet id reserved by the DatabaseGateway.
     """
     return 140
 
@@ -43,7 +46,7 @@ def _test_sensor_api_param():
         key="fakekey",
         id="fakeid",
         ch="1A",
-        last=datetime(2021, 12, 20, 11, 38, tzinfo=_test_tzinfo())
+        last=datetime(2021, 12, 20, 12, 21, 40, tzinfo=_test_tzinfo())
     )
 
 
@@ -61,11 +64,11 @@ def _mocked_database_gway() -> MagicMock:
     :return: a *MagicMock* instance that implements all the *DatabaseGateway* relevant methods for this class.
     """
     mocked_gateway = MagicMock()
+    mocked_gateway.insert_measures.side_effect = partial(DatabaseGateway.insert_measures, mocked_gateway)
     mocked_gateway.execute = MagicMock()
-    mocked_gateway.query_max_station_packet_id_plus_one.return_value = _test_max_station_packet_id_plus_one()
+    mocked_gateway.reserve_station_packet_ids.return_value = _test_start_station_packet_id()
     mocked_gateway.query_sensor_apiparam_of_type.return_value = [_test_sensor_api_param()]
     mocked_gateway.query_measure_param_owned_by.return_value = _test_measure_param()
-    mocked_gateway.query_last_acquisition_of.return_value = datetime(2021, 12, 20, 12, 21, 40, tzinfo=_test_tzinfo())
     mocked_gateway.query_fixed_sensor_unique_info.return_value = _test_sensor_ident()
     return mocked_gateway
 
@@ -77,7 +80,7 @@ def _mocked_json_response() -> MagicMock:
 
     mocked_resp = MagicMock()
     mocked_resp.status_code = 200
-    mocked_resp.json.return_value = tutils.get_json_response_from_file(filename='thingspeak_response_1A.json')
+    mocked_resp.content = tutils.get_json_content_from_file(filename='thingspeak_response_1A.json')
     return mocked_resp
 
 
@@ -111,6 +114,18 @@ def _mocked_environ():
     }
 
 
+def _mocked_truncated_json_response() -> MagicMock:
+    """
+    :return: a *MagicMock* instance whose json response holds as many entries as the Thingspeak cap.
+    """
+
+    json_response = tutils.get_json_response_from_file(filename='thingspeak_response_1A.json')
+    mocked_resp = MagicMock()
+    mocked_resp.status_code = 200
+    mocked_resp.content = json.dumps({**json_response, 'feeds': json_response['feeds'][:1] * 8000}).encode('utf-8')
+    return mocked_resp
+
+
 class AddThingspeakMeasuresIntegrationTest(TestCase):
     """
     A class that defines the integration test for *AddThingspeakMeasures* usecase.
@@ -123,13 +138,63 @@ class AddThingspeakMeasuresIntegrationTest(TestCase):
 
 # =========== TEST METHODS
     @patch('airquality.environment.os')
-    @patch('airquality.extra.url.requests.get')
+    @patch('airquality.extra.url.requests.Session.get')
     def test_add_thingspeak_measures_usecase(self, mocked_get, mocked_os):
         mocked_os.environ = _mocked_environ()
         mocked_get.return_value = _mocked_json_response()
         self._usecase.execute()
         self._assert_responses()
         self._assert_usecase_properties()
+        self._mocked_database_gway.unit_of_work.assert_called_once()
+
+    @patch('airquality.environment.os')
+    @patch('airquality.extra.url.requests.Session.get')
+    def test_add_thingspeak_measures_in_chunks(self, mocked_get, mocked_os):
+        mocked_os.environ = {**_mocked_environ(), 'loader_mode': 'chunked', 'chunk_max_rows': '1'}
+        usecase = Thingspeak(database_gway=self._mocked_database_gway)
+        mocked_get.return_value = _mocked_json_response()
+        usecase.execute()
+        self._mocked_database_gway.execute.assert_not_called()
+        queries = self._mocked_database_gway.execute_all.call_args[1]['queries']
+        self.assertEqual(list(queries), [_expected_query(), _expected_update_query()])
+
+    @patch('airquality.environment.os')
+    @patch('airquality.extra.url.requests.Session.get')
+    def test_split_truncated_window_in_halves(self, mocked_get, mocked_os):
+        mocked_os.environ = _mocked_environ()
+        usecase = Thingspeak(database_gway=self._mocked_database_gway)
+        mocked_get.side_effect = lambda url, **kwargs: \
+            _mocked_truncated_json_response() if mocked_get.call_count == 1 else _mocked_json_response()
+        usecase.execute()
+        urls = [c.kwargs['url'] for c in mocked_get.call_args_list[:3]]
+        self.assertEqual(
+            urls,
+            ["fake_url&start=2021-12-20%2011:21:40&end=2021-12-27%2011:21:40",
+             "fake_url&start=2021-12-20%2011:21:40&end=2021-12-23%2023:21:40",
+             "fake_url&start=2021-12-23%2023:21:40&end=2021-12-27%2011:21:40"]
+        )
+        self.assertEqual(
+            self._mocked_database_gway.execute.call_args_list[0].kwargs['query'],
+            _expected_query() + _expected_update_query()
+        )
+
+    @patch('airquality.environment.os')
+    @patch('airquality.extra.url.requests.Session.get')
+    def test_adaptive_windows_are_planned_after_the_previous_one_is_observed(self, mocked_get, mocked_os):
+        mocked_os.environ = {**_mocked_environ(), 'thingspeak_window_mode': 'adaptive', 'http_fetch_workers': '4'}
+        usecase = Thingspeak(database_gway=self._mocked_database_gway)
+        planned = []
+
+        def mocked_observed_get(url, **kwargs):
+            planned.append(url)
+            return _mocked_json_response()
+
+        mocked_get.side_effect = mocked_observed_get
+        with patch('airquality.usecase.thingspeak.WindowPlanner.observe') as mocked_observe:
+            mocked_observe.side_effect = lambda **kwargs: self.assertEqual(len(planned), mocked_observe.call_count)
+            usecase.execute()
+        self.assertEqual(usecase._fetch_workers(), 1)
+        self.assertGreaterEqual(mocked_observe.call_count, 1)
 
 # =========== SUPPORT METHODS
     def _assert_responses(self):
@@ -140,9 +205,14 @@ class AddThingspeakMeasuresIntegrationTest(TestCase):
         )
 
     def _assert_usecase_properties(self):
-        self.assertEqual(self._usecase._packet_id(), 140)
+        self.assertEqual(self._usecase._packet_id(n=1), 140)
         self.assertEqual(self._usecase._api_param, [_test_sensor_api_param()])
         self.assertEqual(self._usecase._measure_param, _test_measure_param())
+        self.assertEqual(
+            self._usecase._filter_ts_of(_test_sensor_api_param()),
+            datetime(2021, 12, 20, 12, 22, 40, tzinfo=_test_tzinfo())
+        )
+        self._mocked_database_gway.query_last_acquisition_of.assert_not_called()
 
 
 if __name__ == '__main__':
@@ -31,7 +31,7 @@ def _mocked_datetime_now() -> MagicMock:
 def _setup_mocked_json_response() -> MagicMock:
     mocked_resp = MagicMock()
     mocked_resp.status_code = 200
-    mocked_resp.json.return_value = tutils.get_json_response_from_file(filename='purpleair_response.json')
+    mocked_resp.content = tutils.get_json_content_from_file(filename='purpleair_response.json')
     return mocked_resp
 
 
@@ -86,7 +86,7 @@ class AddPurpleairFixedSensorsIntegrationTest(TestCase):
 # =========== TEST METHODS
     @patch('airquality.environment.os')
     @patch('airquality.extra.timest.datetime')
-    @patch('airquality.extra.url.requests.get')
+    @patch('airquality.extra.url.requests.Session.get')
     def test_add_fixed_sensors_usecase(self, mocked_get, mocked_datetime, mocked_os):
         mocked_os.environ = {'purpleair_url': 'fake_url'}
         mocked_get.return_value = _setup_mocked_json_response()
@@ -5,6 +5,8 @@
 # Description: INSERT HERE THE DESCRIPTION
 #
 ######################################################
+import os
+from datetime import datetime, timezone
 import test._test_utils as tutils
 from unittest import TestCase, main
 from unittest.mock import MagicMock, patch
@@ -23,7 +25,7 @@ def _test_weather_conditions():
 def _mocked_responses() -> MagicMock:
     mocked_r = MagicMock()
     mocked_r.status_code = 200
-    mocked_r.json.return_value = tutils.get_json_response_from_file(filename='openweather_data.json')
+    mocked_r.content = tutils.get_json_content_from_file(filename='openweather_data.json')
     return mocked_r
 
 
@@ -60,7 +62,7 @@ def _mocked_database_gway() -> MagicMock:
     mocked_gateway.query_openweathermap_keys.return_value = [_test_opwmap_key()]
     mocked_gateway.query_weather_conditions.return_value = _test_weather_conditions()
     mocked_gateway.query_place_location.return_value = _test_database_geolocation_of_city()
-    mocked_gateway.exists_weather_alert_of.return_value = False
+    mocked_gateway.query_weather_alert_keys.return_value = set()
     mocked_gateway.execute = MagicMock()
     return mocked_gateway
 
@@ -112,7 +114,7 @@ class AddWeatherDataIntegrationTest(TestCase):
 # =========== TEST METHOD
     @patch('airquality.environment.os')
     @patch('airquality.iterables.fromapi.open')
-    @patch('airquality.extra.url.requests.get')
+    @patch('airquality.extra.url.requests.Session.get')
     def test_add_weather_data(self, mocked_get, mocked_open, mocked_os):
         mocked_os.environ = {'openweathermap_url': 'fake_url'}
         mocked_get.return_value = _mocked_responses()
@@ -120,6 +122,58 @@ class AddWeatherDataIntegrationTest(TestCase):
         self._usecase.execute()
         self._assert_query()
         self._assert_usecase_properties()
+        self._mocked_database_gway.exists_weather_alert_of.assert_not_called()
+        self.assertEqual(len(self._usecase._known_alerts), 1)
+        self._mocked_database_gway.update_openweathermap_keys_usage.assert_called_once_with(
+            done_requests={'fakekey': 1}
+        )
+
+    @patch('airquality.environment.os')
+    @patch('airquality.iterables.fromapi.open')
+    @patch('airquality.extra.url.requests.Session.get')
+    def test_keys_usage_error_does_not_hide_the_fetch_error(self, mocked_get, mocked_open, mocked_os):
+        mocked_os.environ = {'openweathermap_url': 'fake_url'}
+        mocked_get.side_effect = RuntimeError("fetch error")
+        mocked_open.return_value = _mocked_city_file()
+        self._mocked_database_gway.update_openweathermap_keys_usage.side_effect = RuntimeError("update error")
+        with self.assertRaisesRegex(RuntimeError, "fetch error"):
+            self._usecase.execute()
+        self._mocked_database_gway.update_openweathermap_keys_usage.assert_called_once()
+
+    @patch('airquality.environment.os')
+    @patch('airquality.iterables.fromapi.open')
+    @patch('airquality.extra.url.requests.Session.get')
+    def test_skip_weather_alerts_already_known(self, mocked_get, mocked_open, mocked_os):
+        mocked_os.environ = {'openweathermap_url': 'fake_url', 'resource_dir': os.environ['resource_dir']}
+        mocked_get.return_value = _mocked_responses()
+        mocked_open.return_value = _mocked_city_file()
+        mocked_database_gway = _mocked_database_gway()
+        mocked_database_gway.query_weather_alert_keys.return_value = {
+            (14400, 'Fake event', datetime(2022, 1, 24, 18, tzinfo=timezone.utc))
+        }
+        Openweathermap(database_gway=mocked_database_gway).execute()
+        query = mocked_database_gway.execute.call_args[1]['query']
+        self.assertNotIn("INSERT INTO level0_raw.weather_alert", query)
+        mocked_database_gway.exists_weather_alert_of.assert_not_called()
+
+    @patch('airquality.environment.os')
+    @patch('airquality.iterables.fromapi.open')
+    @patch('airquality.extra.url.requests.Session.get')
+    def test_replace_weather_data_of_each_geoarea(self, mocked_get, mocked_open, mocked_os):
+        mocked_os.environ = {'openweathermap_url': 'fake_url', 'forecast_mode': 'replace',
+                             'resource_dir': os.environ['resource_dir']}
+        mocked_get.return_value = _mocked_responses()
+        mocked_open.return_value = _mocked_city_file()
+        mocked_database_gway = _mocked_database_gway()
+        usecase = Openweathermap(database_gway=mocked_database_gway)
+        usecase.execute()
+
+        mocked_database_gway.query_hourly_forecast_records.assert_not_called()
+        mocked_database_gway.query_daily_forecast_records.assert_not_called()
+        queries = [c[1]['query'] for c in mocked_database_gway.execute.call_args_list]
+        self.assertEqual(len(queries), 1)
+        self.assertIn("DELETE FROM level0_raw.hourly_forecast WHERE geoarea_id = 14400;", queries[0])
+        self.assertIn("INSERT INTO level0_raw.hourly_forecast", queries[0])
 
 # =========== SUPPORT METHODS
     def _assert_query(self):
@@ -2,6 +2,8 @@
 # @author:  Davide Colombo
 # @date:    2022-02-1, mar, 10:15
 # ======================================
+import os
+import tempfile
 from datetime import datetime
 import test._test_utils as tutils
 from unittest import TestCase, main
@@ -11,24 +13,24 @@ from airquality.usecase.purp_update import PurpUpdate
 
 
 def _test_queried_locations():
-    return SensorLocationDM(
-        sensor_id=12,
-        longitude=9.44,
-        latitude=45.99
-    )
+    return {
+        1: SensorLocationDM(sensor_id=12, longitude=9.44, latitude=45.99),
+        2: SensorLocationDM(sensor_id=13, longitude=19.888, latitude=37.3333),
+        3: SensorLocationDM(sensor_id=14, longitude=9.44, latitude=45.99)
+    }
 
 
 def _mocked_database_gateway():
     mocked_dg = MagicMock()
     mocked_dg.execute = MagicMock()
-    mocked_dg.query_purpleair_sensor_location.return_value = _test_queried_locations()
+    mocked_dg.query_purpleair_sensor_locations.return_value = _test_queried_locations()
     return mocked_dg
 
 
 def _setup_mocked_json_response() -> MagicMock:
     mocked_resp = MagicMock()
     mocked_resp.status_code = 200
-    mocked_resp.json.return_value = tutils.get_json_response_from_file(filename='purpleair_response.json')
+    mocked_resp.content = tutils.get_json_content_from_file(filename='purpleair_response.json')
     return mocked_resp
 
 
@@ -42,15 +44,18 @@ def _mocked_now():
 
 def _expected_update_insert_query():
     ts = '2022-01-22 10:37:00+01:00'
-    geom = "ST_GeomFromText('POINT(13.2222 78.9999)', 4326)"
-    return f"UPDATE level0_raw.sensor_at_location SET valid_to = '{ts}' WHERE sensor_id = 12 AND valid_to IS NULL;" \
-           f"INSERT INTO level0_raw.sensor_at_location (sensor_id, valid_from, geom) VALUES (12, '{ts}', {geom});"
+    geom1 = "ST_GeomFromText('POINT(12.1234 40.1234)', 4326)"
+    geom3 = "ST_GeomFromText('POINT(13.2222 78.9999)', 4326)"
+    return f"UPDATE level0_raw.sensor_at_location SET valid_to = '{ts}' " \
+           f"WHERE sensor_id IN (12,14) AND valid_to IS NULL;" \
+           f"INSERT INTO level0_raw.sensor_at_location (sensor_id, valid_from, geom) " \
+           f"VALUES (12, '{ts}', {geom1}),(14, '{ts}', {geom3});"
 
 
 class TestUpdatePurpleairLocationsUsecase(TestCase):
 
     @patch('airquality.extra.timest.datetime')
-    @patch('airquality.extra.url.requests.get')
+    @patch('airquality.extra.url.requests.Session.get')
     def test_update_purpleair_locations(self, mocked_get, mocked_datetime):
         mocked_datetime.now.return_value = _mocked_now()
         mocked_get.return_value = _setup_mocked_json_response()
@@ -66,8 +71,54 @@ class TestUpdatePurpleairLocationsUsecase(TestCase):
 
         self.assertEqual(
             mocked_database_gway.execute.call_count,
-            3
+            1
         )
+        mocked_database_gway.query_purpleair_sensor_locations.assert_called_once()
+        mocked_database_gway.query_purpleair_sensor_location.assert_not_called()
+
+    @patch('airquality.extra.url.requests.Session.get')
+    def test_do_not_execute_query_when_no_sensor_has_moved(self, mocked_get):
+        mocked_get.return_value = _setup_mocked_json_response()
+        mocked_database_gway = _mocked_database_gateway()
+        mocked_database_gway.query_purpleair_sensor_locations.return_value = {
+            2: SensorLocationDM(sensor_id=13, longitude=19.888, latitude=37.3333)
+        }
+        PurpUpdate(database_gway=mocked_database_gway).execute()
+        mocked_database_gway.execute.assert_not_called()
+
+    @patch('airquality.environment.os')
+    @patch('airquality.extra.timest.datetime')
+    @patch('airquality.extra.url.requests.Session.get')
+    def test_update_purpleair_locations_from_stream(self, mocked_get, mocked_datetime, mocked_os):
+        mocked_os.environ = {'purp_update_url': 'fake_url', 'json_streaming': 'true'}
+        mocked_datetime.now.return_value = _mocked_now()
+        text = tutils.get_json_content_from_file(filename='purpleair_response.json')
+        mocked_resp = MagicMock()
+        mocked_resp.status_code = 200
+        mocked_resp.encoding = 'utf-8'
+        mocked_resp.iter_content.return_value = iter([text[i:i + 64] for i in range(0, len(text), 64)])
+        mocked_get.return_value = mocked_resp
+        mocked_database_gway = _mocked_database_gateway()
+        PurpUpdate(database_gway=mocked_database_gway).execute()
+
+        mocked_resp.json.assert_not_called()
+        self.assertEqual(mocked_database_gway.execute.call_args[1]['query'], _expected_update_insert_query())
+
+    @patch('airquality.environment.os')
+    @patch('airquality.extra.timest.datetime')
+    @patch('airquality.extra.url.requests.Session.get')
+    def test_reuse_fresh_purpleair_snapshot(self, mocked_get, mocked_datetime, mocked_os):
+        mocked_datetime.now.return_value = _mocked_now()
+        mocked_get.return_value = _setup_mocked_json_response()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mocked_os.environ = {
+                'purp_update_url': 'fake_url', 'purpleair_snapshot_file': os.path.join(tmpdir, 'purpleair.json.gz')
+            }
+            for _ in range(2):
+                mocked_database_gway = _mocked_database_gateway()
+                PurpUpdate(database_gway=mocked_database_gway).execute()
+                self.assertEqual(mocked_database_gway.execute.call_args[1]['query'], _expected_update_insert_query())
+        mocked_get.assert_called_once()
 
 
 if __name__ == '__main__':